@@ -0,0 +1,287 @@
+"""Synthetic raw 311 exports for the benchmarks.
+
+Writes the same files ``van311.ingest`` reads from ``data/``, with the same
+column names, delimiters, encodings and value formats as the City's exports,
+so a synthetic folder can be passed straight to ``--source``::
+
+    python -m benchmarks.generate --scale 10 --out /tmp/van311-x10
+
+Values are random but shaped like the real data: request types and channels
+follow skewed frequencies, requests open mostly during the day and on
+weekdays, completion times are long-tailed, about one request in ten is still
+open (and so dropped at ingest), and some requests carry coordinates inside
+their local area.
+
+``scale`` multiplies the row counts in ``BASE_ROWS``. Service requests and
+inquiry volume get more rows over the same calendar span; the contact centre
+export keeps its span and splits every day into ``scale`` rows, as if calls
+were reported per queue, since the dashboard sums calls per date anyway.
+Generation is seeded, so a scale always produces the same files.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from van311 import paths, times
+from van311.categories import CATEGORY_MAPPING
+
+# Row counts at scale 1
+BASE_ROWS = {
+    paths.SERVICE_REQUESTS_CSV: 200_000,
+    paths.INQUIRY_VOLUME_CSV: 20_000,
+    paths.CONTACT_CENTRE_CSV: 5_585,
+}
+
+# Rows generated and written at a time
+CHUNK_ROWS = 500_000
+
+# Calendar span of the generated exports
+SERVICE_REQUEST_START = pd.Timestamp("2022-01-01", tz="UTC")
+SERVICE_REQUEST_END = pd.Timestamp("2024-10-01", tz="UTC")
+INQUIRY_VOLUME_MONTHS = pd.period_range("2010-01", "2024-09", freq="M")
+CONTACT_CENTRE_END = pd.Timestamp("2024-09-30")
+
+# Local areas and rough centroids (lat, lon)
+LOCAL_AREAS = {
+    "Arbutus Ridge": (49.2460, -123.1610),
+    "Downtown": (49.2820, -123.1180),
+    "Dunbar-Southlands": (49.2380, -123.1880),
+    "Fairview": (49.2640, -123.1310),
+    "Grandview-Woodland": (49.2760, -123.0670),
+    "Hastings-Sunrise": (49.2780, -123.0400),
+    "Kensington-Cedar Cottage": (49.2470, -123.0730),
+    "Kerrisdale": (49.2230, -123.1590),
+    "Killarney": (49.2180, -123.0380),
+    "Kitsilano": (49.2670, -123.1630),
+    "Marpole": (49.2100, -123.1300),
+    "Mount Pleasant": (49.2630, -123.0970),
+    "Oakridge": (49.2300, -123.1230),
+    "Renfrew-Collingwood": (49.2490, -123.0410),
+    "Riley Park": (49.2450, -123.1030),
+    "Shaughnessy": (49.2510, -123.1380),
+    "South Cambie": (49.2460, -123.1220),
+    "Strathcona": (49.2770, -123.0880),
+    "Sunset": (49.2190, -123.0910),
+    "Victoria-Fraserview": (49.2170, -123.0650),
+    "West End": (49.2850, -123.1330),
+    "West Point Grey": (49.2650, -123.2030),
+}
+
+DEPARTMENTS = [
+    "ENG - Sanitation Services",
+    "ENG - Streets",
+    "ENG - Parking Management",
+    "ENG - Traffic and Electrical Operations",
+    "ENG - Water and Sewers",
+    "PR - Urban Forestry",
+    "PR - Park Operations",
+    "DBL - Property Use Inspections",
+    "DBL - Animal Services",
+    "CSG - Licensing",
+]
+
+SERVICE_REQUEST_CHANNELS = {"Phone": 0.45, "WEB": 0.3, "Mobile App": 0.2, "E-mail": 0.03, "Social Media": 0.02}
+INQUIRY_CHANNELS = {"Phone": 0.55, "Web": 0.2, "Chat": 0.1, "E-mail": 0.1, "Mobile App": 0.05}
+
+# Closure reason -> closure category (Closure_Reason_Categorization.csv)
+CLOSURE_REASONS = {
+    "Service provided": "Resolved",
+    "Issue resolved": "Resolved",
+    "Assigned to inspector": "Pending",
+    "Further action has been planned": "Pending",
+    "Issue not found or inaccessible": "Not Resolved",
+    "Duplicate of existing request": "Not Resolved",
+    "Not City responsibility": "Not Resolved",
+    "Unknown": "Unknown",
+}
+
+# Share of requests still open, and share published with coordinates
+OPEN_SHARE = 0.1
+COORDINATE_SHARE = 0.6
+
+# Relative request volume by weekday (Monday first) and hour of day
+WEEKDAY_WEIGHTS = np.array([1.15, 1.1, 1.1, 1.05, 1.0, 0.8, 0.8])
+HOUR_WEIGHTS = np.array(
+    [0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.5, 1.0, 1.6, 1.9, 2.0, 2.0,
+     1.9, 1.9, 1.8, 1.7, 1.5, 1.3, 1.1, 1.0, 0.9, 0.7, 0.5, 0.3]
+)
+
+
+def _zipf_weights(count, exponent=1.1):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _request_types():
+    seen = {}
+    for request_types in CATEGORY_MAPPING.values():
+        for request_type in request_types:
+            seen.setdefault(request_type, None)
+    return list(seen)
+
+
+def _iso_timestamps(utc_seconds):
+    """``2022-09-16T20:21:59-07:00`` strings (Vancouver offset) for UTC epoch seconds."""
+    utc = pd.to_datetime(utc_seconds, unit="s", utc=True)
+    local = utc.tz_convert(times.LOCAL_TIMEZONE).tz_localize(None)
+    offset_hours = (local - utc.tz_localize(None)).total_seconds().to_numpy() // 3600
+    offsets = np.where(offset_hours == -7, "-07:00", "-08:00")
+    wall_clock = np.datetime_as_string(local.to_numpy().astype("datetime64[s]"), unit="s")
+    return np.char.add(wall_clock, offsets)
+
+
+def _open_seconds(rng, count):
+    """UTC epoch seconds with the weekday and hour-of-day profile of real requests."""
+    days = pd.date_range(SERVICE_REQUEST_START, SERVICE_REQUEST_END, freq="D", inclusive="left")
+    day_weights = WEEKDAY_WEIGHTS[days.weekday]
+    day = rng.choice(len(days), count, p=day_weights / day_weights.sum())
+    hour = rng.choice(24, count, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    # Profile is in Vancouver time; shifting by a fixed 8 hours is close enough
+    seconds = (days.asi8[day] // 10**9) + (hour + 8) * 3600 + rng.integers(0, 3600, count)
+    return seconds
+
+
+def service_request_chunk(rng, first_id, count):
+    """``count`` raw service request rows with BI_IDs from ``first_id``."""
+    request_types = _request_types()
+    areas = list(LOCAL_AREAS)
+    centroids = np.array(list(LOCAL_AREAS.values()))
+    channels = list(SERVICE_REQUEST_CHANNELS)
+
+    opened = _open_seconds(rng, count)
+    # Long-tailed completion times: hours for most requests, months for a few
+    completion_days = rng.lognormal(mean=0.5, sigma=1.5, size=count)
+    closed = pd.to_datetime(opened + completion_days * times.SECONDS_PER_DAY, unit="s", utc=True)
+    close_date = np.datetime_as_string(
+        closed.tz_convert(times.LOCAL_TIMEZONE).tz_localize(None).to_numpy().astype("datetime64[D]")
+    ).astype(object)
+    modified = opened + np.minimum(completion_days, 400) * times.SECONDS_PER_DAY + rng.integers(0, 86400, count)
+
+    is_open = rng.random(count) < OPEN_SHARE
+    close_date[is_open] = None
+    closure_reason = rng.choice(list(CLOSURE_REASONS), count).astype(object)
+    closure_reason[is_open] = None
+
+    area = rng.choice(len(areas), count, p=_zipf_weights(len(areas), 0.5))
+    has_coordinates = rng.random(count) < COORDINATE_SHARE
+    latitude = np.where(has_coordinates, centroids[area, 0] + rng.normal(0, 0.006, count), np.nan)
+    longitude = np.where(has_coordinates, centroids[area, 1] + rng.normal(0, 0.009, count), np.nan)
+    local_area = np.array(areas, dtype=object)[area]
+    # A few requests come without a local area, as in the real export
+    local_area[rng.random(count) < 0.02] = None
+
+    return pd.DataFrame(
+        {
+            "Department": rng.choice(DEPARTMENTS, count, p=_zipf_weights(len(DEPARTMENTS))),
+            "Service request type": np.array(request_types, dtype=object)[
+                rng.choice(len(request_types), count, p=_zipf_weights(len(request_types)))
+            ],
+            "Status": np.where(is_open, "Open", "Close"),
+            "Closure reason": closure_reason,
+            "Service request open timestamp": _iso_timestamps(opened),
+            "Service request close date": close_date,
+            "Last modified timestamp": _iso_timestamps(modified),
+            "Address": "",
+            "Local area": local_area,
+            "Channel": rng.choice(channels, count, p=list(SERVICE_REQUEST_CHANNELS.values())),
+            "Latitude": latitude.round(6),
+            "Longitude": longitude.round(6),
+            "BI_ID": np.arange(first_id, first_id + count),
+        }
+    )
+
+
+def inquiry_volume(rng, count):
+    """``count`` raw monthly inquiry volume rows."""
+    request_types = _request_types()
+    month = rng.integers(0, len(INQUIRY_VOLUME_MONTHS), count)
+    # Yearly season on top of slow growth
+    level = 50 * (1 + month / len(INQUIRY_VOLUME_MONTHS)) * (1 + 0.3 * np.sin(2 * np.pi * month / 12))
+    return pd.DataFrame(
+        {
+            "Department": rng.choice(DEPARTMENTS, count),
+            "Type": rng.choice(request_types, count, p=_zipf_weights(len(request_types))),
+            "Year Month": INQUIRY_VOLUME_MONTHS.astype(str)[month],
+            "Channel": rng.choice(list(INQUIRY_CHANNELS), count, p=list(INQUIRY_CHANNELS.values())),
+            "Number of Records": rng.poisson(level) + 1,
+            "BI_ID": np.arange(1, count + 1),
+        }
+    )
+
+
+def contact_centre_metrics(rng, days, rows_per_day):
+    """Daily contact centre rows, newest first, ``rows_per_day`` rows per date."""
+    dates = pd.date_range(end=CONTACT_CENTRE_END, periods=days, freq="D")[::-1]
+    date = np.repeat(dates, rows_per_day)
+    count = len(date)
+    weekly = np.where(date.weekday < 5, 1.0, 0.45)
+    offered = rng.poisson(700 * weekly / rows_per_day) + 1
+    busy = offered / (700 / rows_per_day)
+    abandoned_share = np.clip(rng.normal(0.03, 0.02, count) * busy**2, 0, 0.5)
+    abandoned = np.minimum(rng.binomial(offered, abandoned_share), offered)
+    speed = np.clip(rng.gamma(2.0, 15.0, count) * busy**3, 0, None)
+    service_level = np.clip(np.exp(-speed / 60) + rng.normal(0, 0.02, count), 0, 1)
+    return pd.DataFrame(
+        {
+            "Date": date.strftime("%Y-%m-%d"),
+            "CallsOffered": offered,
+            "CallsHandled": offered - abandoned,
+            "CallsAbandoned": abandoned,
+            "AverageSpeedofAnswer": speed,
+            "ServiceLevel": service_level,
+            "BI_ID": np.arange(1, count + 1),
+        }
+    )
+
+
+def generate(out_dir, scale=1, seed=0):
+    """Write every raw export ``ingest`` reads into ``out_dir`` at ``scale`` times ``BASE_ROWS``.
+
+    Returns the row count written per file.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    rows = {}
+
+    service_requests = out_dir / paths.SERVICE_REQUESTS_CSV
+    total = int(BASE_ROWS[paths.SERVICE_REQUESTS_CSV] * scale)
+    with open(service_requests, "w", encoding="utf-8", newline="") as handle:
+        for first in range(0, total, CHUNK_ROWS):
+            chunk = service_request_chunk(rng, first + 1, min(CHUNK_ROWS, total - first))
+            chunk.to_csv(handle, sep=";", index=False, header=first == 0)
+    rows[paths.SERVICE_REQUESTS_CSV] = total
+
+    pd.DataFrame(
+        {"Local area": list(LOCAL_AREAS), "Latitude": [c[0] for c in LOCAL_AREAS.values()],
+         "Longitude": [c[1] for c in LOCAL_AREAS.values()]}
+    ).to_csv(out_dir / paths.GEOCODES_CSV, index=False)
+    pd.DataFrame(
+        {"Closure Reason": list(CLOSURE_REASONS), "Category_cr": list(CLOSURE_REASONS.values())}
+    ).to_csv(out_dir / paths.CLOSURE_REASONS_CSV, index=False)
+
+    inquiries = inquiry_volume(rng, int(BASE_ROWS[paths.INQUIRY_VOLUME_CSV] * scale))
+    inquiries.to_csv(out_dir / paths.INQUIRY_VOLUME_CSV, sep=";", index=False)
+    rows[paths.INQUIRY_VOLUME_CSV] = len(inquiries)
+
+    contact_centre = contact_centre_metrics(rng, BASE_ROWS[paths.CONTACT_CENTRE_CSV], max(1, round(scale)))
+    contact_centre.to_csv(out_dir / paths.CONTACT_CENTRE_CSV, sep=";", index=False, encoding="utf-8-sig")
+    rows[paths.CONTACT_CENTRE_CSV] = len(contact_centre)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic raw 311 exports.")
+    parser.add_argument("--out", type=Path, required=True, help="folder to write the CSV files into")
+    parser.add_argument("--scale", type=float, default=1, help="multiple of the base row counts (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    for name, count in generate(args.out, args.scale, args.seed).items():
+        print(f"{name}: {count:,} rows")
+
+
+if __name__ == "__main__":
+    main()
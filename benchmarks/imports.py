@@ -0,0 +1,110 @@
+"""Import-time budget for the headless analytics API.
+
+Importing ``van311.query`` (and so every loader and aggregation) must stay
+under ``BUDGET_MS`` and must not pull in Streamlit or a plotting library,
+which are only needed once a page draws a chart::
+
+    python -m benchmarks.imports    # exits 1 when over budget
+
+Each measurement is a fresh interpreter, so nothing is already imported;
+the median of ``--repeats`` runs is compared with the budget.
+
+The dashboard scripts (``app.py`` and ``pages/``) draw with Streamlit as
+they run, so they cannot be imported to be timed. ``eager_page_imports``
+instead reads them and reports plotting libraries imported at module level
+rather than inside the function that builds the chart.
+"""
+
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+
+from van311 import paths
+
+MODULE = "van311.query"
+
+# Wall time of the import itself, in a fresh interpreter (milliseconds)
+BUDGET_MS = 1000
+
+# Plotting packages, imported only where a chart is built
+PLOTTING = ["plotly", "altair", "matplotlib"]
+
+# Top-level packages the headless API must not import
+FORBIDDEN = ["streamlit"] + PLOTTING
+
+# Dashboard scripts, relative to the repository root
+PAGES = ["app.py", "pages/*.py"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def measure_import(module=MODULE):
+    """``(milliseconds, top-level packages loaded)`` of importing ``module`` in a new interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=paths.ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    probe = json.loads(result.stdout)
+    return probe["ms"], set(probe["modules"])
+
+
+def check(module=MODULE, budget_ms=BUDGET_MS, repeats=5):
+    """Problems with importing ``module`` (empty when within budget), and the median time."""
+    timings, loaded = [], set()
+    for _ in range(repeats):
+        elapsed, modules = measure_import(module)
+        timings.append(elapsed)
+        loaded |= modules
+    median = statistics.median(timings)
+    problems = [f"imports {name}" for name in FORBIDDEN if name in loaded]
+    if median > budget_ms:
+        problems.append(f"takes {median:,.0f} ms (budget {budget_ms:,} ms)")
+    return problems, median
+
+
+def eager_page_imports(root=paths.ROOT_DIR):
+    """``script imports package`` for each plotting import at the top level of a dashboard script."""
+    problems = []
+    for pattern in PAGES:
+        for script in sorted(root.glob(pattern)):
+            for node in ast.parse(script.read_text()).body:
+                if isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom) and node.module:
+                    names = [node.module]
+                else:
+                    continue
+                for package in sorted({name.split(".")[0] for name in names} & set(PLOTTING)):
+                    problems.append(f"{script.relative_to(root)} imports {package} at module level")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the headless API.")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help=f"budget (default: {BUDGET_MS})")
+    parser.add_argument("--repeats", type=int, default=5, help="fresh interpreters to time (default: 5)")
+    args = parser.parse_args(argv)
+    problems, median = check(budget_ms=args.budget_ms, repeats=args.repeats)
+    for problem in problems:
+        print(f"{MODULE} {problem}")
+    print(f"import {MODULE}: {median:,.0f} ms")
+    page_problems = eager_page_imports()
+    for problem in page_problems:
+        print(problem)
+    sys.exit(1 if problems or page_problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Time and memory-profile the dashboard's data work at growing data sizes.
+
+For each scale the harness generates synthetic raw exports
+(``benchmarks.generate``), rebuilds a store from them with ``van311.ingest``,
+then runs every dashboard section's aggregation calls headlessly, exactly as
+the pages make them, against that store::
+
+    python -m benchmarks.run                   # scales 1, 10 and 100
+    python -m benchmarks.run --scales 1 10
+    python -m benchmarks.run --compare BASE HEAD
+
+Each section is measured three ways:
+
+``cold_ms``
+    Median time with every cache dropped first, so loads from the store are
+    included (what the first visitor after a data refresh waits for).
+``warm_ms``
+    Median time of a repeat call, answered from the caches (a rerun).
+``peak_mb``
+    Peak memory allocated while running the section cold, from
+    ``tracemalloc``. Arrow's own buffers are not traced, pandas and numpy
+    memory is.
+
+The ingest is run in a child process and reported as a section of its own,
+with its wall time and the child's peak resident memory. The time to import
+the headless API (``benchmarks.imports``) is recorded once per run.
+
+Results are written to ``benchmarks/results/<commit>.json`` (``-dirty`` is
+appended when the working tree has uncommitted changes). ``--compare`` reads
+two result files, by commit or path, and prints the ratio of every
+measurement, marking the ones slower or larger than ``--threshold``.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks import generate, imports
+from van311 import aggregations as agg
+from van311 import cache, paths
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+WORK_DIR = Path(tempfile.gettempdir()) / "van311-benchmarks"
+
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_REPEATS = 3
+
+# Ratio above which --compare marks a measurement as a regression
+DEFAULT_THRESHOLD = 1.2
+
+
+def _landing():
+    agg.request_types()
+    agg.top_request_types(20)
+
+
+def _by_time():
+    agg.time_trends()
+
+
+def _by_date():
+    first, last = agg.date_bounds()
+    category, local_area = agg.filter_options("Category")[0], agg.filter_options("Local area")[0]
+    agg.request_volume_over_time(first, last, "Day", agg.ALL, agg.ALL)
+    agg.request_volume_over_time(last - datetime.timedelta(days=90), last, "Week", category, local_area)
+
+
+def _neighborhoods():
+    agg.request_summary()
+    for category, local_area in [(agg.ALL, agg.ALL), (agg.filter_options("Category")[0], agg.ALL)]:
+        agg.neighborhood_summary(category, local_area)
+        agg.request_volume_by("weekday", category, local_area)
+        agg.request_volume_by("hour", category, local_area)
+        agg.request_density("Coarse", category, local_area)
+    agg.request_density("Fine")
+
+
+def _closure():
+    agg.closure_summary()
+    local_area = agg.filter_options("Local area")[0]
+    agg.closure_summary(agg.ALL, local_area)
+    agg.closure_trends(agg.ALL, local_area)
+
+
+def _completion():
+    filtered = {"Category": agg.completion_options("Category")[:2], "Channel": agg.completion_options("Channel")[:1]}
+    for selections in [{}, filtered]:
+        for column in ["Category", "Local area", "month"]:
+            agg.completion_time_by(column, selections)
+            agg.completion_percentiles_by(column, selections)
+
+
+def _inquiry_volume():
+    agg.volume_trends()
+    agg.channel_trends()
+    agg.total_inquiries()
+    for series in agg.forecast_series("Inquiry volume"):
+        agg.demand_forecast("Inquiry volume", series)
+    agg.forecast_accuracy("Inquiry volume")
+
+
+def _request_spikes():
+    last_day = agg.anomaly_dates()[1]
+    for days in [30, 365, None]:
+        agg.request_spikes(None if days is None else last_day - datetime.timedelta(days=days - 1))
+    spikes = agg.request_spikes()
+    if len(spikes):
+        agg.request_series_scores(spikes.iloc[0]["Service request type"], spikes.iloc[0]["Local area"])
+
+
+def _contact_centre():
+    agg.monthly_metrics()
+    agg.daily_metrics()
+    agg.correlation_metrics()
+    for window in [7, 28, 90]:
+        agg.rolling_service_levels(window)
+        agg.rolling_correlations(window)
+    agg.sla_breach_streaks(0.8)
+    agg.current_breach_streak(0.8)
+    agg.demand_forecast("Calls offered", "Calls offered")
+    agg.forecast_accuracy("Calls offered")
+    for target in [0.8, 0.9]:
+        agg.staffing_requirements(target)
+
+
+# Section -> the aggregation calls its page makes
+SECTIONS = {
+    "landing": _landing,
+    "requests by time": _by_time,
+    "requests by date": _by_date,
+    "neighborhoods": _neighborhoods,
+    "closure": _closure,
+    "completion time": _completion,
+    "inquiry volume": _inquiry_volume,
+    "request spikes": _request_spikes,
+    "contact centre": _contact_centre,
+}
+
+
+def commit_name():
+    """Short commit of the working tree, with ``-dirty`` if it has changes."""
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=paths.ROOT_DIR, capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    changes = git("status", "--porcelain", "--untracked-files=no")
+    return f"{commit}-dirty" if changes else commit
+
+
+def prepare_source(scale, seed, work_dir=WORK_DIR):
+    """Synthetic raw exports for ``scale``, generated once and reused: ``(folder, rows per file)``."""
+    source = work_dir / f"source-x{scale:g}-seed{seed}"
+    marker = source / "generated.json"
+    settings = {"scale": scale, "seed": seed, "base_rows": generate.BASE_ROWS}
+    generated = json.loads(marker.read_text()) if marker.exists() else {}
+    if generated.get("settings") != settings:
+        print(f"generating x{scale:g} into {source}")
+        generated = {"settings": settings, "rows": generate.generate(source, scale, seed)}
+        marker.write_text(json.dumps(generated))
+    return source, generated["rows"]
+
+
+def measure_ingest(source, store_dir):
+    """Rebuild ``store_dir`` from ``source`` in a child process: ``(wall ms, peak RSS MB)``."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "van311.ingest", "--source", str(source), "--store", str(store_dir)],
+        cwd=paths.ROOT_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = (time.perf_counter() - started) * 1000
+    if process.returncode:
+        raise RuntimeError(f"ingest of {source} failed with exit code {process.returncode}")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return elapsed, peak
+
+
+def measure_section(run, repeats=DEFAULT_REPEATS):
+    """``(cold ms, warm ms, peak MB)`` of one section against the current store."""
+    cold, warm = [], []
+    for _ in range(repeats):
+        cache.invalidate()
+        started = time.perf_counter()
+        run()
+        cold.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        run()
+        warm.append((time.perf_counter() - started) * 1000)
+
+    cache.invalidate()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(cold), statistics.median(warm), peak / (1024 * 1024)
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, sections=None, repeats=DEFAULT_REPEATS, seed=0, work_dir=WORK_DIR):
+    """Measure ingest and every section at each scale; returns one record per measurement."""
+    _, import_ms = imports.check(repeats=repeats)
+    records = [
+        {"scale": None, "rows": None, "section": f"import {imports.MODULE}", "cold_ms": import_ms,
+         "warm_ms": None, "peak_mb": None}
+    ]
+    print(f"import {imports.MODULE}: {import_ms:,.0f} ms")
+    sections = sections or list(SECTIONS)
+    default_store = paths.STORE_DIR
+    try:
+        for scale in scales:
+            source, rows = prepare_source(scale, seed, work_dir)
+            store_dir = work_dir / f"store-x{scale:g}-seed{seed}"
+
+            ingest_ms, ingest_mb = measure_ingest(source, store_dir)
+            records.append(
+                {"scale": scale, "rows": rows, "section": "ingest", "cold_ms": ingest_ms, "warm_ms": None,
+                 "peak_mb": ingest_mb}
+            )
+            print(f"x{scale:g} ingest: {ingest_ms:,.0f} ms, {ingest_mb:,.0f} MB peak RSS")
+
+            paths.STORE_DIR = store_dir
+            for section in sections:
+                cold_ms, warm_ms, peak_mb = measure_section(SECTIONS[section], repeats)
+                records.append(
+                    {"scale": scale, "rows": rows, "section": section, "cold_ms": cold_ms,
+                     "warm_ms": warm_ms, "peak_mb": peak_mb}
+                )
+                print(
+                    f"x{scale:g} {section}: cold {cold_ms:,.1f} ms, warm {warm_ms:,.2f} ms, "
+                    f"{peak_mb:,.1f} MB peak"
+                )
+    finally:
+        paths.STORE_DIR = default_store
+        cache.invalidate()
+    return records
+
+
+def write_results(records, results_dir=RESULTS_DIR):
+    """Store ``records`` under the current commit; returns the file written."""
+    results_dir.mkdir(parents=True, exist_ok=True)
+    commit = commit_name()
+    path = results_dir / f"{commit}.json"
+    path.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "records": records,
+            },
+            indent=1,
+        )
+    )
+    return path
+
+
+def _load_results(name, results_dir=RESULTS_DIR):
+    path = Path(name)
+    if not path.exists():
+        path = results_dir / f"{name}.json"
+    return json.loads(path.read_text())
+
+
+def compare(base, head, threshold=DEFAULT_THRESHOLD, results_dir=RESULTS_DIR):
+    """Print head/base ratios for every measurement both result files have.
+
+    Returns the number of measurements over ``threshold``.
+    """
+    base, head = _load_results(base, results_dir), _load_results(head, results_dir)
+    base_records = {(r["scale"], r["section"]): r for r in base["records"]}
+    print(f"{base['commit']} -> {head['commit']} (ratios; > {threshold:g} marked)")
+    print(f"{'scale':>6}  {'section':<18}{'cold':>8}{'warm':>8}{'peak':>8}")
+    regressions = 0
+    for record in head["records"]:
+        previous = base_records.get((record["scale"], record["section"]))
+        if previous is None:
+            continue
+        cells = []
+        for metric in ["cold_ms", "warm_ms", "peak_mb"]:
+            if not record[metric] or not previous[metric]:
+                cells.append(f"{'-':>8}")
+                continue
+            ratio = record[metric] / previous[metric]
+            slower = ratio > threshold
+            regressions += slower
+            cells.append(f"{ratio:>7.2f}{'!' if slower else ' '}")
+        scale = "-" if record["scale"] is None else f"x{record['scale']:g}"
+        print(f"{scale:>6}  {record['section']:<18}{''.join(cells)}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data work on synthetic data.")
+    parser.add_argument(
+        "--scales", type=float, nargs="+", default=DEFAULT_SCALES,
+        help="multiples of the base row counts (default: 1 10 100)",
+    )
+    parser.add_argument("--sections", nargs="+", choices=list(SECTIONS), help="sections to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="runs per measurement (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the synthetic data (default: 0)")
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR, help=f"generated data and stores (default: {WORK_DIR})")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two result files instead")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="ratio marked as a regression by --compare (default: 1.2)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    records = run_benchmarks(args.scales, args.sections, args.repeats, args.seed, args.work_dir)
+    print(f"results written to {write_results(records)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import ui
+
+ui.sidebar()
+
+
+# Altair is only imported when the chart is built
+def time_trends_chart(combined_data):
+    import altair as alt
+
+    # Define Altair dropdown selection
+    selection = alt.selection_single(
+        fields=['Metric'],
+        bind=alt.binding_select(options=['Month', 'Weekday', 'Hour'], name="Time Period: "),
+        value='Month'  # Set the initial value using the value argument
+    )
+    # Create the chart
+    return alt.Chart(combined_data).mark_line(point=True).encode(
+        x=alt.X('Value:O', title='Time'),
+        y=alt.Y('Count:Q', title='Number of Requests'),
+        color=alt.Color('Metric:N', legend=None),
+        tooltip=['Value', 'Count']
+    ).add_selection(
+        selection
+    ).transform_filter(
+        selection
+    ).properties(
+        # title="Service Request Trends by Time",
+        width=800,
+        height=400
+    )
+
+
+st.title('Service Request by Time')
+# Prepare data for visualization
+# Aggregate counts for month, weekday, and hour in a single DataFrame
+combined_data = agg.time_trends()
+
+# Display the chart in Streamlit
+ui.altair_chart(time_trends_chart(combined_data), use_container_width=True)
+
+ui.debug_panel()
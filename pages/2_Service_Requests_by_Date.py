@@ -0,0 +1,56 @@
+import datetime
+
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import charts, ui
+
+ui.sidebar()
+
+
+# Built once per data version and selection; long ranges of days are cut to
+# charts.MAX_POINTS bars, keeping each bucket's busiest and quietest day
+@charts.cache_figure(agg.SERVICE_REQUESTS, agg.MANIFEST)
+def date_trends_figure(start_date, end_date, granularity, category, local_area):
+    import plotly.express as px
+
+    date_trends = agg.request_volume_over_time(start_date, end_date, granularity, category, local_area)
+    return px.bar(
+        charts.downsample(date_trends, "Date", "Request Volume", method="minmax"),
+        x="Date",
+        y="Request Volume",
+        title=f"Requests per {granularity}",
+        labels={"Date": granularity, "Request Volume": "Number of Requests"},
+    )
+
+
+# Date range drill-down
+st.title("Service Requests by Date")
+first_date, last_date = agg.date_bounds()
+date_range = st.date_input(
+    "Date range",
+    value=(max(first_date, last_date - datetime.timedelta(days=30)), last_date),
+    min_value=first_date,
+    max_value=last_date,
+)
+# The widget returns a single date while the user is still picking the end
+start_date, end_date = (date_range[0], date_range[-1]) if date_range else (first_date, last_date)
+date_columns = st.columns(3)
+with date_columns[0]:
+    granularity = st.radio("Group by", ["Day", "Week", "Month"], horizontal=True)
+with date_columns[1]:
+    date_category = st.selectbox("Category", agg.filter_options("Category"), key="date_category")
+with date_columns[2]:
+    date_local_area = st.selectbox("Local Area", agg.filter_options("Local area"), key="date_local_area")
+
+date_trends = agg.request_volume_over_time(start_date, end_date, granularity, date_category, date_local_area)
+st.metric("Requests in Range", f"{int(date_trends['Request Volume'].sum()):,}")
+if not date_trends.empty:
+    ui.plotly_chart(
+        date_trends_figure(start_date, end_date, granularity, date_category, date_local_area),
+        use_container_width=True,
+    )
+else:
+    st.write("No data available for the selected filters.")
+
+ui.debug_panel()
@@ -0,0 +1,141 @@
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import ui
+
+ui.sidebar()
+
+
+# Plotly is only imported when one of the charts is built
+
+
+def neighborhood_map_figure(neighborhood_summary):
+    import plotly.express as px
+
+    fig_map = px.scatter_mapbox(
+        neighborhood_summary,
+        lat="Latitude",
+        lon="Longitude",
+        size="Request Volume",
+        color="Request Volume",
+        hover_name="Local area",
+        hover_data={"Latitude": False, "Longitude": False, "Request Volume": True},
+        title="Request Volume by Neighborhood",
+        color_continuous_scale="Viridis",
+        zoom=11,
+        height=600,
+    )
+    fig_map.update_layout(mapbox_style="carto-positron")
+    return fig_map
+
+
+def density_map_figure(request_density, detail):
+    import plotly.express as px
+
+    fig_density = px.density_mapbox(
+        request_density,
+        lat="Latitude",
+        lon="Longitude",
+        z="Request Volume",
+        radius={"Coarse": 30, "Medium": 15, "Fine": 8}[detail],
+        title="Request Density",
+        color_continuous_scale="Viridis",
+        zoom=11,
+        height=600,
+    )
+    fig_density.update_layout(mapbox_style="carto-positron")
+    return fig_density
+
+
+def volume_by_figure(trends, column, title, label, axis_title):
+    import plotly.express as px
+
+    figure = px.bar(
+        trends,
+        x=column,
+        y="Request Volume",
+        title=title,
+        labels={column: label, "Request Volume": "Number of Requests"},
+        text="Request Volume",
+    )
+    figure.update_layout(xaxis_title=axis_title, yaxis_title="Request Volume")
+    return figure
+
+
+st.title("Service Requests by Neighborhood")
+
+# Summary Statistics
+st.subheader("Summary of Service Requests")
+
+summary = agg.request_summary()
+total_requests = summary["total_requests"]
+categories_count = summary["categories_count"]
+neighborhoods_count = summary["neighborhoods_count"]
+most_common_category = summary["most_common_category"]
+most_common_neighborhood = summary["most_common_neighborhood"]
+
+# Display summary statistics
+# st.metric("Total Requests", total_requests)
+# st.metric("Total Categories", categories_count)
+# st.metric("Total Neighborhoods", neighborhoods_count)
+# st.metric("Most Common Category", most_common_category)
+# st.metric("Most Common Neighborhood", most_common_neighborhood)
+
+# Add a separator
+st.markdown("---")
+
+# Filter Section
+st.subheader("Filter Service Requests")
+selected_category = st.selectbox("Select a Category", agg.filter_options("Category"))
+selected_neighborhood = st.selectbox("Select a Neighborhood", agg.filter_options("Local area"))
+
+# Neighborhood Summary
+neighborhood_summary = agg.neighborhood_summary(selected_category, selected_neighborhood)
+
+# Weekday Trends
+weekday_trends = agg.request_volume_by("weekday", selected_category, selected_neighborhood)
+
+# Time of Day Trends
+hourly_trends = agg.request_volume_by("hour", selected_category, selected_neighborhood)
+
+# Map Visualization
+st.subheader("Request Volume by Neighborhood")
+map_mode = st.radio("Map", ["Neighborhood totals", "Request density"], horizontal=True, key="map_mode")
+if map_mode == "Neighborhood totals":
+    if not neighborhood_summary.empty:
+        fig_map = neighborhood_map_figure(neighborhood_summary)
+        ui.plotly_chart(fig_map, use_container_width=True)
+    else:
+        st.write("No data available for the selected filters.")
+else:
+    # Requests are binned into map cells at ingest; only occupied cells are drawn
+    detail = st.select_slider("Detail", ["Coarse", "Medium", "Fine"], key="map_detail")
+    request_density = agg.request_density(detail, selected_category, selected_neighborhood)
+    if not request_density.empty:
+        fig_density = density_map_figure(request_density, detail)
+        ui.plotly_chart(fig_density, use_container_width=True)
+        st.caption("Only requests published with their own coordinates are included.")
+    else:
+        st.write("No located requests for the selected filters.")
+
+# Weekday Trend Visualization
+st.subheader("Request Volume by Weekday")
+if not weekday_trends.empty:
+    fig_weekday = volume_by_figure(
+        weekday_trends, "weekday", "Requests by Weekday", "Weekday (0=Monday, 6=Sunday)", "Weekday"
+    )
+    ui.plotly_chart(fig_weekday, use_container_width=True)
+else:
+    st.write("No data available for the selected filters.")
+
+# Time of Day Trend Visualization
+st.subheader("Request Volume by Time of Day")
+if not hourly_trends.empty:
+    fig_hourly = volume_by_figure(
+        hourly_trends, "hour", "Requests by Hour of Day", "Hour of Day", "Hour of Day"
+    )
+    ui.plotly_chart(fig_hourly, use_container_width=True)
+else:
+    st.write("No data available for the selected filters.")
+
+ui.debug_panel()
@@ -0,0 +1,96 @@
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import ui
+
+ui.sidebar()
+
+
+# Plotly is only imported when one of the charts is built
+
+
+def closure_bar_figure(closure_summary):
+    import plotly.express as px
+
+    fig_bar = px.bar(
+        closure_summary,
+        x="Category_cr",
+        y="Count",
+        text="Percentage",
+        title="Closure Categories Distribution",
+        labels={"Category_cr": "Closure Category", "Count": "Number of Requests"},
+        color="Category_cr",
+    )
+    fig_bar.update_traces(texttemplate="%{text:.2f}%", textposition="outside")
+    return fig_bar
+
+
+def closure_pie_figure(closure_summary):
+    import plotly.express as px
+
+    return px.pie(
+        closure_summary,
+        names="Category_cr",
+        values="Count",
+        # title="Closure Categories Breakdown",
+        color="Category_cr",
+        hole=0.4,
+    )
+
+
+def closure_trends_figure(trend_data):
+    import plotly.express as px
+
+    return px.line(
+        trend_data,
+        x="month",
+        y="Count",
+        color="Category_cr",
+        title="Closure Categories Over Time",
+        labels={"month": "Month", "Count": "Number of Requests", "Category_cr": "Closure Category"},
+    )
+
+
+# 	Closure and Fulfillment Analysis:
+
+
+# more analysis
+
+#Calculate closure summary with percentages
+closure_summary = agg.closure_summary()
+
+# Display summary table
+st.title("Closure and Fulfillment Analysis")
+st.subheader("Summary of Closure Categories")
+st.dataframe(closure_summary)
+
+#Visualize closure categories distribution (Bar Chart)
+st.subheader("Distribution of Closure Categories")
+fig_bar = closure_bar_figure(closure_summary)
+ui.plotly_chart(fig_bar, use_container_width=True)
+
+# Visualize closure categories breakdown (Pie Chart)
+st.subheader("Closure Categories Breakdown")
+fig_pie = closure_pie_figure(closure_summary)
+ui.plotly_chart(fig_pie, use_container_width=True)
+
+# Filters for Category and Local Area
+st.subheader("Explore Closure Patterns by Filters")
+selected_category = st.selectbox("Filter by Service Request Category", agg.filter_options("Category"))
+selected_local_area = st.selectbox("Filter by Local Area", agg.filter_options("Local area"))
+
+# Recalculate closure summary based on filters
+filtered_closure_summary = agg.closure_summary(selected_category, selected_local_area)
+
+# Display filtered summary table
+st.subheader("Filtered Closure Summary")
+st.dataframe(filtered_closure_summary)
+
+# Trends Over Time
+st.subheader("Closure Trends Over Time")
+trend_data = agg.closure_trends(selected_category, selected_local_area)
+
+fig_trends = closure_trends_figure(trend_data)
+ui.plotly_chart(fig_trends, use_container_width=True)
+
+ui.debug_panel()
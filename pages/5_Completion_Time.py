@@ -0,0 +1,111 @@
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import sketch, ui
+
+ui.sidebar()
+
+
+# Plotly is only imported when one of the charts is built
+
+
+def completion_bar_figure(completion, column, completion_column, labels):
+    import plotly.express as px
+
+    figure = px.bar(
+        completion,
+        x=column,
+        y=completion_column,
+        labels=labels,
+        text=completion_column
+    )
+    figure.update_traces(texttemplate="%{text:.2f}", textposition="outside")
+    figure.update_layout(xaxis_tickangle=45)
+    return figure
+
+
+def completion_month_figure(completion_by_month, completion_column, labels):
+    import plotly.express as px
+
+    return px.line(
+        completion_by_month,
+        x="month",
+        y=completion_column,
+        # title="Average Completion Time by Month",
+        labels=labels,
+        markers=True
+    )
+
+
+# Streamlit Dashboard
+st.title("Request Completion Time Analysis")
+
+# Multi-select filters (empty means all); values within a filter are OR-ed, filters are AND-ed
+completion_filters = {}
+filter_columns = st.columns(4)
+for filter_column, (column, label) in zip(filter_columns, [
+    ("Category", "Category"),
+    ("Local area", "Local Area"),
+    ("Channel", "Channel"),
+    ("Department", "Department"),
+]):
+    with filter_column:
+        completion_filters[column] = st.multiselect(
+            label, agg.completion_options(column), key=f"completion_{column}"
+        )
+
+# Mean completion time, or a percentile from the completion-time sketches
+statistic = st.radio(
+    "Statistic", ["Mean", "Median (p50)", "p90", "p99"], horizontal=True, key="completion_statistic"
+)
+if statistic == "Mean":
+    statistic_label = "Average"
+    completion_column = "Avg Completion Time (days)"
+    completion_time_by = agg.completion_time_by
+else:
+    statistic_label = statistic
+    completion_column = statistic.split("(")[-1].rstrip(")")
+    completion_time_by = agg.completion_percentiles_by
+
+# Completion time (in days) by request category, neighborhood and month
+completion_by_type = completion_time_by('Category', completion_filters)
+completion_by_neighborhood = completion_time_by('Local area', completion_filters)
+completion_by_month = completion_time_by('month', completion_filters)
+
+# Display Completion Time by Request Type
+st.subheader(f"{statistic_label} Completion Time by Request Category")
+# title="Average Completion Time by Request Category"
+fig_type = completion_bar_figure(
+    completion_by_type,
+    "Category",
+    completion_column,
+    {"Service request type": "Request Type", completion_column: f"{statistic_label} Completion Time (days)"},
+)
+ui.plotly_chart(fig_type, use_container_width=True)
+
+# Display Completion Time by Neighborhood
+st.subheader(f"{statistic_label} Completion Time by Neighborhood")
+# title="Average Completion Time by Neighborhood"
+fig_neighborhood = completion_bar_figure(
+    completion_by_neighborhood,
+    "Local area",
+    completion_column,
+    {"Local area": "Neighborhood", completion_column: f"{statistic_label} Completion Time (days)"},
+)
+ui.plotly_chart(fig_neighborhood, use_container_width=True)
+
+# Display Completion Time by Month
+st.subheader(f"{statistic_label} Completion Time by Month")
+fig_month = completion_month_figure(
+    completion_by_month,
+    completion_column,
+    {"month": "Month", completion_column: f"{statistic_label} Completion Time (days)"},
+)
+ui.plotly_chart(fig_month, use_container_width=True)
+if statistic != "Mean":
+    st.caption(
+        f"Percentiles come from mergeable sketches and are within "
+        f"{sketch.RELATIVE_ACCURACY:.0%} of the exact values."
+    )
+
+ui.debug_panel()
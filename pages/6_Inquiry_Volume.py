@@ -0,0 +1,126 @@
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import charts, ui
+
+ui.sidebar()
+
+
+# Figures are built once per data version and capped at charts.MAX_POINTS per series;
+# Plotly is only imported when one is actually built
+
+
+@charts.cache_figure(agg.INQUIRY_VOLUME)
+def volume_trends_figure():
+    import plotly.express as px
+
+    return px.line(
+        charts.downsample(agg.volume_trends(), "Year Month", "Number of Records"),
+        x="Year Month",
+        y="Number of Records",
+        title="Inquiry Volume Over Time",
+        labels={"Year Month": "Year-Month", "Number of Records": "Number of Inquiries"},
+        markers=True,
+    )
+
+
+@charts.cache_figure(agg.INQUIRY_VOLUME)
+def channel_trends_figure():
+    import plotly.express as px
+
+    return px.line(
+        charts.downsample(agg.channel_trends(), "Year Month", "Number of Records", by="Channel"),
+        x="Year Month",
+        y="Number of Records",
+        color="Channel",
+        title="Inquiry Volume by Channel Over Time",
+        labels={"Year Month": "Year-Month", "Number of Records": "Number of Inquiries", "Channel": "Channel"},
+        markers=True,
+    )
+
+
+@charts.cache_figure(agg.INQUIRY_VOLUME, agg.FORECASTS)
+def inquiry_forecast_figure(series):
+    if series == "All channels":
+        history = agg.volume_trends()
+    else:
+        history = agg.channel_trends()
+        history = history[history["Channel"] == series]
+    return charts.forecast_figure(
+        history,
+        "Year Month",
+        "Number of Records",
+        agg.demand_forecast("Inquiry volume", series),
+        f"Inquiry Volume Forecast: {series}",
+        "Number of Inquiries",
+    )
+
+
+#  311 Inquiry Volume Dataset Analysis
+
+# Inquiry Volume Trends
+st.title("311 Inquiry Volume Dataset Analysis")
+st.subheader("Inquiry Volume Trends")
+
+# Aggregate volume by time
+volume_trends = agg.volume_trends()
+
+# Line Chart: Volume Over Time
+ui.plotly_chart(volume_trends_figure(), use_container_width=True)
+
+# Workforce Allocation Suggestion
+st.subheader("Workforce Allocation Suggestions")
+peak_month = volume_trends.loc[volume_trends["Number of Records"].idxmax()]
+low_month = volume_trends.loc[volume_trends["Number of Records"].idxmin()]
+st.write(f"**Peak Demand Month:** {peak_month['Year Month'].strftime('%B %Y')} with {peak_month['Number of Records']} inquiries.")
+st.write(f"**Low Demand Month:** {low_month['Year Month'].strftime('%B %Y')} with {low_month['Number of Records']} inquiries.")
+st.write(
+    """
+    **Workforce Allocation Strategies:**
+    - Increase workforce during peak months to handle higher demand.
+    - Reduce workforce or reallocate to other tasks during low-demand months.
+    - Monitor historical trends for long-term planning.
+    """
+)
+
+# Demand Forecast (fitted when the data is refreshed, see van311.forecast)
+st.subheader("Demand Forecast")
+forecast_series = st.selectbox("Series", agg.forecast_series("Inquiry volume"), key="inquiry_forecast_series")
+inquiry_forecast = agg.demand_forecast("Inquiry volume", forecast_series)
+ui.plotly_chart(inquiry_forecast_figure(forecast_series), use_container_width=True)
+peak_forecast = inquiry_forecast.loc[inquiry_forecast["Forecast"].idxmax()]
+st.write(
+    f"**Forecast Peak Month:** {peak_forecast['Date'].strftime('%B %Y')} with about "
+    f"{peak_forecast['Forecast']:,.0f} inquiries (80% interval "
+    f"{peak_forecast['Lower 80']:,.0f} to {peak_forecast['Upper 80']:,.0f}), "
+    f"from the {peak_forecast['Model']} model."
+)
+with st.expander("Backtest accuracy"):
+    st.dataframe(agg.forecast_accuracy("Inquiry volume"))
+
+# Impact of Web/Chat Options
+st.subheader("Impact of Alternative Channels (Web/Chat)")
+
+# Filter for web and chat channels
+channel_trends = agg.channel_trends()
+
+# Line Chart: Channel Popularity Over Time
+ui.plotly_chart(channel_trends_figure(), use_container_width=True)
+
+# Popularity of Web/Chat Options
+st.subheader("Channel Popularity Insights")
+web_chat_trends = channel_trends[channel_trends["Channel"].isin(["Web", "Chat"])]
+web_chat_total = web_chat_trends["Number of Records"].sum()
+total_inquiries = agg.total_inquiries()
+
+web_chat_percentage = (web_chat_total / total_inquiries) * 100
+st.write(f"**Web/Chat Usage:** {web_chat_percentage:.2f}% of all inquiries.")
+st.write(
+    """
+    **Observations:**
+    - Track the growth of web and chat channels over time to assess digital adoption.
+    - Consider shifting resources to support popular channels during peak times.
+    """
+)
+
+ui.debug_panel()
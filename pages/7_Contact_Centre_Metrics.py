@@ -0,0 +1,234 @@
+import pandas as pd
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import charts, sla, staffing, ui
+
+ui.sidebar()
+
+# contact center metric analysis
+
+# Figures are built once per data version (monthly call totals, mean response
+# times and handled/abandoned percentages) and capped at charts.MAX_POINTS;
+# Plotly is only imported when one is actually built
+
+
+@charts.cache_figure(agg.CONTACT_CENTRE)
+def handled_abandoned_figure():
+    import plotly.express as px
+
+    monthly_metrics = charts.downsample(
+        agg.monthly_metrics(), "Year-Month", ["Handled Percentage", "Abandoned Percentage"], method="minmax"
+    )
+    return px.bar(
+        monthly_metrics,
+        x="Year-Month",
+        y=["Handled Percentage", "Abandoned Percentage"],
+        barmode="stack",
+        title="Percentage of Calls Handled vs. Abandoned Over Time",
+        labels={"value": "Percentage", "Year-Month": "Year-Month", "variable": "Metric"},
+    )
+
+
+@charts.cache_figure(agg.CONTACT_CENTRE)
+def response_times_figure(resolution):
+    import plotly.express as px
+
+    if resolution == "Daily":
+        metrics, x = agg.daily_metrics(), "Date"
+    else:
+        metrics, x = agg.monthly_metrics(), "Year-Month"
+    return px.line(
+        charts.downsample(metrics, x, "AverageSpeedofAnswer"),
+        x=x,
+        y="AverageSpeedofAnswer",
+        title="Average Response Times Over Time",
+        labels={x: x, "AverageSpeedofAnswer": "Average Speed of Answer (seconds)"},
+        markers=resolution == "Monthly",
+    )
+
+
+@charts.cache_figure(agg.CONTACT_CENTRE_SLA)
+def rolling_service_level_figure(window, target):
+    import plotly.express as px
+
+    rolling = agg.rolling_service_levels(window)
+    rolling[["Service Level", "Abandonment Rate"]] *= 100
+    figure = px.line(
+        charts.downsample(rolling, "Date", ["Service Level", "Abandonment Rate"]),
+        x="Date",
+        y=["Service Level", "Abandonment Rate"],
+        title=f"{window}-Day Rolling Service Level and Abandonment Rate (call-weighted)",
+        labels={"value": "Percent of Calls Offered", "variable": "Metric"},
+    )
+    figure.add_hline(y=target * 100, line_dash="dash", annotation_text="Target")
+    return figure
+
+
+@charts.cache_figure(agg.CONTACT_CENTRE_SLA)
+def rolling_speed_of_answer_figure(window):
+    import plotly.express as px
+
+    return px.line(
+        charts.downsample(agg.rolling_service_levels(window), "Date", "Speed of Answer"),
+        x="Date",
+        y="Speed of Answer",
+        title=f"{window}-Day Rolling Speed of Answer (call-weighted)",
+        labels={"Speed of Answer": "Average Speed of Answer (seconds)"},
+    )
+
+
+@charts.cache_figure(agg.CONTACT_CENTRE_SLA)
+def rolling_correlations_figure(window):
+    import plotly.express as px
+
+    correlations = agg.rolling_correlations(window)
+    pairs = [column for column in correlations.columns if column != "Date"]
+    return px.line(
+        charts.downsample(correlations, "Date", pairs),
+        x="Date",
+        y=pairs,
+        title=f"{window}-Day Rolling Correlations",
+        labels={"value": "Correlation", "variable": "Metrics"},
+    )
+
+
+@charts.cache_figure(agg.CONTACT_CENTRE, agg.FORECASTS)
+def calls_forecast_figure():
+    # Last year of daily history leading into the forecast
+    history = agg.daily_metrics()
+    history = history[history["Date"] > history["Date"].max() - pd.Timedelta(days=365)]
+    return charts.forecast_figure(
+        history,
+        "Date",
+        "CallsOffered",
+        agg.demand_forecast("Calls offered", "Calls offered"),
+        "Daily Calls Offered Forecast",
+        "Calls Offered",
+    )
+
+
+def staffing_figure(requirements, actual, target_service_level, answer_seconds):
+    import plotly.express as px
+
+    return px.line(
+        charts.downsample(
+            requirements[requirements["Date"] > actual["Date"].max() - pd.Timedelta(days=365)],
+            "Date",
+            "Required Agents",
+            by="Period",
+        ),
+        x="Date",
+        y="Required Agents",
+        color="Period",
+        title=f"Agents Needed to Answer {target_service_level:.0%} of Calls Within {answer_seconds}s",
+        labels={"Required Agents": "Agents on Shift"},
+    )
+
+
+# Streamlit Dashboard
+st.title("311 Contact Centre Metrics Analysis")
+
+# Call Handling Metrics
+st.subheader("Call Handling Metrics: Handled vs. Abandoned")
+ui.plotly_chart(handled_abandoned_figure(), use_container_width=True)
+
+# Average Response Times Over Time
+st.subheader("Average Response Times Over Time")
+resolution = st.radio("Resolution", ["Monthly", "Daily"], horizontal=True, key="response_resolution")
+ui.plotly_chart(response_times_figure(resolution), use_container_width=True)
+
+# Service Level Monitoring (rolling windows over daily call totals, see van311.sla)
+st.subheader("Service Level Monitoring")
+sla_columns = st.columns(2)
+with sla_columns[0]:
+    window = st.radio("Rolling window (days)", sla.WINDOWS, index=1, horizontal=True, key="sla_window")
+with sla_columns[1]:
+    sla_target = st.slider("Service level target", 0.5, 0.95, sla.DEFAULT_TARGET, 0.05, key="sla_target")
+
+rolling_levels = agg.rolling_service_levels(window)
+if rolling_levels.empty:
+    # The history is shorter than the window
+    st.info(f"Not enough days of call data for a {window}-day rolling window yet.")
+else:
+    latest = rolling_levels.iloc[-1]
+    sla_metrics = st.columns(4)
+    sla_metrics[0].metric(f"Service Level ({window} days)", f"{latest['Service Level']:.1%}")
+    sla_metrics[1].metric(f"Abandonment Rate ({window} days)", f"{latest['Abandonment Rate']:.1%}")
+    sla_metrics[2].metric(f"Speed of Answer ({window} days)", f"{latest['Speed of Answer']:.0f}s")
+    sla_metrics[3].metric("Current Breach Streak", f"{agg.current_breach_streak(sla_target)} days")
+    ui.plotly_chart(rolling_service_level_figure(window, sla_target), use_container_width=True)
+    ui.plotly_chart(rolling_speed_of_answer_figure(window), use_container_width=True)
+
+st.write(f"**Longest runs of days below a {sla_target:.0%} service level:**")
+st.dataframe(agg.sla_breach_streaks(sla_target).head(10), hide_index=True)
+
+# Call Volume Forecast (fitted when the data is refreshed, see van311.forecast)
+st.subheader("Call Volume Forecast")
+ui.plotly_chart(calls_forecast_figure(), use_container_width=True)
+with st.expander("Backtest accuracy"):
+    st.dataframe(agg.forecast_accuracy("Calls offered"))
+
+# Performance Correlations
+st.subheader("Performance Correlations")
+correlation_metrics = agg.correlation_metrics()
+
+st.write("**Correlation Matrix:**")
+st.dataframe(correlation_metrics)
+if not rolling_levels.empty:
+    ui.plotly_chart(rolling_correlations_figure(window), use_container_width=True)
+
+# Staffing Requirements (Erlang C over every day of history and the forecast)
+st.subheader("Staffing Requirements")
+staffing_columns = st.columns(4)
+with staffing_columns[0]:
+    target_service_level = st.slider("Target service level", 0.5, 0.95, 0.8, 0.05, key="target_service_level")
+with staffing_columns[1]:
+    answer_seconds = st.slider(
+        "Answer within (seconds)", 10, 120, staffing.DEFAULT_ANSWER_SECONDS, 5, key="answer_seconds"
+    )
+with staffing_columns[2]:
+    handle_minutes = st.slider(
+        "Average handle time (minutes)", 2.0, 15.0, staffing.DEFAULT_HANDLE_SECONDS / 60, 0.5, key="handle_minutes"
+    )
+with staffing_columns[3]:
+    open_hours = st.slider("Open hours per day", 8, 24, staffing.DEFAULT_OPEN_HOURS, key="open_hours")
+
+requirements = agg.staffing_requirements(
+    target_service_level, int(handle_minutes * 60), answer_seconds, open_hours
+)
+actual = requirements[requirements["Period"] == "Actual"]
+upcoming = requirements[requirements["Period"] == "Forecast"]
+last_year = actual[actual["Date"] > actual["Date"].max() - pd.Timedelta(days=365)]
+below_target = (last_year["Observed Service Level"] < target_service_level).mean() * 100
+
+metric_columns = st.columns(3)
+metric_columns[0].metric("Agents Needed (median, last 90 days)", int(actual["Required Agents"].tail(90).median()))
+metric_columns[1].metric("Agents Needed (peak, next 28 days)", int(upcoming["Required Agents"].max()) if len(upcoming) else "n/a")
+metric_columns[2].metric("Days Below Target (last year)", f"{below_target:.0f}%")
+
+fig_staffing = staffing_figure(requirements, actual, target_service_level, answer_seconds)
+ui.plotly_chart(fig_staffing, use_container_width=True)
+st.caption(
+    "Calls are assumed to arrive evenly over the open hours; average handle time is not in the "
+    "export, so adjust it above."
+)
+
+# Recommendations
+st.subheader("Recommendations for Operational Efficiency")
+typical_agents = int(actual["Required Agents"].tail(90).median())
+recommendations = [
+    f"Staff about {typical_agents} agents on a typical day to answer {target_service_level:.0%} "
+    f"of calls within {answer_seconds} seconds.",
+    f"Over the last year, the observed service level was below that target on {below_target:.0f}% of days.",
+]
+if len(upcoming):
+    busiest_day = upcoming.loc[upcoming["Required Agents"].idxmax(), "Date"]
+    recommendations.append(
+        f"Plan for up to {int(upcoming['Required Agents'].max())} agents over the next four weeks, "
+        f"with the heaviest forecast load on {busiest_day.strftime('%A, %B %d')}."
+    )
+recommendations.append("Reduce average response times during peak call volumes to minimize customer frustration.")
+st.write("**Based on findings:**\n" + "\n".join(f"- {line}" for line in recommendations))
+
+ui.debug_panel()
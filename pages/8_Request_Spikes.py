@@ -0,0 +1,76 @@
+import pandas as pd
+import streamlit as st
+
+from van311 import aggregations as agg
+from van311 import anomaly, charts, ui
+
+ui.sidebar()
+
+
+# Every (request type, local area) series is scored once per data version
+# (see van311.anomaly); the page only ranks and draws the scored days
+
+
+@charts.cache_figure(agg.DAILY_COUNTS)
+def spike_series_figure(request_type, local_area, spike_date):
+    import plotly.express as px
+
+    # Four months either side of the spike
+    series = agg.request_series_scores(request_type, local_area)
+    spike_date = pd.Timestamp(spike_date)
+    around = series[(series["Date"] - spike_date).abs() <= pd.Timedelta(days=120)]
+    figure = px.line(
+        around,
+        x="Date",
+        y=["Count", "Baseline"],
+        title=f"{request_type} in {local_area}",
+        labels={"value": "Requests per Day", "variable": ""},
+    )
+    figure.add_vline(x=spike_date, line_dash="dash")
+    return figure
+
+
+st.title("Unusual Spikes in Service Requests")
+st.write(
+    "Each day of every request type in every local area is compared with the same weekday over the "
+    f"previous {anomaly.WEEKS} weeks. The z-score measures how far the day's count is above that "
+    "baseline, in robust standard deviations, so a surge of illegal dumping or a wave of missed "
+    "pickups stands out even among thousands of series."
+)
+
+last_day = agg.anomaly_dates()[1]
+periods = {"Last 30 days": 30, "Last 90 days": 90, "Last year": 365, "All history": None}
+
+filter_columns = st.columns(4)
+with filter_columns[0]:
+    period = st.selectbox("Period", list(periods), index=1, key="spike_period")
+with filter_columns[1]:
+    spike_category = st.selectbox("Category", agg.filter_options("Category"), key="spike_category")
+with filter_columns[2]:
+    min_z = st.slider("Minimum z-score", 3.0, 10.0, 4.0, 0.5, key="spike_min_z")
+with filter_columns[3]:
+    min_count = st.slider("Minimum requests that day", 1, 50, 5, key="spike_min_count")
+
+since = None
+if periods[period] is not None and last_day is not None:
+    since = last_day - pd.Timedelta(days=periods[period] - 1)
+spikes = agg.request_spikes(since, min_z, min_count, 50, spike_category)
+
+st.subheader("Strongest Spikes")
+if spikes.empty:
+    st.write("No spikes match these settings.")
+else:
+    st.dataframe(spikes.style.format({"Baseline": "{:.1f}", "Z-score": "{:.1f}"}), hide_index=True)
+
+    labels = [
+        f"{row['Service request type']} in {row['Local area']} on {row['Date']:%Y-%m-%d}"
+        for _, row in spikes.iterrows()
+    ]
+    chosen = st.selectbox("Show the days around", labels, key="spike_chosen")
+    spike = spikes.iloc[labels.index(chosen)]
+    ui.plotly_chart(
+        spike_series_figure(spike["Service request type"], spike["Local area"], spike["Date"].date()),
+        use_container_width=True,
+    )
+
+ui.debug_panel()
@@ -0,0 +1,79 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+AREAS = ["Downtown", "Kitsilano", "Marpole"]
+CLOSURE_REASONS = pd.DataFrame(
+    {
+        "Closure Reason": ["Service provided", "Unknown"],
+        "Category_cr": ["Resolved", "Unknown"],
+    }
+)
+
+
+def raw_service_requests(bi_ids, opened="2024-05-01T09:00:00-07:00", modified="2024-05-02T09:00:00+00:00",
+                         request_type="Missed Garbage Bin Pickup Case", area="Downtown"):
+    """A raw service request export with one closed request per ``BI_ID``.
+
+    ``opened``, ``modified``, ``request_type`` and ``area`` are one value for
+    every row or a list with one per row.
+    """
+    bi_ids = list(bi_ids)
+    return pd.DataFrame(
+        {
+            "Department": "ENG - Sanitation Services",
+            "Service request type": request_type,
+            "Status": "Close",
+            "Closure reason": "Service provided",
+            "Service request open timestamp": opened,
+            "Service request close date": "2024-05-03",
+            "Last modified timestamp": modified,
+            "Local area": area,
+            "Channel": "Phone",
+            "BI_ID": bi_ids,
+        },
+        index=range(len(bi_ids)),
+    )
+
+
+def write_raw(frame, path):
+    frame.to_csv(path, sep=";", index=False)
+    return str(path)
+
+
+@pytest.fixture
+def geocodes():
+    return pd.DataFrame({"Local area": AREAS, "Latitude": [49.28, 49.27, 49.21], "Longitude": [-123.12, -123.16, -123.13]})
+
+
+@pytest.fixture
+def closure_reasons():
+    return CLOSURE_REASONS.copy()
+
+
+@pytest.fixture(scope="session")
+def raw_source(tmp_path_factory):
+    """Synthetic raw exports of about 4,000 service requests."""
+    from benchmarks import generate
+
+    source = tmp_path_factory.mktemp("raw")
+    generate.generate(source, scale=0.02)
+    return source
+
+
+@pytest.fixture(scope="session")
+def built_store(raw_source, tmp_path_factory):
+    """A store ingested from ``raw_source`` in small chunks, so the request table has several row groups."""
+    from van311 import ingest
+
+    store_dir = tmp_path_factory.mktemp("store")
+    ingest.run(str(raw_source), store_dir, chunk_size=1000)
+    return store_dir
+
+
+@pytest.fixture
+def store_dir(built_store, tmp_path):
+    """A copy of ``built_store`` a test may change."""
+    return Path(shutil.copytree(built_store, tmp_path / "store"))
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from van311 import anomaly, cube
+
+DAYS = pd.date_range("2024-01-01", periods=120, freq="D")
+
+
+def daily_counts(series):
+    """A ``build`` table from ``{(type, area): daily counts over DAYS}``."""
+    frames = [
+        pd.DataFrame({anomaly.TYPE: request_type, anomaly.AREA: area, anomaly.DATE: DAYS, cube.COUNT: counts})
+        for (request_type, area), counts in series.items()
+    ]
+    counts = pd.concat(frames, ignore_index=True)
+    return counts[counts[cube.COUNT] > 0].reset_index(drop=True)
+
+
+def scores(series):
+    return anomaly.score(*anomaly.tensor(daily_counts(series)))
+
+
+@pytest.mark.parametrize("n", range(1, 13))
+def test_sorting_network_median_matches_numpy(n):
+    rng = np.random.default_rng(n)
+    weeks = [rng.integers(0, 6, (4, 50)).astype("float32") for _ in range(n)]
+
+    np.testing.assert_allclose(anomaly._median(weeks), np.median(np.stack(weeks), axis=0))
+
+
+def test_planted_spike_is_the_only_one_flagged():
+    rng = np.random.default_rng(0)
+    weekly = np.tile([30, 32, 31, 29, 28, 10, 8], len(DAYS) // 7 + 1)[: len(DAYS)]
+    series = {
+        ("Graffiti Removal Case", area): rng.poisson(weekly)
+        for area in ["Downtown", "Kitsilano", "Marpole"]
+    }
+    spike_day = 100
+    series[("Graffiti Removal Case", "Kitsilano")][spike_day] += 60
+
+    spikes = anomaly.top_spikes(scores(series))
+
+    assert len(spikes) == 1
+    spike = spikes.iloc[0]
+    assert (spike[anomaly.AREA], spike["Date"]) == ("Kitsilano", DAYS[spike_day])
+    assert spike["Baseline"] == pytest.approx(weekly[spike_day], abs=6)
+
+
+def test_flat_series_flags_nothing():
+    series = {("Abandoned Vehicle Case", "Marpole"): np.full(len(DAYS), 12)}
+
+    result = scores(series)
+
+    assert not anomaly.top_spikes(result, min_z=0.5, min_count=0).size
+    # The first WEEKS weeks have no baseline; after that every day is exactly on it
+    z = result["z"][0]
+    assert np.isnan(z[: 7 * anomaly.WEEKS]).all()
+    assert (z[7 * anomaly.WEEKS:] == 0).all()
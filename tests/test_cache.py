@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+
+from van311 import cache, filters, timeindex
+
+
+def test_index_sizes_count_their_arrays():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(
+        {column: pd.Categorical(rng.choice(["a", "b", "c"], 10_000)) for column in filters.INDEXED_COLUMNS}
+    )
+    index = filters.FilterIndex(frame)
+    assert cache.estimate_size(index) >= len(filters.INDEXED_COLUMNS) * 10_000 * 4
+
+    shuffled = pd.Series(pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.permutation(10_000), unit="min"))
+    times = timeindex.TimeIndex(shuffled)
+    assert cache.estimate_size(times) == 10_000 * (8 + 4)
+    assert cache.estimate_size(timeindex.TimeIndex(shuffled.sort_values())) == 10_000 * 8
@@ -0,0 +1,53 @@
+import json
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from van311 import charts
+
+
+def test_cached_figure_is_built_and_serialized_once(monkeypatch):
+    built, serialized = [], []
+    to_json = pio.to_json
+
+    def counting_to_json(*args, **kwargs):
+        serialized.append(args[0])
+        return to_json(*args, **kwargs)
+
+    monkeypatch.setattr(pio, "to_json", counting_to_json)
+
+    @charts.cache_figure()
+    def bars(n):
+        built.append(n)
+        return go.Figure(go.Bar(y=list(range(n))), layout={"title": {"text": "Bars"}})
+
+    first = bars(3)
+    second = bars(3)
+
+    assert second is first
+    assert built == [3] and len(serialized) == 1
+    assert first.title == "Bars"
+    assert json.loads(first.json)["data"][0]["y"] == [0, 1, 2]
+    # Other arguments are another figure
+    bars(4)
+    assert built == [3, 4]
+
+
+def test_plotly_chart_sends_the_cached_spec(monkeypatch):
+    from van311 import ui
+
+    spec = charts.FigureSpec("Bars", pio.to_json(go.Figure(go.Bar(y=[1, 2])), validate=False))
+    sent = []
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the figure was serialized again")
+
+    monkeypatch.setattr(pio, "to_json", fail)
+    monkeypatch.setattr(ui.st._main, "_enqueue", lambda kind, proto: sent.append((kind, proto)))
+
+    ui.plotly_chart(spec, use_container_width=True)
+
+    [(kind, proto)] = sent
+    assert kind == "plotly_chart"
+    assert proto.spec == spec.json
+    assert proto.use_container_width
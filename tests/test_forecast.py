@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from van311 import forecast
+
+WEEK = np.array([420.0, 510.0, 480.0, 470.0, 450.0, 210.0, 180.0])
+
+
+def seasonal_series(days=200):
+    """Daily calls repeating one week exactly, so the last week predicts every later one."""
+    dates = pd.date_range("2024-01-01", periods=days, freq="D")
+    return {"Calls offered": (["Calls offered"], dates, np.tile(WEEK, days // 7 + 1)[None, :days])}
+
+
+def test_backtest_cutoffs_leave_two_seasons_and_a_full_horizon():
+    config = forecast.DATASETS["Calls offered"]
+    cutoffs = forecast.backtest_cutoffs(200, config["season"], config["horizon"])
+
+    assert len(cutoffs) == forecast.BACKTEST_ORIGINS
+    assert cutoffs == sorted(set(cutoffs))
+    assert cutoffs[0] >= 2 * config["season"]
+    assert cutoffs[-1] + config["horizon"] == 200
+    # Too short to fit two seasons before any origin
+    assert forecast.backtest_cutoffs(40, config["season"], config["horizon"]) == []
+
+
+def test_seasonal_naive_backtest_error_is_zero_on_a_seasonal_series():
+    series = seasonal_series()
+
+    forecasts, accuracy = forecast.run_forecasts(series, workers=1)
+
+    naive = accuracy[accuracy["Model"] == forecast.SEASONAL_NAIVE].iloc[0]
+    assert naive["MAE"] == pytest.approx(0, abs=1e-9)
+    assert naive["Selected"]
+    assert naive["Backtest origins"] == forecast.BACKTEST_ORIGINS
+    assert set(accuracy["Model"]) == {forecast.SEASONAL_NAIVE, forecast.HOLT_WINTERS}
+
+    # The forecast carries the week on from where the history stops, with no spread
+    dates = series["Calls offered"][1]
+    horizon = forecast.DATASETS["Calls offered"]["horizon"]
+    assert list(forecasts["Date"]) == list(pd.date_range(dates[-1], periods=horizon + 1, freq="D")[1:])
+    np.testing.assert_allclose(forecasts["Forecast"], WEEK[np.arange(len(dates), len(dates) + horizon) % 7])
+    np.testing.assert_allclose(forecasts["Upper 95"], forecasts["Lower 95"])
@@ -0,0 +1,10 @@
+from benchmarks import imports
+
+
+def test_headless_api_imports_within_budget():
+    problems, median = imports.check()
+    assert not problems, f"{imports.MODULE} {'; '.join(problems)} (median {median:,.0f} ms)"
+
+
+def test_pages_import_plotting_libraries_only_when_drawing():
+    assert imports.eager_page_imports() == []
@@ -0,0 +1,19 @@
+from van311 import metrics
+
+
+def test_metrics_log_is_rotated_at_its_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "JSONL_MAX_BYTES", 1000)
+    monkeypatch.setattr(metrics, "EXPORT", False)
+    for _ in range(50):
+        metrics.start_run("session", "page")
+        with metrics.span(metrics.LOAD, "load"):
+            pass
+        metrics.export(metrics.finish_run(), tmp_path)
+
+    log = tmp_path / metrics.JSONL_FILE
+    rotated = tmp_path / f"{metrics.JSONL_FILE}.1"
+    assert rotated.exists()
+    line = len(log.read_text().splitlines()[0]) + 1
+    assert log.stat().st_size < 1000 + line
+    assert rotated.stat().st_size < 1000 + line
+    assert sorted(path.name for path in tmp_path.iterdir()) == [metrics.JSONL_FILE, rotated.name, metrics.PROMETHEUS_FILE]
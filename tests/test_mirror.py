@@ -0,0 +1,47 @@
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from van311 import mirror
+
+
+class TruncatingHandler(BaseHTTPRequestHandler):
+    """Promises 1,000 bytes and closes the connection after 10."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "1000")
+        self.end_headers()
+        self.wfile.write(b"x" * 10)
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def truncating_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TruncatingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/export.csv"
+    server.shutdown()
+    server.server_close()
+
+
+def test_interrupted_download_leaves_no_partial_file(tmp_path, truncating_url):
+    (tmp_path / "export.csv").write_text("last good copy")
+
+    for _ in range(3):
+        mirror._checked.clear()
+        assert mirror.mirror(truncating_url, tmp_path) == str(tmp_path / "export.csv")
+
+    assert (tmp_path / "export.csv").read_text() == "last good copy"
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_interrupted_first_download_fails_without_a_partial_file(tmp_path, truncating_url):
+    with pytest.raises(http.client.IncompleteRead):
+        mirror.mirror(truncating_url, tmp_path)
+    assert not list(tmp_path.glob("*.partial"))
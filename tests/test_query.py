@@ -0,0 +1,51 @@
+import datetime
+
+import pytest
+
+from van311 import query
+
+
+def test_every_query_argument_has_a_check():
+    for name in query.QUERIES:
+        checks = {**query.CHECKS, **query.QUERY_CHECKS.get(name, {})}
+        assert set(query.parameters(name)) <= set(checks), name
+
+
+def test_arguments_are_converted():
+    arguments = query.check_arguments(
+        "request-volume-over-time", {"start": "2024-01-01", "end": "2024-03-31", "granularity": "Week"}
+    )
+    assert arguments == {"start": datetime.date(2024, 1, 1), "end": datetime.date(2024, 3, 31), "granularity": "Week"}
+    assert query.check_arguments("top-request-types", {"n": "10"}) == {"n": 10}
+    assert query.check_arguments("completion-percentiles-by", {"column": "month", "percentiles": [50, 95]}) == {
+        "column": "month",
+        "percentiles": (50.0, 95.0),
+    }
+    assert query.check_arguments("sla-breach-streaks", {"window": None}) == {"window": None}
+
+
+@pytest.mark.parametrize(
+    "name, arguments, bad",
+    [
+        ("top-request-types", {"n": "abc"}, "n"),
+        ("top-request-types", {"n": 0}, "n"),
+        ("request-volume-over-time", {"start": "yesterday-ish", "end": "2024-01-01"}, "start"),
+        ("request-volume-over-time", {"start": "2024-01-01", "end": "2024-01-31", "granularity": "Year"}, "granularity"),
+        ("request-volume-by", {"column": "Department"}, "column"),
+        ("completion-time-by", {"column": "month", "selections": {"Colour": "red"}}, "selections"),
+        ("rolling-service-levels", {"window": 30}, "window"),
+        ("staffing-requirements", {"target": 1.5}, "target"),
+        ("staffing-requirements", {"target": 0.8, "open_hours": 25}, "open_hours"),
+        ("demand-forecast", {"dataset": "Weather", "series": "Rain"}, "dataset"),
+    ],
+)
+def test_bad_arguments_name_the_argument(name, arguments, bad):
+    with pytest.raises(query.QueryError, match=f"bad {bad} "):
+        query.run(name, **arguments)
+
+
+def test_unknown_and_missing_arguments():
+    with pytest.raises(query.QueryError, match="has no argument 'colour'"):
+        query.run("request-volume-by", column="hour", colour="red")
+    with pytest.raises(query.QueryError, match="needs column"):
+        query.run("request-volume-by")
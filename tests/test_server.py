@@ -0,0 +1,44 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from van311 import query, server
+
+
+@pytest.fixture
+def base_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_failing_query_gets_a_json_500(base_url, monkeypatch):
+    name = next(iter(query.QUERIES))
+
+    def fail(*args, **kwargs):
+        raise IndexError("index 0 is out of bounds")
+
+    monkeypatch.setattr(server, "etag", lambda name, arguments: '"failing"')
+    monkeypatch.setattr(server, "parse_parameters", lambda name, query_string: {})
+    monkeypatch.setattr(query, "run", fail)
+
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        urllib.request.urlopen(f"{base_url}/{name}", timeout=10)
+
+    assert raised.value.code == 500
+    assert "IndexError" in json.loads(raised.value.read())["error"]
+
+
+def test_bad_argument_gets_a_400_naming_it(base_url):
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        urllib.request.urlopen(f"{base_url}/top-request-types?n=abc", timeout=10)
+
+    assert raised.value.code == 400
+    assert json.loads(raised.value.read())["error"] == "top-request-types: bad n 'abc': expected a whole number"
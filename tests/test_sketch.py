@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from van311 import cube, sketch
+
+
+@pytest.fixture
+def completed():
+    """Completed requests with log-normal completion times over a few cube cells."""
+    rng = np.random.default_rng(7)
+    n = 20_000
+    return pd.DataFrame(
+        {
+            "Category": pd.Categorical(rng.choice(["Parks", "Sanitation", "Streets"], n)),
+            "Local area": pd.Categorical(rng.choice(["Downtown", "Kitsilano", "Marpole"], n)),
+            "month": rng.integers(1, 13, n).astype("int8"),
+            "Channel": pd.Categorical(rng.choice(["Phone", "WEB"], n)),
+            "Department": pd.Categorical(rng.choice(["ENG", "PR"], n)),
+            "Completion Time (days)": rng.lognormal(1.0, 1.5, n),
+        }
+    )
+
+
+def merged_sketch(completed, parts=4):
+    # Built in chunks and merged, like ingest
+    size = -(-len(completed) // parts)
+    chunks = [completed.iloc[start:start + size] for start in range(0, len(completed), size)]
+    return cube.merge([sketch.build(chunk) for chunk in chunks], sketch.DIMENSIONS)
+
+
+def test_quantiles_are_within_the_relative_accuracy_of_exact_values(completed):
+    filters = {"Channel": "Phone", "month": [1, 2, 3, 4, 5, 6]}
+    result = sketch.quantiles(merged_sketch(completed), "Local area", **filters).set_index("Local area")
+
+    selected = completed[(completed["Channel"] == "Phone") & completed["month"].isin(filters["month"])]
+    for area, times in selected.groupby("Local area", observed=True)["Completion Time (days)"]:
+        for percentile in sketch.PERCENTILES:
+            exact = np.quantile(times.to_numpy(), percentile / 100, method="lower")
+            estimate = result.loc[area, f"p{percentile}"]
+            assert abs(estimate - exact) <= sketch.RELATIVE_ACCURACY * exact
+
+
+def test_quantiles_of_an_empty_selection(completed):
+    result = sketch.quantiles(merged_sketch(completed), "Category", Local_area="Nowhere")
+
+    assert result.empty
+    assert list(result.columns) == ["Category"] + [f"p{percentile}" for percentile in sketch.PERCENTILES]
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from van311 import cache, paths, sla, store
+
+
+def contact_centre_metrics(days, start="2024-01-01", seed=0):
+    """A contact centre export with one row per day."""
+    rng = np.random.default_rng(seed)
+    offered = rng.integers(200, 800, days)
+    abandoned = (offered * rng.uniform(0.02, 0.2, days)).astype(int)
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range(start, periods=days, freq="D"),
+            "CallsOffered": offered,
+            "CallsHandled": offered - abandoned,
+            "CallsAbandoned": abandoned,
+            "AverageSpeedofAnswer": rng.uniform(20, 600, days),
+            "ServiceLevel": rng.uniform(0.3, 0.95, days),
+        }
+    )
+
+
+@pytest.mark.parametrize("split", [1, 6, 27, 89, 150])
+def test_extend_matches_build_on_the_extended_series(split):
+    metrics = contact_centre_metrics(200)
+    # A missing day in the new part counts as a day without calls in both
+    metrics = metrics.drop(index=split + 3)
+
+    extended = sla.extend(sla.build(metrics.iloc[:split]), metrics.iloc[split:])
+
+    pd.testing.assert_frame_equal(extended, sla.build(metrics), check_exact=False, rtol=1e-9)
+
+
+def test_extend_without_new_days_returns_the_table():
+    metrics = contact_centre_metrics(30)
+    table = sla.build(metrics)
+
+    assert sla.extend(table, metrics.iloc[:10]) is table
+
+
+def test_windows_longer_than_the_series_stay_empty():
+    table = sla.build(contact_centre_metrics(20))
+
+    for window in sla.WINDOWS:
+        column = table[sla.rolling_column("Service Level", window)]
+        assert column.notna().sum() == max(len(table) - window + 1, 0)
+
+
+def test_short_series_shows_a_notice(store_dir, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    store.write_table(sla.build(contact_centre_metrics(20)), paths.CONTACT_CENTRE_SLA_PARQUET, store_dir)
+    monkeypatch.setattr(paths, "STORE_DIR", store_dir)
+    cache.invalidate()
+
+    app = AppTest.from_file(str(paths.ROOT_DIR / "pages" / "7_Contact_Centre_Metrics.py"), default_timeout=120).run()
+
+    assert not app.exception
+    assert [info.value for info in app.info] == ["Not enough days of call data for a 28-day rolling window yet."]
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from van311 import staffing
+
+
+def test_service_levels_match_the_published_erlang_c_example():
+    # 100 calls in 30 minutes, 180 s handle time, answered within 20 s:
+    # 10 erlangs, and 39.0%, 64.0%, 79.6% and 88.8% with 11 to 14 agents
+    load = staffing.offered_load([100], handle_seconds=180, open_hours=0.5)
+    assert load[0] == pytest.approx(10.0)
+
+    levels = staffing.service_levels(load, 20, handle_seconds=180, answer_seconds=20)
+
+    assert levels[0, 11:15] == pytest.approx([0.390, 0.640, 0.796, 0.888], abs=5e-4)
+    # Ten agents or fewer cannot keep up with ten erlangs
+    assert not levels[0, :11].any()
+
+
+def test_probability_of_waiting_matches_the_closed_form():
+    # With T = 0 the service level is 1 - C(N, A); C(3, 2) = 4/9
+    levels = staffing.service_levels([2.0], 5, handle_seconds=180, answer_seconds=0)
+
+    assert 1 - levels[0, 3] == pytest.approx(4 / 9)
+
+
+def test_required_agents_at_the_boundaries():
+    load = np.array([10.0, 0.0, 10.0])
+    levels = staffing.service_levels(load, 20, handle_seconds=180, answer_seconds=20)
+    levels[2] = np.minimum(levels[2], 0.5)
+
+    # A level exactly at the target meets it; just above it needs one more agent
+    assert staffing.required_agents(levels, levels[0, 13])[0] == 13
+    assert staffing.required_agents(levels, np.nextafter(levels[0, 13], 1))[0] == 14
+    required = staffing.required_agents(levels, 0.8)
+    # Idle days need nobody, and an unreachable target gets every agent in the table
+    assert list(required) == [14, 0, 20]
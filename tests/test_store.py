@@ -0,0 +1,121 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from van311 import filters, ingest, paths, runs, store
+
+
+def reference_snapshot(store_dir, updates):
+    """The snapshot as a full sort of the latest versions would produce it."""
+    table = store.read_service_request_table(store_dir, updates=updates)
+    if updates:
+        table = store._latest_versions(table)
+    return table.sort_by(store.OPEN_TIMESTAMP)
+
+
+def as_frame(table):
+    frame = table.to_pandas()
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(object)
+    return frame
+
+
+def assert_same_rows(table, expected):
+    pd.testing.assert_frame_equal(as_frame(table), as_frame(expected))
+
+
+def write_update(store_dir, frame, number):
+    name = f"part-{number:05d}.parquet"
+    store.write_table(frame.reset_index(drop=True), f"{paths.SERVICE_REQUEST_UPDATES_DIR}/{name}", store_dir)
+    return name
+
+
+def changed_requests(store_dir, ids, new_ids, status):
+    """Stored requests ``ids`` with a new status, plus copies of the first ones as new requests ``new_ids``."""
+    requests = store.load_service_requests(store_dir).set_index("BI_ID", drop=False)
+    changed = requests.loc[ids].copy()
+    changed["Status"] = pd.Categorical([status] * len(changed))
+    new = requests.loc[ids[:len(new_ids)]].copy()
+    new["BI_ID"] = list(new_ids)
+    frame = pd.concat([changed, new], ignore_index=True)
+    for column in ingest.SERVICE_REQUEST_CATEGORICALS:
+        frame[column] = frame[column].astype("category")
+    return frame
+
+
+def test_ingest_writes_the_base_table_in_sorted_row_groups(built_store):
+    base = pq.ParquetFile(built_store / paths.SERVICE_REQUESTS_PARQUET)
+    assert base.num_row_groups > 1
+    for group in range(base.num_row_groups):
+        opened = base.read_row_group(group, columns=[store.OPEN_TIMESTAMP])[store.OPEN_TIMESTAMP].to_numpy()
+        assert (np.diff(opened) >= np.timedelta64(0)).all()
+
+
+def test_snapshot_is_the_sorted_request_table(built_store):
+    assert_same_rows(store.open_service_requests(built_store), reference_snapshot(built_store, []))
+
+
+def test_update_parts_are_merged_into_the_snapshot(store_dir):
+    requests = store.load_service_requests(store_dir)
+    ids = requests["BI_ID"].sample(40, random_state=1).tolist()
+    top = int(requests["BI_ID"].max())
+    first = write_update(store_dir, changed_requests(store_dir, ids[:30], range(top + 1, top + 11), "Open"), 0)
+    # The second part changes some requests of the first one again
+    second = write_update(store_dir, changed_requests(store_dir, ids[20:], range(top + 11, top + 21), "Close"), 1)
+
+    for updates in [[first], [first, second]]:
+        rows = store.write_service_request_snapshot(store_dir, updates)
+        snapshot = store.open_service_requests(store_dir)
+        expected = reference_snapshot(store_dir, updates)
+        assert rows == expected.num_rows
+        assert_same_rows(snapshot, expected)
+
+    # A rebuild from the base table and both parts gives the same snapshot
+    (store_dir / paths.SERVICE_REQUESTS_SNAPSHOT).unlink()
+    store.write_service_request_snapshot(store_dir, [first, second])
+    assert_same_rows(store.open_service_requests(store_dir), expected)
+
+
+def test_index_matches_the_snapshot(store_dir):
+    requests = store.load_service_requests(store_dir)
+    top = int(requests["BI_ID"].max())
+    changed = changed_requests(store_dir, requests["BI_ID"][:50].tolist(), range(top + 1, top + 51), "Open")
+    part = write_update(store_dir, changed, 0)
+    store.write_service_request_snapshot(store_dir, [part])
+
+    snapshot = store.open_service_requests(store_dir)
+    index = store.open_service_request_index(store_dir)
+    for column in filters.INDEXED_COLUMNS:
+        codes = filters.dictionary_codes(snapshot[column])[1]
+        np.testing.assert_array_equal(index[column], filters.posting_positions(codes))
+    np.testing.assert_array_equal(index[store.OPEN_TIMESTAMP], snapshot[store.OPEN_TIMESTAMP].to_numpy())
+
+
+def test_key_index_finds_the_current_versions(store_dir, monkeypatch):
+    # Small batches, so the snapshot and its key index are merged from several runs
+    monkeypatch.setattr(store.sorted_runs, "merge", functools.partial(runs.merge, batch_rows=700))
+    monkeypatch.setattr(store, "MERGE_BUFFER_ROWS", 2048)
+    requests = store.load_service_requests(store_dir)
+    ids = requests["BI_ID"].sample(60, random_state=2).tolist()
+    top = int(requests["BI_ID"].max())
+    part = write_update(store_dir, changed_requests(store_dir, ids[:30], range(top + 1, top + 11), "Open"), 0)
+    store.write_service_request_snapshot(store_dir, [part])
+
+    keys = store._map_ipc(paths.SERVICE_REQUEST_KEYS, store_dir)
+    snapshot = store.open_service_requests(store_dir)
+    assert snapshot.to_batches()[0].num_rows < snapshot.num_rows
+    np.testing.assert_array_equal(keys[store.KEY].to_numpy(), np.sort(snapshot[store.KEY].to_numpy()))
+    np.testing.assert_array_equal(snapshot[store.KEY].to_numpy()[keys[store.ROW].to_numpy()], keys[store.KEY].to_numpy())
+
+    wanted = ids + [top + 5, top + 1000]
+    found = store.read_service_requests_by_key(wanted, store_dir, [part])
+    expected = reference_snapshot(store_dir, [part])
+    assert_same_rows(found, expected.filter(pc.is_in(expected[store.KEY], value_set=pa.array(wanted))))
+
+    # A snapshot built from other parts cannot answer for these
+    assert store.read_service_requests_by_key(wanted, store_dir, []) is None
@@ -0,0 +1,118 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from tests.conftest import raw_service_requests, write_raw
+from van311 import ingest, paths, store, update
+
+MARKS = {"max_bi_id": 20000, "max_last_modified": "2024-05-10T00:00:00+00:00"}
+
+
+def test_changed_requests_are_compared_with_the_stored_marks_in_every_chunk(tmp_path, geocodes, closure_reasons):
+    raw = raw_service_requests(
+        [1, 30000, 20002, 15001],
+        modified=[
+            "2024-05-01T00:00:00+00:00",  # unchanged
+            "2024-05-12T00:00:00+00:00",  # new, raises both marks in the first chunk
+            "2024-05-01T00:00:00+00:00",  # new, but below the BI_ID mark of the first chunk
+            "2024-05-11T00:00:00+00:00",  # changed, but before the modification mark of the first chunk
+        ],
+    )
+    location = write_raw(raw, tmp_path / "requests.csv")
+
+    changed, marks = update.read_changed_service_requests([location], MARKS, geocodes, closure_reasons, chunk_size=2)
+
+    assert sorted(changed["BI_ID"]) == [15001, 20002, 30000]
+    assert marks["max_bi_id"] == 30000
+    assert pd.Timestamp(marks["max_last_modified"]) == pd.Timestamp("2024-05-12T00:00:00+00:00")
+    # The marks passed in are left alone
+    assert MARKS["max_bi_id"] == 20000
+
+
+def test_unchanged_export_leaves_the_marks(tmp_path, geocodes, closure_reasons):
+    location = write_raw(raw_service_requests([1, 2, 3], modified="2024-05-01T00:00:00+00:00"), tmp_path / "r.csv")
+
+    changed, marks = update.read_changed_service_requests([location], MARKS, geocodes, closure_reasons, chunk_size=2)
+
+    assert changed is None
+    assert marks == MARKS
+
+
+def test_previous_versions_are_read_through_the_key_index(store_dir):
+    requests = store.load_service_requests(store_dir)
+    top = int(requests["BI_ID"].max())
+    changed = requests.sample(25, random_state=3).reset_index(drop=True)
+    changed.loc[:4, "BI_ID"] = range(top + 1, top + 6)
+
+    previous = update.read_previous_versions(changed, store_dir)
+    (store_dir / paths.SERVICE_REQUEST_KEYS).unlink()
+    scanned = update.read_previous_versions(changed, store_dir)
+
+    assert sorted(previous["BI_ID"]) == sorted(changed["BI_ID"][5:])
+    pd.testing.assert_frame_equal(
+        previous.sort_values("BI_ID", ignore_index=True), scanned.sort_values("BI_ID", ignore_index=True)
+    )
+
+
+def read_raw(path):
+    return pd.read_csv(path, sep=";", dtype=str, keep_default_na=False)
+
+
+def comparable(frame, keys):
+    frame = frame.copy()
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(object)
+    return frame.sort_values(keys, ignore_index=True)
+
+
+def test_incremental_updates_match_a_full_rebuild(raw_source, tmp_path):
+    source = Path(shutil.copytree(raw_source, tmp_path / "source"))
+    export = source / paths.SERVICE_REQUESTS_CSV
+    updated = tmp_path / "updated"
+    ingest.run(str(source), updated, chunk_size=1000)
+
+    # First export: open requests get closed, closed ones move to another
+    # local area and channel, and new requests are added
+    raw = read_raw(export)
+    open_rows = raw.index[raw["Status"] == "Open"][:40]
+    closed_rows = raw.index[raw["Status"] == "Close"]
+    raw.loc[open_rows, ["Status", "Closure reason", "Service request close date"]] = [
+        "Close", raw.loc[closed_rows[0], "Closure reason"], "2025-01-30"
+    ]
+    # Only among named areas: a request without one is dropped, see update.read_changed_service_requests
+    moved = closed_rows[raw.loc[closed_rows, "Local area"] != ""][:30]
+    areas = raw.loc[raw["Local area"] != "", "Local area"].unique()
+    raw.loc[moved, "Local area"] = [areas[(list(areas).index(area) + 1) % len(areas)] for area in raw.loc[moved, "Local area"]]
+    raw.loc[moved, "Channel"] = "WEB"
+    new = raw.loc[closed_rows[30:60]].copy()
+    new["BI_ID"] = [str(i) for i in range(raw["BI_ID"].astype(int).max() + 1, raw["BI_ID"].astype(int).max() + 31)]
+    raw.loc[open_rows.union(moved), "Last modified timestamp"] = "2025-02-01T00:00:00-08:00"
+    new["Last modified timestamp"] = "2025-02-01T00:00:00-08:00"
+    raw = pd.concat([raw, new], ignore_index=True)
+    write_raw(raw, export)
+    update.run(str(source), updated, chunk_size=1000)
+
+    # Second export: a request changed by the first one changes again
+    twice = moved[0]
+    raw.loc[twice, "Local area"] = areas[(list(areas).index(raw.loc[twice, "Local area"]) + 1) % len(areas)]
+    raw.loc[twice, "Service request close date"] = "2025-02-10"
+    raw.loc[twice, "Last modified timestamp"] = "2025-02-15T00:00:00-08:00"
+    write_raw(raw, export)
+    update.run(str(source), updated, chunk_size=1000)
+    assert len(store.read_manifest(updated)["service_request_updates"]) == 2
+
+    rebuilt = tmp_path / "rebuilt"
+    ingest.run(str(source), rebuilt, chunk_size=1000)
+
+    for name, (_, dimensions) in ingest.AGGREGATES.items():
+        pd.testing.assert_frame_equal(
+            comparable(store.load_aggregate(name, updated), dimensions),
+            comparable(store.load_aggregate(name, rebuilt), dimensions),
+            obj=name,
+        )
+    pd.testing.assert_frame_equal(
+        comparable(store.open_service_requests(updated).to_pandas(), ["BI_ID"]),
+        comparable(store.open_service_requests(rebuilt).to_pandas(), ["BI_ID"]),
+    )
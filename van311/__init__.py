@@ -0,0 +1 @@
+"""Data pipeline and analytics helpers behind the Van 311 Streamlit dashboard."""
@@ -0,0 +1,77 @@
+"""Command line access to the dashboard's aggregates::
+
+    python -m van311 list
+    python -m van311 export top-request-types n=10
+    python -m van311 export completion-time-by column=month 'selections={"Channel": ["WEB"]}' \\
+        --format parquet --out completion.parquet
+    python -m van311 serve --port 8502
+
+Arguments are ``key=value`` pairs (see ``van311.query.parse_arguments``).
+CSV and JSON go to standard output unless ``--out`` is given. ``serve``
+answers the same queries over HTTP (see ``van311.server``).
+"""
+
+import argparse
+import inspect
+import sys
+from pathlib import Path
+
+from van311 import paths, query, server
+
+FORMATS = ["csv", "json", "parquet"]
+
+
+def list_queries():
+    for name in query.QUERIES:
+        arguments = [
+            key if default is inspect.Parameter.empty else f"{key}={default!r}"
+            for key, default in query.parameters(name).items()
+        ]
+        print(f"{name} {' '.join(arguments)}".rstrip())
+
+
+def export(name, pairs, output_format="csv", out=None):
+    try:
+        frame = query.as_frame(query.run(name, **query.parse_arguments(pairs)))
+    except query.QueryError as error:
+        raise SystemExit(str(error)) from None
+    if output_format == "parquet":
+        if out is None:
+            raise SystemExit("--out is required for parquet")
+        frame.to_parquet(out, index=False)
+    elif output_format == "json":
+        frame.to_json(out or sys.stdout, orient="records", date_format="iso", indent=1)
+        if out is None:
+            print()
+    else:
+        frame.to_csv(out or sys.stdout, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m van311", description="Query the Van 311 data store.")
+    parser.add_argument("--store", type=Path, help="store folder (default: data/store)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the queries and their arguments")
+    exporter = commands.add_parser("export", help="write a query result as CSV, JSON or Parquet")
+    exporter.add_argument("query", choices=list(query.QUERIES))
+    exporter.add_argument("arguments", nargs="*", metavar="key=value", help="query arguments")
+    exporter.add_argument("--format", choices=FORMATS, default="csv", help="output format (default: csv)")
+    exporter.add_argument("--out", type=Path, help="output file (default: standard output)")
+    serving = commands.add_parser("serve", help="serve the queries as JSON over HTTP")
+    serving.add_argument("--host", default=server.DEFAULT_HOST, help=f"address (default: {server.DEFAULT_HOST})")
+    serving.add_argument("--port", type=int, default=server.DEFAULT_PORT, help=f"port (default: {server.DEFAULT_PORT})")
+    serving.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    if args.store is not None:
+        paths.STORE_DIR = args.store
+    if args.command == "list":
+        list_queries()
+    elif args.command == "serve":
+        server.serve(args.host, args.port, quiet=not args.verbose)
+    else:
+        export(args.query, args.arguments, args.format, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+"""Cached loaders and the aggregations behind each dashboard section.
+
+Loaders are shared resources; aggregations are cached per argument set and
+return fresh copies. Nothing in here mutates a loaded frame, since the same
+object is handed to every session.
+"""
+
+import numpy as np
+import pandas as pd
+
+from van311 import anomaly, cube, geo, paths, sketch, sla, staffing, store
+from van311.cache import cache_data, cache_resource
+from van311.filters import FilterIndex
+from van311.timeindex import TimeIndex
+
+SERVICE_REQUESTS = paths.SERVICE_REQUESTS_PARQUET
+REQUEST_CUBE = paths.REQUEST_CUBE_PARQUET
+COMPLETION_CUBE = paths.COMPLETION_CUBE_PARQUET
+COMPLETION_SKETCH = paths.COMPLETION_SKETCH_PARQUET
+DENSITY_GRID = paths.DENSITY_GRID_PARQUET
+DAILY_COUNTS = paths.DAILY_COUNTS_PARQUET
+FORECASTS = paths.FORECASTS_PARQUET
+FORECAST_ACCURACY = paths.FORECAST_ACCURACY_PARQUET
+GEOCODES = paths.GEOCODES_PARQUET
+INQUIRY_VOLUME = paths.INQUIRY_VOLUME_PARQUET
+CONTACT_CENTRE = paths.CONTACT_CENTRE_PARQUET
+CONTACT_CENTRE_SLA = paths.CONTACT_CENTRE_SLA_PARQUET
+# Lists the update parts appended to the request table by ``van311.update``
+MANIFEST = paths.MANIFEST_JSON
+
+# Selectbox value meaning "no filter"
+ALL = cube.ALL
+
+
+# Loaders
+
+
+@cache_resource(SERVICE_REQUESTS, MANIFEST)
+def service_requests():
+    """Read-only Arrow table memory-mapped from the store's request snapshot."""
+    return store.open_service_requests()
+
+
+@cache_resource(REQUEST_CUBE)
+def request_cube():
+    return store.load_request_cube()
+
+
+@cache_resource(COMPLETION_CUBE)
+def completion_cube():
+    return store.load_completion_cube()
+
+
+@cache_resource(COMPLETION_SKETCH)
+def completion_sketch():
+    return store.load_completion_sketch()
+
+
+@cache_resource(DENSITY_GRID)
+def density_grid():
+    return store.load_aggregate(DENSITY_GRID)
+
+
+@cache_resource(DAILY_COUNTS)
+def anomaly_scores():
+    """Seasonal baseline and robust z-score of every day of every (type, area) series."""
+    return anomaly.score(*anomaly.tensor(store.load_aggregate(DAILY_COUNTS)))
+
+
+@cache_resource(GEOCODES)
+def geocodes():
+    return store.load_geocodes()
+
+
+@cache_resource(REQUEST_CUBE)
+def area_counts():
+    """Request counts per (Category, Local area), the neighbourhood map's filter keys."""
+    return cube.counts(request_cube(), ["Category", "Local area"])
+
+
+@cache_resource(REQUEST_CUBE, GEOCODES)
+def area_centroid_rows():
+    """Row of ``geocodes()`` for each ``Local area`` code of the cube (-1 if it has none)."""
+    areas = area_counts()["Local area"].cat.categories
+    first = ~geocodes()["Local area"].duplicated()
+    rows = pd.Index(geocodes()["Local area"][first]).get_indexer(areas)
+    return np.where(rows >= 0, np.flatnonzero(first)[rows], -1)
+
+
+@cache_resource(INQUIRY_VOLUME)
+def inquiry_volume():
+    return store.load_inquiry_volume()
+
+
+@cache_resource(CONTACT_CENTRE)
+def contact_centre_metrics():
+    """Daily metrics with handled/abandoned percentages and a Year-Month key."""
+    contact_center_metrics = store.load_contact_centre_metrics()
+
+    # Calculate percentage of calls handled vs. abandoned
+    contact_center_metrics["Handled Percentage"] = (
+        contact_center_metrics["CallsHandled"] / contact_center_metrics["CallsOffered"]
+    ) * 100
+    contact_center_metrics["Abandoned Percentage"] = (
+        contact_center_metrics["CallsAbandoned"] / contact_center_metrics["CallsOffered"]
+    ) * 100
+    return contact_center_metrics
+
+
+@cache_resource(CONTACT_CENTRE_SLA)
+def contact_centre_sla():
+    """Daily call totals with their rolling call-weighted ratios, see ``van311.sla``."""
+    return store.load_aggregate(CONTACT_CENTRE_SLA)
+
+
+@cache_resource(SERVICE_REQUESTS, MANIFEST)
+def request_index():
+    """Inverted index over the request table's categorical columns."""
+    table = service_requests()
+    positions = store.open_service_request_index()
+    if positions and any(len(column) != table.num_rows for column in positions.values()):
+        # The snapshot was replaced between the two reads; index this one
+        positions = None
+    return FilterIndex(table, positions=positions)
+
+
+@cache_resource(SERVICE_REQUESTS, MANIFEST)
+def time_index():
+    """Sorted index over the open timestamps."""
+    table = service_requests()
+    opened = (store.open_service_request_index() or {}).get(store.OPEN_TIMESTAMP)
+    if opened is None or len(opened) != table.num_rows:
+        # Indexes written before they held the timestamps, or a snapshot replaced between the two reads
+        opened = table[store.OPEN_TIMESTAMP]
+    return TimeIndex(opened)
+
+
+# Service requests (answered from the request count cube)
+
+
+@cache_data(REQUEST_CUBE)
+def request_summary():
+    cells = request_cube()
+    return {
+        "total_requests": cube.total(cells),
+        "categories_count": cells["Category"].nunique(),
+        "neighborhoods_count": cells["Local area"].nunique(),
+        "most_common_category": _most_common(cells, "Category"),
+        "most_common_neighborhood": _most_common(cells, "Local area"),
+    }
+
+
+def _most_common(cells, column):
+    counts = cube.counts(cells, column)
+    return counts.loc[counts[cube.COUNT].idxmax(), column]
+
+
+@cache_data(REQUEST_CUBE)
+def request_types():
+    """Distinct service request types, in order of first appearance in the cube."""
+    return request_cube()["Service request type"].unique()
+
+
+@cache_data(REQUEST_CUBE)
+def filter_options(column):
+    """Selectbox options for a categorical column, "All" first."""
+    return [ALL] + sorted(request_cube()[column].unique())
+
+
+@cache_data(REQUEST_CUBE)
+def top_request_types(n=20):
+    service_request_counts = cube.counts(request_cube(), ["Service request type", "Category"])
+    return service_request_counts.sort_values(by="Count", ascending=False).head(n)
+
+
+@cache_data(REQUEST_CUBE)
+def time_trends():
+    """Request counts by month, weekday and hour in one long frame."""
+    cells = request_cube()
+    trends = []
+    for column, metric in [("month", "Month"), ("weekday", "Weekday"), ("hour", "Hour")]:
+        counts = cube.counts(cells, column)
+        counts["Metric"] = metric
+        trends.append(counts.rename(columns={column: "Value"}))
+    return pd.concat(trends, ignore_index=True)
+
+
+@cache_data(REQUEST_CUBE, GEOCODES)
+def neighborhood_summary(category=ALL, local_area=ALL):
+    counts = cube.counts(area_counts(), "Local area", Category=category, Local_area=local_area)
+
+    # Join to the centroids by area code rather than by name
+    rows = area_centroid_rows()[counts["Local area"].cat.codes.to_numpy()]
+    counts, rows = counts[rows >= 0], rows[rows >= 0]
+    centroids = geocodes()
+    return pd.DataFrame(
+        {
+            "Local area": counts["Local area"].astype(str).to_numpy(),
+            "Latitude": centroids["Latitude"].to_numpy()[rows],
+            "Longitude": centroids["Longitude"].to_numpy()[rows],
+            "Request Volume": counts[cube.COUNT].to_numpy(),
+        }
+    )
+
+
+@cache_data(DENSITY_GRID)
+def request_density(detail="Coarse", category=ALL, local_area=ALL):
+    """Pre-binned request counts (``Latitude``, ``Longitude``, ``Request Volume``) per map cell."""
+    cells = geo.density(density_grid(), geo.LEVELS[detail], Category=category, Local_area=local_area)
+    return cells.rename(columns={cube.COUNT: "Request Volume"})
+
+
+@cache_data(REQUEST_CUBE)
+def request_volume_by(column, category=ALL, local_area=ALL):
+    """Filtered request counts by ``weekday`` or ``hour``."""
+    counts = cube.counts(request_cube(), column, Category=category, Local_area=local_area)
+    return counts.rename(columns={cube.COUNT: "Request Volume"})
+
+
+@cache_data(REQUEST_CUBE)
+def closure_summary(category=ALL, local_area=ALL):
+    summary = cube.counts(request_cube(), "Category_cr", Category=category, Local_area=local_area)
+    summary["Percentage"] = (summary["Count"] / summary["Count"].sum()) * 100
+    return summary
+
+
+@cache_data(REQUEST_CUBE)
+def closure_trends(category=ALL, local_area=ALL):
+    return cube.counts(
+        request_cube(), ["month", "Category_cr"], Category=category, Local_area=local_area
+    )
+
+
+@cache_data(SERVICE_REQUESTS, MANIFEST)
+def date_bounds():
+    """First and last request open date, as ``datetime.date``."""
+    index = time_index()
+    return pd.Timestamp(index.first).date(), pd.Timestamp(index.last).date()
+
+
+@cache_data(SERVICE_REQUESTS, MANIFEST)
+def request_volume_over_time(start, end, granularity="Day", category=ALL, local_area=ALL):
+    """Request counts per day/week/month for requests opened from ``start`` through ``end``."""
+    positions = request_index().positions({"Category": category, "Local area": local_area})
+    buckets, counts = time_index().counts(
+        pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1), granularity, positions
+    )
+    return pd.DataFrame({"Date": buckets, "Request Volume": counts})
+
+
+@cache_data(COMPLETION_CUBE)
+def completion_options(column):
+    """Multiselect options for a dimension of the completion cube."""
+    return sorted(completion_cube()[column].unique())
+
+
+@cache_data(COMPLETION_CUBE)
+def completion_time_by(column, selections=None):
+    """Mean completion time by ``Category``, ``Local area`` or ``month``.
+
+    ``selections`` maps completion cube dimensions to the values picked in
+    their multiselects; cells must match all of them.
+    """
+    return cube.mean_completion(completion_cube(), column, **(selections or {}))
+
+
+@cache_data(COMPLETION_SKETCH)
+def completion_percentiles_by(column, selections=None, percentiles=tuple(sketch.PERCENTILES)):
+    """Completion time percentiles (``p50``, ``p90``, ...) by ``column``.
+
+    Values are within ``sketch.RELATIVE_ACCURACY`` of the exact percentiles.
+    """
+    return sketch.quantiles(completion_sketch(), column, list(percentiles), **(selections or {}))
+
+
+# Inquiry volume
+
+
+@cache_data(INQUIRY_VOLUME)
+def volume_trends():
+    return inquiry_volume().groupby("Year Month")["Number of Records"].sum().reset_index()
+
+
+@cache_data(INQUIRY_VOLUME)
+def channel_trends():
+    return (
+        inquiry_volume().groupby(["Year Month", "Channel"], observed=True)["Number of Records"]
+        .sum()
+        .reset_index()
+    )
+
+
+@cache_data(INQUIRY_VOLUME)
+def total_inquiries():
+    return int(inquiry_volume()["Number of Records"].sum())
+
+
+# Contact centre
+
+
+@cache_data(CONTACT_CENTRE)
+def monthly_metrics():
+    monthly = (
+        contact_centre_metrics()
+        .groupby("Year-Month")
+        .agg(
+            {
+                "CallsOffered": "sum",
+                "CallsHandled": "sum",
+                "CallsAbandoned": "sum",
+                "AverageSpeedofAnswer": "mean",
+                "ServiceLevel": "mean",
+            }
+        )
+        .reset_index()
+    )
+
+    # Recalculate monthly percentages
+    monthly["Handled Percentage"] = (monthly["CallsHandled"] / monthly["CallsOffered"]) * 100
+    monthly["Abandoned Percentage"] = (monthly["CallsAbandoned"] / monthly["CallsOffered"]) * 100
+    return monthly
+
+
+@cache_data(CONTACT_CENTRE)
+def daily_metrics():
+    """Calls per day and the day's speed of answer and service level, in date order."""
+    return (
+        contact_centre_metrics()
+        .groupby("Date")
+        .agg({"CallsOffered": "sum", "AverageSpeedofAnswer": "mean", "ServiceLevel": "mean"})
+        .reset_index()
+    )
+
+
+@cache_data(CONTACT_CENTRE)
+def correlation_metrics():
+    return contact_centre_metrics()[["CallsHandled", "AverageSpeedofAnswer", "ServiceLevel"]].corr()
+
+
+# Request spikes (every type x area series scored once, see van311.anomaly)
+
+
+@cache_data(DAILY_COUNTS)
+def anomaly_dates():
+    """First and last day of the scored series."""
+    days = anomaly_scores()["days"]
+    return (days[0].date(), days[-1].date()) if len(days) else (None, None)
+
+
+@cache_data(DAILY_COUNTS, REQUEST_CUBE)
+def request_spikes(since=None, min_z=4.0, min_count=5, n=50, category=ALL):
+    """The ``n`` strongest (type, area, day) spikes on or after ``since``, strongest first."""
+    types = None
+    if category != ALL:
+        types = cube.counts(request_cube(), "Service request type", Category=category)["Service request type"]
+    return anomaly.top_spikes(anomaly_scores(), n, min_z, min_count, since, types)
+
+
+@cache_data(DAILY_COUNTS)
+def request_series_scores(request_type, local_area):
+    """Daily count, seasonal baseline and z-score of one request type in one area."""
+    return anomaly.series_scores(anomaly_scores(), request_type, local_area)
+
+
+# Rolling service levels (maintained a day at a time by van311.sla)
+
+
+@cache_data(CONTACT_CENTRE_SLA)
+def rolling_service_levels(window=28):
+    """Abandonment rate, service level and speed of answer over the last ``window`` days, per day."""
+    table = contact_centre_sla()
+    columns = [sla.rolling_column(ratio, window) for ratio in sla.RATIOS]
+    rolling = table[[sla.DATE] + columns].dropna(subset=columns, how="all")
+    return rolling.rename(columns=dict(zip(columns, sla.RATIOS))).reset_index(drop=True)
+
+
+@cache_data(CONTACT_CENTRE_SLA)
+def sla_breach_streaks(target=sla.DEFAULT_TARGET, window=None, min_days=1):
+    """Runs of consecutive days below the service level ``target``, longest first."""
+    return sla.breach_streaks(contact_centre_sla(), target, window, min_days)
+
+
+@cache_data(CONTACT_CENTRE_SLA)
+def current_breach_streak(target=sla.DEFAULT_TARGET, window=None):
+    """Days in a row, up to the latest day with calls, below the service level ``target``."""
+    streaks = sla_breach_streaks(target, window)
+    table = contact_centre_sla()
+    column = "Service Level" if window is None else sla.rolling_column("Service Level", window)
+    latest = table.loc[table[column].notna(), sla.DATE].max()
+    current = streaks[streaks["End"] == latest]
+    return int(current["Days"].iloc[0]) if len(current) else 0
+
+
+@cache_data(CONTACT_CENTRE_SLA)
+def rolling_correlations(window=90):
+    """Correlation of each pair of daily metrics over the ``window`` days ending on each day."""
+    correlations = sla.rolling_correlations(contact_centre_sla(), [window])
+    columns = [column for column in correlations.columns if column != sla.DATE]
+    correlations = correlations.dropna(subset=columns, how="all")
+    correlations = correlations.rename(columns={column: column.removesuffix(f" {window}d") for column in columns})
+    return correlations.reset_index(drop=True)
+
+
+# Forecasts (fitted on data refresh by van311.forecast)
+
+
+@cache_resource(FORECASTS)
+def forecasts():
+    return store.load_aggregate(FORECASTS)
+
+
+@cache_data(FORECASTS)
+def forecast_series(dataset):
+    """Series names with a stored forecast in ``dataset``."""
+    frame = forecasts()
+    return list(frame.loc[frame["Dataset"] == dataset, "Series"].unique())
+
+
+@cache_data(FORECASTS)
+def demand_forecast(dataset, series):
+    """Stored forecast with 80%/95% intervals for one series."""
+    frame = forecasts()
+    selected = frame[(frame["Dataset"] == dataset) & (frame["Series"] == series)]
+    return selected.drop(columns=["Dataset", "Series"]).reset_index(drop=True)
+
+
+@cache_data(FORECAST_ACCURACY)
+def forecast_accuracy(dataset):
+    """Backtest error of each model per series in ``dataset``."""
+    accuracy = store.load_aggregate(FORECAST_ACCURACY)
+    return accuracy[accuracy["Dataset"] == dataset].drop(columns="Dataset").reset_index(drop=True)
+
+
+# Staffing
+
+
+@cache_resource(CONTACT_CENTRE, FORECASTS)
+def staffing_table(handle_seconds, answer_seconds, open_hours):
+    """Daily calls (history, then the stored forecast) and their Erlang C service levels.
+
+    ``levels[day, n]`` is the service level of that day with ``n`` agents;
+    any target is answered from it by ``staffing.required_agents``.
+    """
+    history = daily_metrics()
+    forecast = demand_forecast("Calls offered", "Calls offered")
+    frame = pd.DataFrame(
+        {
+            "Date": np.concatenate([history["Date"].to_numpy(), forecast["Date"].to_numpy()]),
+            "Calls Offered": np.concatenate(
+                [history["CallsOffered"].to_numpy(), forecast["Forecast"].to_numpy()]
+            ),
+            "Observed Service Level": np.concatenate(
+                [history["ServiceLevel"].to_numpy(), np.full(len(forecast), np.nan)]
+            ),
+            "Period": ["Actual"] * len(history) + ["Forecast"] * len(forecast),
+        }
+    )
+    frame["Offered Load"] = staffing.offered_load(frame["Calls Offered"], handle_seconds, open_hours)
+    levels = staffing.service_levels(frame["Offered Load"], None, handle_seconds, answer_seconds)
+    return {"days": frame, "levels": levels}
+
+
+@cache_data(CONTACT_CENTRE, FORECASTS)
+def staffing_requirements(target, handle_seconds=staffing.DEFAULT_HANDLE_SECONDS,
+                          answer_seconds=staffing.DEFAULT_ANSWER_SECONDS,
+                          open_hours=staffing.DEFAULT_OPEN_HOURS):
+    """Agents needed per day to answer ``target`` of calls within ``answer_seconds``."""
+    table = staffing_table(handle_seconds, answer_seconds, open_hours)
+    days = table["days"].copy()
+    days["Required Agents"] = staffing.required_agents(table["levels"], target)
+    return days
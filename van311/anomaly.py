@@ -0,0 +1,200 @@
+"""Unusual daily spikes in every (request type, local area) series at once.
+
+With a hundred-odd request types and two dozen local areas there are
+thousands of daily count series, far too many to inspect chart by chart.
+Ingest keeps the request count of every non-empty (``Service request type``,
+``Local area``, ``date``) cell as a sum table (``build``, maintained
+incrementally like the cubes in ``van311.cube``). From it ``tensor`` lays
+out the dense ``[type, area, day]`` count array once, and ``score`` rates
+every day of every series in one vectorized pass:
+
+``baseline``
+    The median count of the same weekday over the previous ``WEEKS`` weeks,
+    so the weekly cycle (quiet weekends, Monday backlogs) is not a spike.
+``z-score``
+    ``(count - baseline) / scale`` with ``scale`` the larger of the
+    median absolute deviation of those weeks (times 1.4826, its normal
+    consistency factor) and ``sqrt(baseline)``, the Poisson noise of the
+    baseline, but at least 1. Medians ignore the occasional spike in the
+    baseline weeks, and the Poisson floor keeps small series, whose MAD is
+    often 0, from flagging every extra request.
+
+Series are scored in blocks of ``BLOCK_SERIES`` so that the lagged copies
+(``[series, day, week]``) stay small even over the full 2009-2021 history.
+Only series with any requests are kept; ``top_spikes`` then ranks their
+scored days.
+"""
+
+import numpy as np
+import pandas as pd
+
+from van311 import cube
+
+TYPE = "Service request type"
+AREA = "Local area"
+DATE = "date"
+DIMENSIONS = [TYPE, AREA, DATE]
+
+# Same-weekday history the baseline is taken from
+WEEKS = 8
+
+# Normal-consistency factor turning a median absolute deviation into a standard deviation
+MAD_SCALE = 1.4826
+
+# Series scored together; bounds the [series, day, week] working array
+BLOCK_SERIES = 256
+
+
+def build(service_requests):
+    """Requests per non-empty (request type, local area, day) cell."""
+    counts = (
+        service_requests.groupby(DIMENSIONS, observed=True, dropna=False)
+        .size()
+        .reset_index(name=cube.COUNT)
+    )
+    return cube.merge([counts], DIMENSIONS)
+
+
+def tensor(counts):
+    """Dense daily counts of ``counts`` (a ``build`` table) as ``[type, area, day]``.
+
+    Returns ``(array, types, areas, days)``; days run without gaps from the
+    first to the last date in the table.
+    """
+    types = counts[TYPE].astype("category")
+    areas = counts[AREA].astype("category")
+    dates = pd.DatetimeIndex(counts[DATE])
+    if not len(counts):
+        return np.zeros((0, 0, 0), dtype="int32"), types.cat.categories, areas.cat.categories, dates[:0]
+    first = dates.min()
+    days = pd.date_range(first, dates.max(), freq="D")
+    day = ((dates - first) // pd.Timedelta(days=1)).to_numpy()
+    array = np.zeros((len(types.cat.categories), len(areas.cat.categories), len(days)), dtype="int32")
+    # Cells are unique after ``cube.merge``, so plain assignment counts each once
+    array[types.cat.codes.to_numpy(), areas.cat.codes.to_numpy(), day] = counts[cube.COUNT].to_numpy()
+    return array, types.cat.categories, areas.cat.categories, days
+
+
+def sorting_network(n):
+    """Compare-exchange pairs of Batcher's odd-even merge sort for ``n`` values."""
+    pairs = []
+    p = 1
+    while p < n:
+        k = p
+        while k >= 1:
+            for j in range(k % p, n - k, 2 * k):
+                for i in range(min(k, n - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        pairs.append((i + j, i + j + k))
+            k //= 2
+        p *= 2
+    return pairs
+
+
+def _median(weeks):
+    """Elementwise median of a list of equally shaped arrays.
+
+    A sorting network over whole arrays (19 min/max pairs for 8 weeks) is
+    several times faster than ``np.median`` along a short last axis.
+    """
+    weeks = [week.copy() for week in weeks]
+    for i, j in sorting_network(len(weeks)):
+        low = np.minimum(weeks[i], weeks[j])
+        np.maximum(weeks[i], weeks[j], out=weeks[j])
+        weeks[i] = low
+    middle = len(weeks) // 2
+    if len(weeks) % 2:
+        return weeks[middle]
+    return (weeks[middle - 1] + weeks[middle]) / 2
+
+
+def _score_block(counts, weeks):
+    """Baseline and z-score of each day of a ``[series, day]`` block."""
+    counts = counts.astype("float32")
+    baseline = np.full(counts.shape, np.nan, dtype="float32")
+    z = np.full(counts.shape, np.nan, dtype="float32")
+    start = 7 * weeks
+    days = counts.shape[1]
+    if days <= start:
+        return baseline, z
+    # The same weekday 1..weeks weeks before each scored day
+    lagged = [counts[:, start - 7 * week:days - 7 * week] for week in range(1, weeks + 1)]
+    median = _median(lagged)
+    mad = _median([np.abs(week - median) for week in lagged])
+    scale = np.maximum(np.maximum(MAD_SCALE * mad, np.sqrt(median)), 1)
+    baseline[:, start:] = median
+    z[:, start:] = (counts[:, start:] - median) / scale
+    return baseline, z
+
+
+def score(array, types, areas, days, weeks=WEEKS, block=BLOCK_SERIES):
+    """Baselines and z-scores of every day of every non-empty series of a ``tensor``.
+
+    Returns a dict with the ``type`` and ``area`` of each series with any
+    requests, the ``days``, and ``[series, day]`` arrays of their ``counts``,
+    ``baseline`` and ``z`` scores (float32). The first ``weeks`` weeks have no
+    baseline yet and are NaN.
+    """
+    counts = array.reshape(-1, array.shape[-1])
+    series = np.flatnonzero(counts.any(axis=1))
+    counts = counts[series]
+    baseline = np.empty(counts.shape, dtype="float32")
+    z = np.empty_like(baseline)
+    for start in range(0, len(series), block):
+        rows = slice(start, start + block)
+        baseline[rows], z[rows] = _score_block(counts[rows], weeks)
+    type_code, area_code = np.unravel_index(series, array.shape[:2])
+    return {
+        "type": types[type_code],
+        "area": areas[area_code],
+        "days": days,
+        "counts": counts,
+        "baseline": baseline,
+        "z": z,
+    }
+
+
+def top_spikes(scores, n=50, min_z=4.0, min_count=5, since=None, types=None):
+    """The ``n`` highest-scoring (type, area, day) cells of ``score``'s result, highest first.
+
+    Only days on or after ``since`` with at least ``min_count`` requests and
+    a z-score of at least ``min_z`` count, of the request ``types`` if given.
+    """
+    days, z = scores["days"], scores["z"]
+    first = 0 if since is None else int(days.searchsorted(pd.Timestamp(since)))
+    window = z[:, first:]
+    candidates = (window >= min_z) & (scores["counts"][:, first:] >= min_count)
+    if types is not None:
+        candidates &= np.asarray(scores["type"].isin(types))[:, None]
+    flagged = np.flatnonzero(candidates)
+    if len(flagged) > n:
+        flagged = flagged[np.argpartition(-window.ravel()[flagged], n - 1)[:n]]
+    row, day = np.unravel_index(flagged, window.shape)
+    day = day + first
+    spikes = pd.DataFrame(
+        {
+            TYPE: scores["type"][row],
+            AREA: scores["area"][row],
+            "Date": days[day],
+            cube.COUNT: scores["counts"][row, day],
+            "Baseline": scores["baseline"][row, day],
+            "Z-score": z[row, day],
+        }
+    )
+    return spikes.sort_values("Z-score", ascending=False, ignore_index=True)
+
+
+def series_scores(scores, request_type, local_area):
+    """Daily count, baseline and z-score of one (type, area) series (no rows if it has no requests)."""
+    match = np.flatnonzero((scores["type"] == request_type) & (scores["area"] == local_area))
+    if not len(match):
+        return pd.DataFrame(columns=["Date", cube.COUNT, "Baseline", "Z-score"])
+    row = match[0]
+    return pd.DataFrame(
+        {
+            "Date": scores["days"],
+            cube.COUNT: scores["counts"][row],
+            "Baseline": scores["baseline"][row],
+            "Z-score": scores["z"][row],
+        }
+    )
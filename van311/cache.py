@@ -0,0 +1,236 @@
+"""Content-hashed, memory-capped memoization for loaders and aggregations.
+
+Streamlit re-executes ``app.py`` top to bottom on every widget change. The
+decorators here let that rerun skip work that has already been done:
+
+``cache_resource``
+    For loaded frames. Every caller gets the same object back, so one copy is
+    shared by all sessions of the process. Callers must not mutate it.
+``cache_data``
+    For derived aggregates. Callers get a copy, so mutating a result does not
+    corrupt the cached value.
+
+Keys are built from the function, its arguments and the SHA-256 digest of
+every store file the function reads. Rebuilding the store changes the digest,
+which evicts the stale entries on the next call. ``invalidate`` drops them
+explicitly. Each cache holds at most ``max_bytes`` of values and evicts the
+least recently used entries beyond that. Concurrent calls that miss on the
+same key wait for the first one instead of computing the value again.
+
+Every call, hit or miss, is timed as a ``van311.metrics`` span.
+"""
+
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from van311 import metrics, paths
+
+# Memory caps, overridable from the environment (megabytes)
+RESOURCE_CACHE_MB = int(os.environ.get("VAN311_RESOURCE_CACHE_MB", "2048"))
+DATA_CACHE_MB = int(os.environ.get("VAN311_DATA_CACHE_MB", "256"))
+
+_MISSING = object()
+
+
+def estimate_size(value):
+    """Approximate in-memory size of a cached value in bytes."""
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by the total size of its values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size, tags)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, tags=()):
+        size = estimate_size(value)
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, frozenset(tags))
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, tag=None):
+        """Drop every entry, or only the entries tagged with ``tag``."""
+        with self._lock:
+            if tag is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            for key in [k for k, (_, _, tags) in self._entries.items() if tag in tags]:
+                self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+
+resources = LRUCache(RESOURCE_CACHE_MB * 1024 * 1024)
+data = LRUCache(DATA_CACHE_MB * 1024 * 1024)
+
+# key -> (lock, threads holding or waiting for it) of values being computed
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# path -> ((mtime_ns, size), digest); hashing only reruns when the file changes
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """SHA-256 of a file's content, recomputed only when its stat changes."""
+    path = str(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        known = _digests.get(path)
+    if known is not None and known[0] == signature:
+        return known[1]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    with _digests_lock:
+        _digests[path] = (signature, digest)
+    if known is not None and known[1] != digest:
+        # The data changed under us: evict everything derived from it
+        invalidate(os.path.basename(path))
+    return digest
+
+
+def source_version(sources, store_dir=None):
+    """Combined digest of the given store files (``None`` for missing ones)."""
+    store_dir = paths.STORE_DIR if store_dir is None else store_dir
+    version = []
+    for name in sources:
+        try:
+            version.append(file_digest(store_dir / name))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+def invalidate(source=None):
+    """Forget cached values derived from ``source`` (a store file name), or all of them."""
+    resources.invalidate(source)
+    data.invalidate(source)
+
+
+def _freeze(value):
+    """Turn call arguments into something hashable."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        return tuple(_freeze(v) for v in items)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+@contextmanager
+def _single_flight(key):
+    """Hold the lock for ``key``, so concurrent misses compute it only once."""
+    with _inflight_lock:
+        lock, waiters = _inflight.get(key, (None, 0))
+        lock = lock or threading.Lock()
+        _inflight[key] = (lock, waiters + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _inflight_lock:
+            waiters = _inflight[key][1] - 1
+            if waiters:
+                _inflight[key] = (lock, waiters)
+            else:
+                del _inflight[key]
+
+
+def _memoize(cache, sources, copy_result, kind):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.span(kind, func.__qualname__) as record:
+                key = (
+                    func.__module__,
+                    # Page scripts all run as __main__; tell them apart by file
+                    inspect.unwrap(func).__code__.co_filename,
+                    func.__qualname__,
+                    source_version(sources),
+                    _freeze(args),
+                    _freeze(kwargs),
+                )
+                value = cache.get(key, _MISSING)
+                if value is _MISSING:
+                    with _single_flight(key):
+                        # Another thread may have computed it while we waited
+                        value = cache.get(key, _MISSING)
+                        if value is _MISSING:
+                            value = func(*args, **kwargs)
+                            cache.put(key, value, tags=sources)
+                        else:
+                            record["cached"] = True
+                else:
+                    record["cached"] = True
+                record["rows"] = metrics.count_rows(value)
+                return _copy(value) if copy_result else value
+
+        wrapper.cache_sources = tuple(sources)
+        return wrapper
+
+    return decorator
+
+
+def _copy(value):
+    if isinstance(value, (dict, list, tuple)):
+        return copy.deepcopy(value)
+    if hasattr(value, "copy"):
+        return value.copy()
+    return value
+
+
+def cache_resource(*sources, kind=metrics.LOAD):
+    """Memoize a loader; all callers share the returned object."""
+    return _memoize(resources, sources, copy_result=False, kind=kind)
+
+
+def cache_data(*sources, kind=metrics.TRANSFORM):
+    """Memoize an aggregation; each caller gets its own copy of the result."""
+    return _memoize(data, sources, copy_result=True, kind=kind)
@@ -0,0 +1,237 @@
+"""Service request type to Category mapping used to enrich service requests.
+
+The mapping is carried over verbatim from ``main.ipynb``. A request type that
+appears under more than one category belongs to the first one listed, which is
+what the notebook's ``categorize_service_request`` loop returned.
+"""
+
+CATEGORY_MAPPING = {
+    "Environmental and Waste Management": [
+        "Dead Animal Pick Up Case",
+        "Abandoned Non-Recyclables-Large Case",
+        "Abandoned Non-Recyclables-Small Case",
+        "Abandoned Mattress Case",
+        "Garbage Bin Request Case",
+        "Green Bin Request Case",
+        "Missed Green Bin Pickup Case",
+        "Missed Garbage Bin Pickup Case",
+        "Illegal Dumping Case",
+        "Recycling and Disposal Facility - Landfill Inquiry Case",
+        "Recycling and Disposal Facility - Transfer Station Inquiry Case",
+        "Street Cleaning and Debris Pick Up Case",
+        "Needle Clean Up Case",
+        "Loose Litter Clean Up Case",
+        "Rats and Rodents Case",
+        "Feeding Wildlife Case",
+        "Street Surface Water Flooding Case",
+        "Commercial Waste Container Concern Case",
+        "Parks Operations and Maintenance Case",
+        "Parking Management Inquiry Case",
+        "Disposal Facility - Landfill Inquiry Case",
+        "Disposal Facility - Transfer Station Inquiry Case",
+        "Abandoned Recyclables Case",
+        "Sanitation Operations Inquiry Case",
+        "Snow and Ice Removal From City Property Case",
+        "Graffiti Management Program Case",
+        "Sewer Drainage and Design Inquiry Case",
+        "Street and Sidewalk Use Request Case",
+    ],
+    "Public Property Maintenance": [
+        "Street Repair Case",
+        "Sidewalk Repair Case",
+        "Street Light Out Case",
+        "Graffiti Removal - City Property Case",
+        "Graffiti Removal - Private Property Case",
+        "Graffiti Removal - Park Property Case",
+        "Graffiti Removal - Commercial Waste Container Case",
+        "Pavement Markings Case",
+        "Park Litter Can Case",
+        "Street Furniture Maintenance Case",
+        "Traffic Signal Repair Case",
+        "Bridge and Structures Maintenance Case",
+        "Vegetation Maintenance Case",
+        "Boulevard Maintenance Case",
+        "Meter Out of Order Internal Audit Case",
+        "Street or Traffic Light Utility Damage Case",
+        "Vegetation Encroachment of City Property Case",
+        "Street Furniture Litter Can Maintenance Case",
+        "Property Tax Request Case",
+        "City Clock Maintenance Case",
+        "ZZ OLD - Private Property Tree Removal Case",
+        "Preventative Maintenance Program Case",
+        "Sign Repair Case",
+        "Pavement Marking Maintenance Case",
+    ],
+    "Parks and Recreation": [
+        "Park Improvement Case",
+        "Urban Issues in Parks Case",
+        "Parks Feedback Case",
+        "Park Board Commissioner Feedback Case",
+        "Parks Washroom Servicing Case",
+        "Park Facility Maintenance Request",
+        "Canada Geese Nests Case",
+        "Recreation Feedback Case",
+        "Streets Horticulture Program Inquiry Case",
+        "Park Ranger Request Case",
+    ],
+    "Transportation and Traffic": [
+        "Residential Parking Permit Request Case",
+        "Parking Enforcement Transfer Case",
+        "Parking Enforcement Request Case",
+        "Parking Meter Request Case",
+        "Traffic Management Inquiry Case",
+        "Traffic Calming Case",
+        "Traffic Signal Timing Concern Case",
+        "Traffic and Pedestrian Signal - Modify Request Case",
+        "Traffic and Pedestrian Signal - New Request Case",
+        "Street Construction Concern Case",
+        "Curb Ramp Request Case",
+        "Traffic Sign - New Request Case",
+        "Traffic Sign - Modify Request Case",
+        "Pothole Case",
+        "Arterial St. Curbside Sign - Modify Request Case",
+        "Arterial St. Curbside Sign - New Request Case",
+        "School Traffic Concern Case",
+        "Transportation Design Project Inquiry Case",
+        "Community Transportation Request Case",
+        "Tower Crane Site Survey Case",
+        "ZZ OLD - Traffic Calming Case",
+    ],
+    "Residential and Private Property": [
+        "Noise on Private Property Case",
+        "Private Property Construction Concern Case",
+        "Private Property Construction Noise Case",
+        "Private Property Tree Removal Concern Case",
+        "Residential Cart Concern Case",
+        "Sidewalk Snow and Ice Removal Bylaw Violation Case",
+        "Unpermitted Construction Container Concern Case",
+        "Sewer Backup Case",
+        "Sewer Odour Case",
+        "High Water Consumption Concern Case",
+        "Damage to Water System Case",
+        "Water Leak Case",
+        "Water Pressure Concern Case",
+        "Residential Street Curbside Sign Request Case",
+        "Private Property Concern Case",
+        "Private Property Inquiry Case",
+    ],
+    "Permits and Licenses": [
+        "Business Licence Request Case",
+        "Dog Licence Case",
+        "Security Alarm Permit (Revenue Services) Case",
+        "Security Alarm Permit (VPD) Case",
+        "Water Exemption Permit Request Case",
+        "Short-Term Rental Concern Case",
+        "Short-Term Rental Request Case",
+        "Tour Bus Permit Case",
+        "Fire Inspection Request Case",
+    ],
+    "Feedback and Inquiries": [
+        "General Feedback Case",
+        "City Services Feedback Case",
+        "Van311 Feedback Case",
+        "Mayor and Council Feedback Case",
+        "Website Feedback Case",
+        "Employee Feedback Case",
+        "Public Hearing Feedback Case",
+        "Park Board Commissioner Feedback Case",
+        "Election Inquiry Case",
+        "Recreation Feedback Case",
+        "Accessibility Feedback Case",
+        "City Manager Feedback Case",
+    ],
+    "Utilities and Infrastructure": [
+        "Sewer Operations Inquiry Case",
+        "Sewer Construction Concern Case",
+        "Waterworks General Work Request Case",
+        "Water Meter Reading Request Case",
+        "Waterworks Operations Construction Concern Case",
+        "Sewer Maintenance Hole Concern Case",
+        "Catch Basin Concern Case",
+        "Sewer Utility Damage Case",
+        "Locate Water Service Line or Valve Case",
+        "Water Service Line Turn On or Off Request Case",
+        "Water Design Inquiry Case",
+        "Water Hydrant Concern Case",
+        "Waterworks Request Case",
+        "Utility Billing Request Case",
+    ],
+    "Urban Planning and Development": [
+        "Urban Planning Request Case",
+        "Building and Development Inquiry Case",
+        "Local Improvement Program Case",
+        "Gastown Public Space Plan Request Case",
+        "Planner Appointment Request Case",
+        "Business Licence Change of Use (Five Uses) Case",
+        "Character Merit Assessment Request Case",
+        "Construction Related Concerns Case",
+        "Vancouver Building Bylaw Inquiry Case",
+    ],
+    "Emergency and Safety": [
+        "Fire Safety Hazards Case",
+        "Fire Prevention Inquiry Case",
+        "High Angle Rescue Inquiry Case",
+        "Home Safety Check Request Case",
+        "Emergency Referral Tracking Report Case",
+        "Snow Angel Program Request Case",
+        "Request Fire Reinspection (Inspector) Case",
+        "Request Fire Reinspection (Firehall) Case",
+        "Animal Concern Case",
+        "Animal Services Inquiry Case",
+    ],
+    "Sustainability and Environmental Concerns": [
+        "Sustainability Inquiry Case",
+        "Water Conservation Violation Case",
+        "Environmental Protection Inquiry Case",
+        "Environmental Contamination Concern Case",
+        "Single-Use Item Bylaw Request Case",
+        "Adopt a Catch Basin Program Inquiry Case",
+        "Free Paint Voucher Request Case",
+    ],
+    "Other Services": [
+        "Filming Office Request Case",
+        "Filming Inquiry Case",
+        "Customer Service Service Request Case",
+        "Newspaper Box Concern Case",
+        "Address Change Request Case",
+        "Transit Related Request Case",
+        "Street Furniture Request Case",
+        "Special Events Office Request Case",
+        "Special Events Inquiry Case",
+        "Hoarding Request Case",
+        "Non-Vegetative Encroachment Case",
+        "Hot Topic Case",
+        "Lockbox Request Case",
+        "Lost Pets Case",
+        "Moving and Storage Container Concern Case",
+        "New Crosswalk Marking Case",
+        "New Litter Can Request Case",
+        "New or Relocate Street Light Pole Case",
+        "Parking Meter Refund Request Case",
+        "Parking Ticket Review Case",
+        "Fireworks Request Case",
+        "Business Patio Inquiry Case",
+        "Business Support Request Case",
+        "Commercial Street Curbside Sign Request Case",
+        "Neighbourhood Energy Utility Request Case",
+        "Neighbourhood Energy Utility Issue Case",
+        "Commercial Waste Container Concern Case",
+        "Traffic Operations Construction Concern Case",
+        "Sign Cleaning Case",
+        "City Construction Project Concern Case",
+        "General Street Issues Case",
+    ],
+}
+
+
+# Fallback category for request types missing from the mapping
+DEFAULT_CATEGORY = "Other"
+
+
+def category_lookup():
+    """Return a flat ``{request type: category}`` dict, first match wins."""
+    lookup = {}
+    for category, request_types in CATEGORY_MAPPING.items():
+        for request_type in request_types:
+            lookup.setdefault(request_type, category)
+    return lookup
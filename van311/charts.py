@@ -0,0 +1,176 @@
+"""Downsampling and figure caching for the time series charts.
+
+Long series are cut down to at most ``MAX_POINTS`` points per series before
+they are plotted. ``lttb`` (largest triangle three buckets) keeps the points
+that preserve the visual shape of a line; ``minmax`` keeps each bucket's
+lowest and highest value, which suits bars and spiky series. Either way a
+chart's payload is bounded by the point cap, not by how many days of data
+the store holds.
+
+``forecast_figure`` draws a history line followed by a forecast and its
+prediction interval bands.
+
+Plotly is imported inside the figure builders, so importing this module
+(and the headless ``van311`` API) does not pay for it.
+
+``cache_figure`` memoizes a figure builder as its serialized Plotly spec
+(``FigureSpec``), once per store version and argument set. ``ui.plotly_chart``
+sends that JSON as it is, so a cached chart is neither rebuilt nor
+serialized again on later reruns and sessions.
+"""
+
+import functools
+
+import numpy as np
+
+from van311 import cache, metrics
+
+# Points kept per series (about one per horizontal pixel of a wide chart)
+MAX_POINTS = 1000
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("datetime64[ns]").astype(np.int64)
+    elif not np.issubdtype(values.dtype, np.number):
+        # Labels such as "2024-09": evenly spaced in sort order
+        return np.arange(len(values), dtype="float64")
+    return values.astype("float64")
+
+
+def lttb(x, y, max_points=MAX_POINTS):
+    """Positions of the points kept by largest-triangle-three-buckets.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the mean of the next bucket.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.nan_to_num(_as_float(y))
+    # Running sums give each bucket's mean in O(1)
+    x_sums = np.concatenate([[0.0], np.cumsum(x)])
+    y_sums = np.concatenate([[0.0], np.cumsum(y)])
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket == max_points - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_stop = edges[bucket + 2]
+            next_x = (x_sums[next_stop] - x_sums[stop]) / (next_stop - stop)
+            next_y = (y_sums[next_stop] - y_sums[stop]) / (next_stop - stop)
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def minmax(y, max_points=MAX_POINTS):
+    """Positions of the lowest and highest point of each of ``max_points / 2`` buckets."""
+    n = len(y)
+    if max_points >= n or max_points < 2:
+        return np.arange(n)
+    y = _as_float(y)
+    edges = np.linspace(0, n, max_points // 2 + 1).astype(np.int64)
+    kept = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            values = y[start:stop]
+            kept += [start + int(np.nanargmin(values)), start + int(np.nanargmax(values))]
+    return np.unique(kept)
+
+
+def downsample(frame, x, y, by=None, max_points=MAX_POINTS, method="lttb"):
+    """Rows of ``frame`` kept when each series is cut to ``max_points``.
+
+    ``y`` is a column or a list of columns (the kept rows are the union over
+    them); ``by`` splits ``frame`` into separate series, like a chart's
+    ``color``. ``frame`` must be sorted by ``x``.
+    """
+    columns = [y] if isinstance(y, str) else list(y)
+    if by is None:
+        series = [np.arange(len(frame))]
+    else:
+        series = list(frame.groupby(by, observed=True, sort=False).indices.values())
+    x_values = frame[x].to_numpy()
+    kept = []
+    for rows in series:
+        positions = [
+            lttb(x_values[rows], frame[column].to_numpy()[rows], max_points)
+            if method == "lttb"
+            else minmax(frame[column].to_numpy()[rows], max_points)
+            for column in columns
+        ]
+        kept.append(rows[np.unique(np.concatenate(positions))])
+    return frame.iloc[np.sort(np.concatenate(kept))] if kept else frame
+
+
+def forecast_figure(history, x, y, forecast, title, y_title):
+    """History line plus the forecast with shaded 95% and 80% intervals.
+
+    ``forecast`` is a ``demand_forecast`` frame (``Date``, ``Forecast``,
+    ``Lower 80`` ... ``Upper 95``).
+    """
+    import plotly.graph_objects as go
+
+    history = downsample(history, x, y)
+    figure = go.Figure()
+    for level, opacity in [(95, 0.15), (80, 0.3)]:
+        figure.add_trace(
+            go.Scatter(
+                x=list(forecast["Date"]) + list(forecast["Date"][::-1]),
+                y=list(forecast[f"Upper {level}"]) + list(forecast[f"Lower {level}"][::-1]),
+                fill="toself",
+                fillcolor=f"rgba(99, 110, 250, {opacity})",
+                line={"width": 0},
+                hoverinfo="skip",
+                name=f"{level}% interval",
+            )
+        )
+    figure.add_trace(go.Scatter(x=history[x], y=history[y], mode="lines", name="Actual"))
+    figure.add_trace(
+        go.Scatter(x=forecast["Date"], y=forecast["Forecast"], mode="lines", name="Forecast",
+                   line={"dash": "dash"})
+    )
+    figure.update_layout(title=title, xaxis_title="Date", yaxis_title=y_title)
+    return figure
+
+
+class FigureSpec:
+    """A Plotly figure serialized to the JSON spec the browser draws."""
+
+    def __init__(self, title, json):
+        self.title = title
+        self.json = json
+
+    @property
+    def nbytes(self):
+        return len(self.json)
+
+
+def cache_figure(*sources):
+    """Memoize a figure builder as its ``FigureSpec``; all reruns and sessions share it."""
+
+    def decorator(build):
+        @functools.wraps(build)
+        def serialized(*args, **kwargs):
+            import plotly.io as pio
+
+            figure = build(*args, **kwargs)
+            title = figure.layout.title.text
+            return FigureSpec(title, pio.to_json(figure, validate=False))
+
+        return cache.cache_data(*sources, kind=metrics.CHART)(serialized)
+
+    return decorator
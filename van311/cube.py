@@ -0,0 +1,151 @@
+"""Pre-aggregated request count and completion-time cubes.
+
+Every service request chart on the dashboard is a count of requests grouped
+by a few of the same columns, filtered by a few others. Instead of grouping
+the full request table on every rerun, the ingest step counts requests once
+per combination of ``DIMENSIONS`` and stores only the non-empty cells. A
+query slices the cube by its filters and sums the ``Count`` column over the
+remaining dimensions, so its cost depends on the number of distinct cells,
+not on the number of requests.
+
+The completion cube does the same for the completion-time charts: per cell
+of ``COMPLETION_DIMENSIONS`` it stores how many requests were completed and
+the sum of their completion times, from which any filtered mean follows.
+
+Both cubes only hold sums, so they can be maintained incrementally: adding
+the cube of new rows and subtracting the cube of the rows they replace gives
+the same result as rebuilding from scratch (see ``apply_delta``).
+"""
+
+import pandas as pd
+
+DIMENSIONS = [
+    "month",
+    "weekday",
+    "hour",
+    "Category",
+    "Service request type",
+    "Local area",
+    "Category_cr",
+    "Channel",
+]
+COUNT = "Count"
+
+COMPLETION_DIMENSIONS = ["Category", "Local area", "month", "Channel", "Department"]
+COMPLETED = "Completed"
+TOTAL_DAYS = "Total days"
+
+# Filter value meaning "no filter", as used by the dashboard selectboxes
+ALL = "All"
+
+_SMALL_INTS = ["month", "weekday", "hour"]
+
+
+def build(service_requests):
+    """Count requests per non-empty cell of the cube."""
+    cube = (
+        service_requests.groupby(DIMENSIONS, observed=True, dropna=False)
+        .size()
+        .reset_index(name=COUNT)
+    )
+    return _compact(cube, DIMENSIONS)
+
+
+def build_completion(service_requests):
+    """Completed-request count and total completion days per cell."""
+    completed = service_requests[service_requests["Completion Time (days)"].notna()]
+    cube = (
+        completed.groupby(COMPLETION_DIMENSIONS, observed=True, dropna=False)["Completion Time (days)"]
+        .agg([("Completed", "size"), ("Total days", "sum")])
+        .reset_index()
+    )
+    cube[TOTAL_DAYS] = cube[TOTAL_DAYS].astype("float64")
+    return _compact(cube, COMPLETION_DIMENSIONS)
+
+
+def merge(cubes, dimensions=DIMENSIONS):
+    """Combine partial cubes (e.g. one per ingest chunk) into one.
+
+    Every non-dimension column is summed; cells whose first measure sums to
+    zero are dropped.
+    """
+    cube = pd.concat(cubes, ignore_index=True)
+    for column in dimensions:
+        if cube[column].dtype == object:
+            cube[column] = cube[column].astype("category")
+    measures = [column for column in cube.columns if column not in dimensions]
+    cube = cube.groupby(dimensions, observed=True, dropna=False)[measures].sum().reset_index()
+    return _compact(cube, dimensions)
+
+
+def negate(cube, dimensions=DIMENSIONS):
+    """The cube with every measure sign-flipped, for subtracting rows."""
+    cube = cube.copy()
+    for column in cube.columns:
+        if column not in dimensions:
+            cube[column] = -cube[column]
+    return cube
+
+
+def apply_delta(cube, added, removed, dimensions=DIMENSIONS):
+    """Update ``cube`` for ``added`` rows replacing ``removed`` rows.
+
+    ``added`` and ``removed`` are cubes built from those rows with the same
+    dimensions.
+    """
+    return merge([cube, added, negate(removed, dimensions)], dimensions)
+
+
+def _compact(cube, dimensions):
+    for column in _SMALL_INTS:
+        if column in dimensions:
+            cube[column] = cube[column].astype("int8")
+    first_measure = next(column for column in cube.columns if column not in dimensions)
+    cube[first_measure] = cube[first_measure].astype("int32")
+    return cube[cube[first_measure] > 0].reset_index(drop=True)
+
+
+def select(cube, **filters):
+    """Cells matching ``filters``.
+
+    Keyword names are dimensions, with spaces optionally replaced by
+    underscores (``Local_area="Downtown"``). A value may be a single member,
+    a list of members (any of them), or ``None`` / ``"All"`` / an empty list
+    for no filter.
+    """
+    mask = None
+    for name, value in filters.items():
+        if value is None or (isinstance(value, str) and value == ALL):
+            continue
+        column = cube[name if name in cube.columns else name.replace("_", " ")]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if not value:
+                continue
+            condition = column.isin(list(value))
+        else:
+            condition = column == value
+        mask = condition if mask is None else mask & condition
+    return cube if mask is None else cube[mask]
+
+
+def counts(cube, by, **filters):
+    """Request counts grouped by the ``by`` dimension(s) after filtering.
+
+    Returns a frame with one column per ``by`` dimension plus ``Count``,
+    sorted by the group keys and without empty groups.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    return select(cube, **filters).groupby(by, observed=True)[COUNT].sum().reset_index()
+
+
+def total(cube, **filters):
+    """Number of requests matching ``filters``."""
+    return int(select(cube, **filters)[COUNT].sum())
+
+
+def mean_completion(completion_cube, by, **filters):
+    """Mean completion days grouped by ``by`` after filtering the completion cube."""
+    cells = select(completion_cube, **filters)
+    sums = cells.groupby(by, observed=True)[[COMPLETED, TOTAL_DAYS]].sum()
+    sums = sums[sums[COMPLETED] > 0]
+    return (sums[TOTAL_DAYS] / sums[COMPLETED]).rename("Avg Completion Time (days)").reset_index()
@@ -0,0 +1,140 @@
+"""Inverted index over the categorical columns of the request table.
+
+For every value of an indexed column the index keeps the sorted row
+positions holding that value (a posting list). A filter is answered by
+concatenating the posting lists of the selected values of each column (OR)
+and intersecting the results across columns (AND). Only integer positions
+are produced; the request table itself is never masked or copied, so the
+cost of a filter change does not depend on how many columns the table has.
+
+All posting lists of a column live in one ``int32`` array ordered by value,
+plus an offsets array, so each posting list is a slice (a view) of it.
+
+Columns can be pandas categoricals or Arrow dictionary columns. For the
+memory-mapped request snapshot the posting lists are precomputed at ingest
+(``posting_positions``) and passed in, so building the index reads the
+mapped pages instead of allocating a copy per process.
+"""
+
+import numpy as np
+
+INDEXED_COLUMNS = ["Category", "Local area", "Category_cr", "Channel", "Department"]
+
+
+def dictionary_codes(column):
+    """Categories and integer codes (-1 for missing) of a categorical column.
+
+    ``column`` is a pandas categorical Series or an Arrow dictionary column;
+    the codes of an Arrow column without nulls are a view of its buffer.
+    """
+    if hasattr(column, "cat"):
+        return list(column.cat.categories), column.cat.codes.to_numpy()
+    if hasattr(column, "num_chunks"):
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    indices = column.indices
+    codes = indices.fill_null(-1).to_numpy() if indices.null_count else indices.to_numpy()
+    return column.dictionary.to_pylist(), codes
+
+
+def code_counts(column):
+    """Categories and the number of rows per code, missing values (code -1) first.
+
+    Arrow columns are counted chunk by chunk, so a column of a memory-mapped
+    table with several record batches is not copied.
+    """
+    if hasattr(column, "cat"):
+        categories, chunks = list(column.cat.categories), [column.cat.codes.to_numpy()]
+    else:
+        arrays = column.chunks if hasattr(column, "num_chunks") else [column]
+        categories = arrays[0].dictionary.to_pylist() if arrays else []
+        chunks = (dictionary_codes(array)[1] for array in arrays)
+    counts = np.zeros(len(categories) + 1, dtype=np.int64)
+    for codes in chunks:
+        counts += np.bincount(codes + 1, minlength=len(counts))
+    return categories, counts
+
+
+def posting_positions(codes):
+    """Row positions ordered by code: every value's posting list, back to back."""
+    # Stable sort keeps positions ascending inside each value's run;
+    # missing values (code -1) sort first and are skipped by the offsets.
+    return np.argsort(codes, kind="stable").astype(np.int32)
+
+
+class ColumnIndex:
+    """Posting lists for one categorical column.
+
+    ``positions`` are the column's ``posting_positions`` when already known.
+    """
+
+    def __init__(self, column, positions=None):
+        self.categories, counts = code_counts(column)
+        self._codes = {value: code for code, value in enumerate(self.categories)}
+        self.positions = posting_positions(dictionary_codes(column)[1]) if positions is None else positions
+        self.offsets = np.cumsum(counts)
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.offsets.nbytes
+
+    def postings(self, value):
+        """Sorted row positions holding ``value`` (empty if it never occurs)."""
+        code = self._codes.get(value)
+        if code is None:
+            return self.positions[:0]
+        return self.positions[self.offsets[code] : self.offsets[code + 1]]
+
+    def any_of(self, values):
+        """Sorted row positions holding any of ``values``."""
+        lists = [self.postings(value) for value in values]
+        if len(lists) == 1:
+            return lists[0]
+        # Posting lists of different values are disjoint, so a sort is a union
+        return np.sort(np.concatenate(lists))
+
+
+class FilterIndex:
+    """Posting lists for every column in ``INDEXED_COLUMNS``.
+
+    ``frame`` is a DataFrame or an Arrow table; ``positions`` optionally maps
+    columns to their precomputed ``posting_positions``.
+    """
+
+    def __init__(self, frame, columns=INDEXED_COLUMNS, positions=None):
+        positions = positions or {}
+        self.num_rows = len(frame)
+        self.columns = {column: ColumnIndex(frame[column], positions.get(column)) for column in columns}
+
+    @property
+    def nbytes(self):
+        """Size of the posting arrays, for the cache's memory cap."""
+        return sum(index.nbytes for index in self.columns.values())
+
+    def positions(self, selections):
+        """Row positions matching every selection, or ``None`` for all rows.
+
+        ``selections`` maps column names to a value or a list of values. An
+        empty list, ``None`` or ``"All"`` leaves that column unfiltered.
+        """
+        result = None
+        for column, values in selections.items():
+            if values is None or values == "All":
+                continue
+            if isinstance(values, str) or not hasattr(values, "__iter__"):
+                values = [values]
+            values = list(values)
+            if not values:
+                continue
+            matches = self.columns[column].any_of(values)
+            if result is None:
+                result = matches
+            else:
+                result = np.intersect1d(result, matches, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+    def count(self, selections):
+        """Number of rows matching ``selections``."""
+        positions = self.positions(selections)
+        return self.num_rows if positions is None else len(positions)
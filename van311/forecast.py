@@ -0,0 +1,253 @@
+"""Seasonal demand forecasts for inquiry volume and contact centre call load.
+
+Run after every data refresh (``van311.ingest`` and ``van311.update`` call
+it; ``python -m van311.forecast`` reruns it on its own). The dashboard only
+reads the stored results, so no model is fitted during a rerun.
+
+Every dataset is a batch of series on a regular calendar (``DATASETS``):
+monthly inquiries per channel (and in total), and daily calls offered. Two
+models are fitted to all series of a batch at once, as numpy operations over
+a (series, time) array:
+
+``Seasonal naive``
+    Repeat the last full season.
+``Holt-Winters``
+    Additive level, damped trend and season, with the smoothing parameters
+    picked per series from a small grid by in-sample one-step error. The
+    grid is part of the batch, so the recursion over time runs once for all
+    series and parameter sets.
+
+Each model is backtested on rolling origins (fit up to a cut-off, forecast
+the next ``horizon`` steps, compare). The model with the lower backtest mean
+absolute error is kept for each series, and its backtest errors at each
+step ahead give the 80% and 95% prediction intervals. The cut-offs (plus the
+final fit on all data) are independent, so they run on a process pool.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from van311 import paths, store
+
+# Dataset -> calendar frequency, season length and forecast horizon (steps)
+DATASETS = {
+    "Inquiry volume": {"frequency": "MS", "season": 12, "horizon": 12},
+    "Calls offered": {"frequency": "D", "season": 7, "horizon": 28},
+}
+
+SEASONAL_NAIVE = "Seasonal naive"
+HOLT_WINTERS = "Holt-Winters"
+
+# Rolling-origin backtest: number of cut-offs, spaced half a horizon apart
+BACKTEST_ORIGINS = 6
+
+# Holt-Winters smoothing grid (level, trend, season) and trend damping
+ALPHAS = [0.1, 0.3, 0.5, 0.8]
+BETAS = [0.01, 0.1]
+GAMMAS = [0.05, 0.2, 0.4]
+DAMPING = 0.98
+
+# Normal quantiles for the prediction intervals
+INTERVALS = {80: 1.2816, 95: 1.9600}
+
+
+def demand_series(store_dir=None):
+    """Series to forecast: dataset -> (series names, dates, values[series, time])."""
+    inquiry_volume = store.load_inquiry_volume(store_dir)
+    monthly = inquiry_volume.pivot_table(
+        index="Year Month", columns="Channel", values="Number of Records", aggfunc="sum", observed=True
+    )
+    monthly = monthly.reindex(pd.date_range(monthly.index.min(), monthly.index.max(), freq="MS"))
+    # A month with no records for a channel had no inquiries through it
+    monthly = monthly.fillna(0)
+    monthly.insert(0, "All channels", monthly.sum(axis=1))
+
+    calls = store.load_contact_centre_metrics(store_dir).groupby("Date")["CallsOffered"].sum()
+    calls = calls.reindex(pd.date_range(calls.index.min(), calls.index.max(), freq="D"))
+    # Days missing from the export are interpolated, not treated as zero calls
+    calls = calls.interpolate(limit_direction="both")
+
+    return {
+        "Inquiry volume": (
+            [str(column) for column in monthly.columns],
+            monthly.index,
+            monthly.to_numpy(dtype="float64").T,
+        ),
+        "Calls offered": (["Calls offered"], calls.index, calls.to_numpy(dtype="float64")[None, :]),
+    }
+
+
+def seasonal_naive(values, season, horizon):
+    """Forecasts ``[series, horizon]`` repeating each series' last season."""
+    last_season = values[:, -season:]
+    return last_season[:, np.arange(horizon) % last_season.shape[1]]
+
+
+def holt_winters(values, season, horizon):
+    """Forecasts ``[series, horizon]`` from damped additive Holt-Winters.
+
+    Every series is fitted with every (alpha, beta, gamma) of the grid in one
+    pass; each series keeps the parameters with the lowest one-step squared
+    error over the fitted range.
+    """
+    grid = np.array([(a, b, g) for a in ALPHAS for b in BETAS for g in GAMMAS])
+    num_series, length = values.shape
+    # Row r of the batch is series r // len(grid) with parameters r % len(grid)
+    y = np.repeat(values, len(grid), axis=0)
+    alpha, beta, gamma = (np.tile(grid[:, i], num_series) for i in range(3))
+
+    # Classical initialisation from the first two seasons
+    first, second = y[:, :season].mean(axis=1), y[:, season : 2 * season].mean(axis=1)
+    level = first
+    trend = (second - first) / season
+    seasonal = y[:, :season] - first[:, None]
+
+    squared_error = np.zeros(len(y))
+    for t in range(length):
+        index = t % season
+        s = seasonal[:, index]
+        error = y[:, t] - (level + DAMPING * trend + s)
+        if t >= season:
+            squared_error += error**2
+        new_level = alpha * (y[:, t] - s) + (1 - alpha) * (level + DAMPING * trend)
+        trend = beta * (new_level - level) + (1 - beta) * DAMPING * trend
+        seasonal[:, index] = gamma * (y[:, t] - new_level) + (1 - gamma) * s
+        level = new_level
+
+    steps = np.arange(1, horizon + 1)
+    damped_steps = np.cumsum(DAMPING**steps)
+    forecasts = (
+        level[:, None]
+        + damped_steps[None, :] * trend[:, None]
+        + seasonal[:, (length - 1 + steps) % season]
+    )
+    best = squared_error.reshape(num_series, len(grid)).argmin(axis=1)
+    return forecasts.reshape(num_series, len(grid), horizon)[np.arange(num_series), best]
+
+
+def fit_models(values, season, horizon):
+    """Forecasts of every model, ``{model: [series, horizon]}``, clipped at zero."""
+    forecasts = {SEASONAL_NAIVE: seasonal_naive(values, season, horizon)}
+    if values.shape[1] >= 2 * season:
+        forecasts[HOLT_WINTERS] = holt_winters(values, season, horizon)
+    return {model: np.clip(forecast, 0, None) for model, forecast in forecasts.items()}
+
+
+def _fit_task(task):
+    dataset, cutoff, values = task
+    config = DATASETS[dataset]
+    return dataset, cutoff, fit_models(values[:, :cutoff], config["season"], config["horizon"])
+
+
+def backtest_cutoffs(length, season, horizon):
+    """Rolling-origin cut-offs that leave two seasons to fit and a full horizon to score."""
+    step = max(1, horizon // 2)
+    cutoffs = [length - horizon - k * step for k in range(BACKTEST_ORIGINS)]
+    return sorted(cutoff for cutoff in cutoffs if cutoff >= 2 * season)
+
+
+def run_forecasts(series, workers=None):
+    """Fit, backtest and select models for every dataset in ``series``.
+
+    Returns ``(forecasts, accuracy)`` frames.
+    """
+    tasks = []
+    for dataset, (_, dates, values) in series.items():
+        config = DATASETS[dataset]
+        cutoffs = backtest_cutoffs(len(dates), config["season"], config["horizon"])
+        tasks += [(dataset, cutoff, values) for cutoff in cutoffs + [len(dates)]]
+
+    if workers == 1:
+        results = list(map(_fit_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_task, tasks))
+    fits = {(dataset, cutoff): forecasts for dataset, cutoff, forecasts in results}
+
+    forecast_frames, accuracy_frames = [], []
+    for dataset, (names, dates, values) in series.items():
+        config = DATASETS[dataset]
+        horizon = config["horizon"]
+        final = fits[(dataset, len(dates))]
+        cutoffs = backtest_cutoffs(len(dates), config["season"], horizon)
+
+        # errors[model]: [origin, series, step]
+        errors = {
+            model: np.stack(
+                [
+                    values[:, cutoff : cutoff + horizon] - fits[(dataset, cutoff)][model]
+                    for cutoff in cutoffs
+                ]
+            )
+            for model in final
+            if cutoffs and all(model in fits[(dataset, cutoff)] for cutoff in cutoffs)
+        }
+        mae = {model: np.abs(error).mean(axis=(0, 2)) for model, error in errors.items()}
+        scale = np.maximum(np.abs(values).mean(axis=1), 1e-9)
+
+        choices = list(mae) or [SEASONAL_NAIVE]
+        table = np.stack([mae[model] for model in choices]) if mae else np.zeros((1, len(names)))
+        selected = table.argmin(axis=0)
+
+        future = pd.date_range(dates[-1], periods=horizon + 1, freq=config["frequency"])[1:]
+        for position, name in enumerate(names):
+            model = choices[selected[position]]
+            forecast = final[model][position]
+            if model in errors:
+                spread = errors[model][:, position, :].std(axis=0)
+            else:
+                # No backtest: fall back to the spread of in-sample seasonal-naive errors
+                season = config["season"]
+                history = values[position]
+                spread = np.full(horizon, np.std(history[season:] - history[:-season]) if len(history) > season else 0.0)
+            frame = pd.DataFrame(
+                {"Dataset": dataset, "Series": name, "Date": future, "Model": model, "Forecast": forecast}
+            )
+            for level, z in INTERVALS.items():
+                frame[f"Lower {level}"] = np.clip(forecast - z * spread, 0, None)
+                frame[f"Upper {level}"] = forecast + z * spread
+            forecast_frames.append(frame)
+
+            for candidate in mae:
+                accuracy_frames.append(
+                    {
+                        "Dataset": dataset,
+                        "Series": name,
+                        "Model": candidate,
+                        "MAE": mae[candidate][position],
+                        "Scaled MAE": mae[candidate][position] / scale[position],
+                        "Selected": candidate == model,
+                        "Backtest origins": len(cutoffs),
+                    }
+                )
+
+    return pd.concat(forecast_frames, ignore_index=True), pd.DataFrame(accuracy_frames)
+
+
+def run(store_dir=None, workers=None):
+    """Refit every forecast from the store and write the results next to it."""
+    started = time.perf_counter()
+    forecasts, accuracy = run_forecasts(demand_series(store_dir), workers)
+    store.write_table(forecasts, paths.FORECASTS_PARQUET, store_dir)
+    store.write_table(accuracy, paths.FORECAST_ACCURACY_PARQUET, store_dir)
+    print(f"forecasts: {forecasts['Series'].nunique()} series in {time.perf_counter() - started:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refit the demand forecasts in the local store.")
+    parser.add_argument("--store", type=Path, help="store folder (default: data/store)")
+    parser.add_argument(
+        "--workers", type=int, help=f"fitting processes (default: {os.cpu_count()}; 1 fits inline)"
+    )
+    args = parser.parse_args(argv)
+    run(args.store, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""Rebuild the local columnar store from the raw 311 exports.
+
+This is the cleaning done by hand in ``main.ipynb`` turned into a script that
+can be rerun whenever the City publishes new data::
+
+    python -m van311.ingest                # raw files from data/ or GitHub
+    python -m van311.ingest --source DIR   # raw files from another folder
+    python -m van311.ingest --history      # also load the 2009-2021 export
+
+(``python -m van311.update`` applies only what changed since the last run.)
+
+It writes one Parquet file per dataset into ``data/store/``, plus the
+``AGGREGATES`` (count cubes, see ``van311.cube``, and completion-time
+sketches, see ``van311.sketch``; daily counts per request type and local
+area, see ``van311.anomaly``), the contact centre's rolling service
+levels (see ``van311.sla``), the neighbourhood centroids and the
+memory-mapped request snapshot the app reads (see ``van311.store``). String
+columns are stored as categoricals so Parquet dictionary-encodes them, and
+the app reads them back with the right dtypes without parsing any CSV text.
+
+Service request exports are streamed: each is read ``--chunk-size`` rows at
+a time, every chunk is cleaned and enriched on its own and appended to the
+Parquet file as a row group, and the aggregates are folded chunk by chunk.
+Peak memory therefore depends on the chunk size, not on the export size.
+
+Remote raw files are fetched into a local mirror first, all at once (see
+``van311.mirror``), and the inquiry volume and contact centre tables are
+parsed on worker threads while the service requests stream.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from van311 import anomaly, cube, forecast, geo, mirror, paths, sketch, sla, store, times
+from van311.categories import DEFAULT_CATEGORY, category_lookup
+
+# Columns kept from the raw service request export (notebook projection)
+SERVICE_REQUEST_COLUMNS = [
+    "Department",
+    "Service request type",
+    "Status",
+    "Closure reason",
+    "Service request open timestamp",
+    "Service request close date",
+    "Local area",
+    "Channel",
+]
+
+# Raw lookup and demand tables read alongside the service request exports
+RAW_TABLES = [paths.GEOCODES_CSV, paths.CLOSURE_REASONS_CSV, paths.INQUIRY_VOLUME_CSV, paths.CONTACT_CENTRE_CSV]
+
+# Kept when the export has them: the request key used for upserts, and the
+# modification time used to find changed requests
+KEY_COLUMN = "BI_ID"
+LAST_MODIFIED_COLUMN = "Last modified timestamp"
+
+# Request coordinates, when the export has them (often blank); renamed so
+# they don't clash with the neighbourhood centroid columns
+COORDINATE_COLUMNS = {"Latitude": geo.LATITUDE, "Longitude": geo.LONGITUDE}
+
+# Low-cardinality string columns stored dictionary-encoded
+SERVICE_REQUEST_CATEGORICALS = [
+    "Department",
+    "Service request type",
+    "Status",
+    "Closure reason",
+    "Local area",
+    "Channel",
+    "Category",
+    "Category_cr",
+]
+INQUIRY_VOLUME_CATEGORICALS = ["Department", "Type", "Channel"]
+
+# Rows per chunk when streaming service request exports
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Sum tables maintained alongside the request table: file -> (build, dimensions)
+AGGREGATES = {
+    paths.REQUEST_CUBE_PARQUET: (cube.build, cube.DIMENSIONS),
+    paths.COMPLETION_CUBE_PARQUET: (cube.build_completion, cube.COMPLETION_DIMENSIONS),
+    paths.COMPLETION_SKETCH_PARQUET: (sketch.build, sketch.DIMENSIONS),
+    paths.DENSITY_GRID_PARQUET: (geo.build, geo.DIMENSIONS),
+    paths.DAILY_COUNTS_PARQUET: (anomaly.build, anomaly.DIMENSIONS),
+}
+
+
+def service_request_files(history=False):
+    """Raw service request exports to read, oldest first."""
+    if history:
+        return [paths.SERVICE_REQUESTS_HISTORY_CSV, paths.SERVICE_REQUESTS_CSV]
+    return [paths.SERVICE_REQUESTS_CSV]
+
+
+def read_service_request_chunks(location, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a raw semicolon-delimited service request export, ``chunk_size`` rows at a time.
+
+    Progress is reported in rows: the parser reads ahead of the rows it has
+    returned, so the file position says little about how far it got.
+    """
+    wanted = set(SERVICE_REQUEST_COLUMNS) | {KEY_COLUMN, LAST_MODIFIED_COLUMN} | set(COORDINATE_COLUMNS)
+    options = dict(
+        delimiter=";",
+        usecols=lambda column: column in wanted,
+        # Text columns are dictionary-encoded by the parser, once per chunk
+        dtype={column: "category" for column in SERVICE_REQUEST_CATEGORICALS},
+        chunksize=chunk_size,
+    )
+    with pd.read_csv(location, **options) as reader:
+        yield from reader
+
+
+def read_geocodes(source=None):
+    """Read the neighbourhood centroid table (``Local area``, lat, lon)."""
+    return pd.read_csv(mirror.locate(paths.GEOCODES_CSV, source))
+
+
+def read_closure_reasons(source=None):
+    """Read the closure reason to closure category (``Category_cr``) table."""
+    closure_reason = pd.read_csv(mirror.locate(paths.CLOSURE_REASONS_CSV, source))
+    return closure_reason[["Closure Reason", "Category_cr"]]
+
+
+def read_inquiry_volume(source=None):
+    return pd.read_csv(mirror.locate(paths.INQUIRY_VOLUME_CSV, source), delimiter=";")
+
+
+def read_contact_centre_metrics(source=None):
+    return pd.read_csv(
+        mirror.locate(paths.CONTACT_CENTRE_CSV, source), delimiter=";", encoding="utf-8-sig"
+    )
+
+
+def lookup_rows(column, keys):
+    """Row of ``keys`` holding each value of categorical ``column`` (-1 if none or missing).
+
+    ``keys`` are matched once per category, not once per row; rows get their
+    result by a gather through the column's integer codes. Duplicate keys
+    resolve to their first row.
+    """
+    keys = pd.Index(keys)
+    first = ~keys.duplicated()
+    rows = keys[first].get_indexer(column.cat.categories)
+    rows = np.where(rows >= 0, np.flatnonzero(first)[rows], -1)
+    # Code -1 (missing) gathers the -1 appended at the end
+    return np.append(rows, -1)[column.cat.codes.to_numpy()]
+
+
+def gather_categorical(rows, values):
+    """Categorical of ``values[rows]``, missing where ``rows`` is -1."""
+    codes, categories = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    return pd.Categorical.from_codes(np.append(codes, -1)[rows], categories=categories)
+
+
+def clean_service_requests(service_requests, geocodes, closure_reason):
+    """Apply the notebook's enrichment steps to a raw service request frame.
+
+    The notebook's dict mapping and string merges are done as lookups on the
+    dictionary codes of ``Service request type``, ``Local area`` and
+    ``Closure reason``: each distinct value is looked up once, and rows get
+    their result by an integer gather.
+    """
+    optional = [KEY_COLUMN] + list(COORDINATE_COLUMNS)
+    columns = SERVICE_REQUEST_COLUMNS + [column for column in optional if column in service_requests.columns]
+    service_requests = service_requests[columns].rename(columns=COORDINATE_COLUMNS)
+    for column in COORDINATE_COLUMNS.values():
+        if column in service_requests.columns:
+            service_requests[column] = pd.to_numeric(service_requests[column], errors="coerce").astype("float32")
+    for column in ["Service request type", "Local area", "Closure reason"]:
+        service_requests[column] = service_requests[column].astype("category")
+
+    # Categorize request types
+    request_types = service_requests["Service request type"].cat.categories
+    service_requests["Category"] = gather_categorical(
+        service_requests["Service request type"].cat.codes.to_numpy(),
+        request_types.map(category_lookup()).fillna(DEFAULT_CATEGORY),
+    )
+
+    # Parse timestamps once and derive time-based columns
+    service_requests["Service request open timestamp"] = times.parse_open_timestamps(
+        service_requests["Service request open timestamp"]
+    )
+    service_requests["Service request close date"] = times.parse_dates(
+        service_requests["Service request close date"], times.CLOSE_DATE_FORMAT
+    )
+    service_requests = times.add_open_time_parts(service_requests)
+
+    # Drop incomplete rows (request coordinates are optional)
+    service_requests = service_requests.dropna(
+        subset=[column for column in service_requests.columns if column not in COORDINATE_COLUMNS.values()]
+    )
+
+    # Attach neighbourhood centroids
+    rows = lookup_rows(service_requests["Local area"], geocodes["Local area"])
+    for column in geocodes.columns.drop("Local area"):
+        # Row -1 gathers the NaN appended at the end
+        service_requests[column] = np.append(geocodes[column].to_numpy(dtype="float64"), np.nan)[rows]
+
+    # Attach closure categories
+    rows = lookup_rows(service_requests["Closure reason"], closure_reason["Closure Reason"])
+    service_requests["Category_cr"] = gather_categorical(rows, closure_reason["Category_cr"])
+
+    # Open date and completion time, computed after dropna so a negative
+    # duration (stored as NaN) doesn't drop the row
+    service_requests = times.add_request_durations(service_requests)
+
+    # Compact dtypes; categories of rows dropped above are dropped too
+    for column in SERVICE_REQUEST_CATEGORICALS:
+        service_requests[column] = service_requests[column].astype("category").cat.remove_unused_categories()
+    return times.compact_time_parts(service_requests)
+
+
+def clean_inquiry_volume(inquiry_volume):
+    """Type the monthly inquiry volume table."""
+    inquiry_volume = inquiry_volume.copy()
+    inquiry_volume["Year Month"] = times.parse_dates(inquiry_volume["Year Month"], times.YEAR_MONTH_FORMAT)
+    for column in INQUIRY_VOLUME_CATEGORICALS:
+        inquiry_volume[column] = inquiry_volume[column].astype("category")
+    inquiry_volume["Number of Records"] = inquiry_volume["Number of Records"].astype("int32")
+    return inquiry_volume
+
+
+def clean_contact_centre_metrics(contact_center_metrics):
+    """Type the daily contact centre metrics table and add its ``Year-Month`` key."""
+    contact_center_metrics = contact_center_metrics.copy()
+    contact_center_metrics["Date"] = times.parse_dates(
+        contact_center_metrics["Date"], times.CONTACT_DATE_FORMAT
+    )
+    contact_center_metrics["Year-Month"] = contact_center_metrics["Date"].dt.strftime("%Y-%m")
+    for column in ["CallsOffered", "CallsHandled", "CallsAbandoned"]:
+        contact_center_metrics[column] = contact_center_metrics[column].astype("int32")
+    return contact_center_metrics
+
+
+def _store_path(name, store_dir=None):
+    store_dir = paths.STORE_DIR if store_dir is None else store_dir
+    store_dir.mkdir(parents=True, exist_ok=True)
+    return store_dir / name
+
+
+def track_high_water_marks(marks, chunk):
+    """Fold a raw export chunk into the high-water marks used by ``van311.update``.
+
+    Marks cover every raw row, including the ones ``dropna`` removes, so a
+    request that was still open at ingest is picked up once it changes.
+    """
+    if KEY_COLUMN in chunk.columns and len(chunk):
+        marks["max_bi_id"] = max(marks.get("max_bi_id") or 0, int(chunk[KEY_COLUMN].max()))
+    if LAST_MODIFIED_COLUMN in chunk.columns:
+        modified = times.parse_utc_timestamps(chunk[LAST_MODIFIED_COLUMN]).max()
+        if not pd.isna(modified):
+            previous = marks.get("max_last_modified")
+            if previous is None or modified > pd.Timestamp(previous):
+                marks["max_last_modified"] = modified.isoformat()
+    return marks
+
+
+def _max_open_timestamp(marks, service_requests):
+    if len(service_requests):
+        opened = service_requests["Service request open timestamp"].max()
+        previous = marks.get("max_open_timestamp")
+        if previous is None or opened > pd.Timestamp(previous):
+            marks["max_open_timestamp"] = opened.isoformat()
+    return marks
+
+
+def stream_service_requests(locations, geocodes, closure_reason, store_dir=None,
+                            chunk_size=DEFAULT_CHUNK_SIZE):
+    """Clean the given raw exports chunk by chunk into the store.
+
+    Returns ``(rows_written, aggregates, marks)``, with ``aggregates`` keyed
+    like ``AGGREGATES``.
+    """
+    path = _store_path(paths.SERVICE_REQUESTS_PARQUET, store_dir)
+    partial = path.with_name(path.name + ".partial")
+    writer = schema = None
+    aggregates = {}
+    marks = {}
+    rows_read = rows_written = 0
+    started = time.perf_counter()
+    try:
+        for location in locations:
+            print(f"reading {location}")
+            for chunk in read_service_request_chunks(location, chunk_size):
+                cleaned = clean_service_requests(chunk, geocodes, closure_reason)
+                # Each row group is then a sorted run for the snapshot merge (see store)
+                cleaned = cleaned.sort_values(store.OPEN_TIMESTAMP, kind="stable", ignore_index=True)
+                if writer is None:
+                    schema = store.arrow_schema(cleaned)
+                    writer = pq.ParquetWriter(partial, schema)
+                writer.write_table(pa.Table.from_pandas(cleaned, schema=schema, preserve_index=False))
+
+                for name, (build, dimensions) in AGGREGATES.items():
+                    partial_aggregate = build(cleaned)
+                    if name in aggregates:
+                        partial_aggregate = cube.merge([aggregates[name], partial_aggregate], dimensions)
+                    aggregates[name] = partial_aggregate
+                track_high_water_marks(marks, chunk)
+                _max_open_timestamp(marks, cleaned)
+
+                rows_read += len(chunk)
+                rows_written += len(cleaned)
+                print(
+                    f"  {rows_read:,} rows read, {rows_written:,} kept, "
+                    f"{rows_read / (time.perf_counter() - started):,.0f} rows/s"
+                )
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("no service request rows found in " + ", ".join(locations))
+    os.replace(partial, path)
+    return rows_written, aggregates, marks
+
+
+def run(source=None, store_dir=None, history=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Rebuild every dataset in the store from the raw sources."""
+    started = time.perf_counter()
+
+    request_files = service_request_files(history)
+    located = mirror.locate_all(request_files + RAW_TABLES, source)
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="van311-ingest") as pool:
+        # The small tables are parsed while the service requests stream
+        inquiry_volume = pool.submit(lambda: clean_inquiry_volume(read_inquiry_volume(source)))
+        contact_center_metrics = pool.submit(
+            lambda: clean_contact_centre_metrics(read_contact_centre_metrics(source))
+        )
+        geocodes = read_geocodes(source)
+        rows_written, aggregates, marks = stream_service_requests(
+            [located[name] for name in request_files], geocodes, read_closure_reasons(source),
+            store_dir, chunk_size,
+        )
+        inquiry_volume = inquiry_volume.result()
+        contact_center_metrics = contact_center_metrics.result()
+    store.write_table(geocodes, paths.GEOCODES_PARQUET, store_dir)
+    print(f"service requests: {rows_written:,} rows")
+
+    for name, aggregate in aggregates.items():
+        store.write_table(aggregate, name, store_dir)
+        print(f"{name}: {len(aggregate):,} cells")
+
+    store.write_table(inquiry_volume, paths.INQUIRY_VOLUME_PARQUET, store_dir)
+    print(f"inquiry volume: {len(inquiry_volume):,} rows")
+
+    store.write_table(contact_center_metrics, paths.CONTACT_CENTRE_PARQUET, store_dir)
+    print(f"contact centre metrics: {len(contact_center_metrics):,} rows")
+    store.write_table(sla.build(contact_center_metrics), paths.CONTACT_CENTRE_SLA_PARQUET, store_dir)
+
+    snapshot_rows = store.write_service_request_snapshot(store_dir, updates=[])
+    print(f"{paths.SERVICE_REQUESTS_SNAPSHOT}: {snapshot_rows:,} rows")
+
+    # A full rebuild folds every earlier update part into the base table
+    manifest = store.read_manifest(store_dir)
+    for name in manifest.get("service_request_updates", []):
+        _store_path(paths.SERVICE_REQUEST_UPDATES_DIR, store_dir).joinpath(name).unlink(missing_ok=True)
+    store.write_manifest(
+        {
+            "built_at": pd.Timestamp.now(tz="UTC").isoformat(),
+            "service_requests": marks,
+            "service_request_updates": [],
+            "inquiry_volume": {"max_bi_id": int(inquiry_volume["BI_ID"].max())},
+            "contact_centre_metrics": {"max_date": contact_center_metrics["Date"].max().isoformat()},
+        },
+        store_dir,
+    )
+
+    forecast.run(store_dir)
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the local Van 311 data store.")
+    parser.add_argument(
+        "--source",
+        help="folder or URL prefix holding the raw CSV files (default: data/, then GitHub)",
+    )
+    parser.add_argument("--store", type=Path, help="output folder (default: data/store)")
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help=f"also load {paths.SERVICE_REQUESTS_HISTORY_CSV}",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"rows per chunk when streaming service requests (default: {DEFAULT_CHUNK_SIZE:,})",
+    )
+    args = parser.parse_args(argv)
+    run(source=args.source, store_dir=args.store, history=args.history, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
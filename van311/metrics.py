@@ -0,0 +1,220 @@
+"""Wall time, memory and row counts of the dashboard's loads, transforms and charts.
+
+Every cached loader (``load``), aggregation (``transform``) and figure
+builder or chart render (``chart``) runs inside a ``span``; the cache
+decorators and ``van311.ui`` open them, so pages need no timing code. A span
+records its wall time, the rows of its result, whether it was answered from
+the cache, and, when ``VAN311_TRACE_MEMORY=1``, the peak memory allocated
+inside it (``tracemalloc`` slows allocation down, so it is off by default;
+the peak is process-wide and so only approximate while several sessions
+rerun at once).
+
+Spans opened during a page rerun are collected into that rerun
+(``start_run`` / ``finish_run``, one per Streamlit session thread). Each
+finished rerun is appended as one JSON line to ``metrics.jsonl`` and the
+Prometheus text file ``van311.prom`` is rewritten with rerun latency
+quantiles per page (over the last ``RECENT_RERUNS`` reruns) and per-span
+totals, ready for a node_exporter textfile collector. Both live in
+``VAN311_METRICS_DIR`` (default ``data/metrics/``); ``VAN311_METRICS=0``
+turns the export off. Once the log reaches ``VAN311_METRICS_LOG_MB``
+megabytes it is moved to ``metrics.jsonl.1`` (replacing the previous one)
+and a new log is started, so the two never hold more than twice that.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from van311 import paths
+
+EXPORT = os.environ.get("VAN311_METRICS", "1") != "0"
+TRACE_MEMORY = os.environ.get("VAN311_TRACE_MEMORY", "0") == "1"
+METRICS_DIR = Path(os.environ.get("VAN311_METRICS_DIR", paths.DATA_DIR / "metrics"))
+
+JSONL_FILE = "metrics.jsonl"
+# Size at which the JSON-lines log is rotated (bytes)
+JSONL_MAX_BYTES = int(float(os.environ.get("VAN311_METRICS_LOG_MB", "64")) * 1024 * 1024)
+PROMETHEUS_FILE = "van311.prom"
+
+# Reruns per page kept for the latency quantiles
+RECENT_RERUNS = 1000
+QUANTILES = [0.5, 0.95, 0.99]
+
+LOAD, TRANSFORM, CHART = "load", "transform", "chart"
+
+_local = threading.local()
+_lock = threading.Lock()
+_recent = defaultdict(lambda: deque(maxlen=RECENT_RERUNS))  # page -> rerun seconds
+_reruns = defaultdict(lambda: [0, 0.0])  # page -> [count, total seconds]
+_spans = defaultdict(lambda: [0, 0.0])  # (kind, name, cached) -> [count, total seconds]
+
+
+class Run:
+    """Spans recorded during one rerun of a page by one session."""
+
+    def __init__(self, session, page):
+        self.session = session
+        self.page = page
+        self.started = time.time()
+        self._clock = time.perf_counter()
+        self.spans = []
+        self.ms = None
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def start_run(session, page):
+    """Begin collecting spans for a rerun in this thread."""
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.run = Run(session, page)
+    return _local.run
+
+
+def count_rows(value):
+    """Rows in a loaded or computed result, ``None`` when it has no row count."""
+    if hasattr(value, "num_rows"):
+        return int(value.num_rows)
+    if hasattr(value, "shape"):
+        return int(value.shape[0]) if value.shape else 1
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return None
+
+
+@contextmanager
+def span(kind, name):
+    """Time the enclosed work; yields the span's record to add ``rows``/``cached`` to."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    record = {"kind": kind, "name": name, "depth": len(stack), "cached": False, "rows": None,
+              "ms": None, "peak_mb": None}
+    # Only when tracing is ours: resetting the peak would upset other tracemalloc users
+    tracing = TRACE_MEMORY and tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack and "_peak" in stack[-1]:
+            # Keep the enclosing span's high-water mark before resetting it
+            stack[-1]["_peak"] = max(stack[-1]["_peak"], peak)
+        tracemalloc.reset_peak()
+        record["_start"], record["_peak"] = current, current
+    stack.append(record)
+    run = current_run()
+    if run is not None:
+        # Listed in start order; filled in when the span ends
+        run.spans.append(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+        record["ms"] = elapsed * 1000
+        if tracing and tracemalloc.is_tracing():
+            peak = max(record["_peak"], tracemalloc.get_traced_memory()[1])
+            record["peak_mb"] = (peak - record["_start"]) / (1024 * 1024)
+            if stack and "_peak" in stack[-1]:
+                stack[-1]["_peak"] = max(stack[-1]["_peak"], peak)
+        record.pop("_start", None)
+        record.pop("_peak", None)
+        with _lock:
+            totals = _spans[(kind, name, record["cached"])]
+            totals[0] += 1
+            totals[1] += elapsed
+
+
+def finish_run():
+    """Close this thread's rerun, export it, and return it (``None`` if none was started)."""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    run.ms = (time.perf_counter() - run._clock) * 1000
+    with _lock:
+        _recent[run.page].append(run.ms / 1000)
+        totals = _reruns[run.page]
+        totals[0] += 1
+        totals[1] += run.ms / 1000
+    if EXPORT:
+        try:
+            export(run)
+        except OSError:
+            # Metrics must never take the dashboard down
+            pass
+    return run
+
+
+def quantile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def rerun_latency(page):
+    """``{quantile: seconds}`` over the recent reruns of ``page``."""
+    with _lock:
+        recent = list(_recent[page])
+    return {q: quantile(recent, q) for q in QUANTILES}
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text():
+    """Rerun latency and span totals in the Prometheus text exposition format."""
+    with _lock:
+        recent = {page: list(values) for page, values in _recent.items()}
+        reruns = {page: list(totals) for page, totals in _reruns.items()}
+        spans = {key: list(totals) for key, totals in _spans.items()}
+    lines = [
+        f"# HELP van311_rerun_seconds Page rerun wall time (quantiles over the last {RECENT_RERUNS} reruns).",
+        "# TYPE van311_rerun_seconds summary",
+    ]
+    for page, values in sorted(recent.items()):
+        for q in QUANTILES:
+            lines.append(f'van311_rerun_seconds{{page="{_label(page)}",quantile="{q}"}} {quantile(values, q):.6f}')
+        count, total = reruns[page]
+        lines.append(f'van311_rerun_seconds_sum{{page="{_label(page)}"}} {total:.6f}')
+        lines.append(f'van311_rerun_seconds_count{{page="{_label(page)}"}} {count}')
+    lines += [
+        "# HELP van311_span_seconds Wall time of loads, transforms and charts.",
+        "# TYPE van311_span_seconds summary",
+    ]
+    for (kind, name, cached), (count, total) in sorted(spans.items()):
+        labels = f'kind="{kind}",name="{_label(name)}",cached="{str(cached).lower()}"'
+        lines.append(f"van311_span_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"van311_span_seconds_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def export(run, metrics_dir=None):
+    """Append ``run`` to the JSON-lines log and rewrite the Prometheus file."""
+    metrics_dir = METRICS_DIR if metrics_dir is None else Path(metrics_dir)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    line = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(run.started)),
+        "session": run.session,
+        "page": run.page,
+        "rerun_ms": run.ms,
+        "spans": run.spans,
+    }
+    log = metrics_dir / JSONL_FILE
+    with _lock:
+        if log.exists() and log.stat().st_size >= JSONL_MAX_BYTES:
+            os.replace(log, log.with_name(f"{log.name}.1"))
+        with open(log, "a") as handle:
+            handle.write(json.dumps(line) + "\n")
+    path = metrics_dir / PROMETHEUS_FILE
+    partial = path.with_name(f"{path.name}.{threading.get_ident()}.partial")
+    partial.write_text(prometheus_text())
+    os.replace(partial, path)
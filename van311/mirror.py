@@ -0,0 +1,138 @@
+"""Local on-disk copies of the remote raw exports.
+
+When a raw file is not in ``data/`` it comes from GitHub (see
+``paths.source_path``). Instead of streaming it into pandas on every ingest,
+``locate`` keeps a copy in ``MIRROR_DIR`` together with the ``ETag`` and
+``Last-Modified`` headers it was served with, and revalidates the copy with a
+conditional request: an unchanged file costs one ``304 Not Modified`` round
+trip, and when the server cannot be reached the last copy is used, so an
+ingest or update also works offline. A copy checked in the last
+``FRESH_SECONDS`` is used without asking again. Local sources are read in
+place.
+
+``locate_all`` downloads several files at once on a thread pool, so fetching
+the exports takes as long as the largest one rather than all of them in turn.
+"""
+
+import email.utils
+import http.client
+import json
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from van311 import paths
+
+MIRROR_DIR = Path(os.environ.get("VAN311_MIRROR_DIR", paths.DATA_DIR / "mirror"))
+
+# Validators (ETag, Last-Modified) of each mirrored file
+VALIDATORS_JSON = "validators.json"
+
+# Seconds to wait for a server before falling back to the mirror
+TIMEOUT = 30
+
+# A copy checked this recently is not revalidated (seconds)
+FRESH_SECONDS = 300
+
+# Parallel downloads in ``locate_all``
+MAX_WORKERS = 4
+
+_lock = threading.Lock()
+_checked = {}  # url -> (monotonic time of the last check, local path)
+
+
+def _read_validators(mirror_dir):
+    try:
+        return json.loads((mirror_dir / VALIDATORS_JSON).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_validator(mirror_dir, name, validator):
+    # Several downloads finish concurrently; merge under the lock
+    with _lock:
+        validators = _read_validators(mirror_dir)
+        validators[name] = validator
+        partial = mirror_dir / f"{VALIDATORS_JSON}.{threading.get_ident()}.partial"
+        partial.write_text(json.dumps(validators, indent=2))
+        os.replace(partial, mirror_dir / VALIDATORS_JSON)
+
+
+def _report(message):
+    # One write per line, so lines from concurrent downloads do not interleave
+    print(message + "\n", end="", flush=True)
+
+
+def _conditional_request(url, copy, validator):
+    request = urllib.request.Request(url)
+    if copy.exists():
+        if validator.get("etag"):
+            request.add_header("If-None-Match", validator["etag"])
+        if validator.get("last_modified"):
+            request.add_header("If-Modified-Since", validator["last_modified"])
+        elif not validator.get("etag"):
+            # Copied in by hand: compare with its modification time
+            request.add_header("If-Modified-Since", email.utils.formatdate(copy.stat().st_mtime, usegmt=True))
+    return request
+
+
+def mirror(url, mirror_dir=None):
+    """Local copy of ``url``, downloaded only when the server has a newer one."""
+    mirror_dir = MIRROR_DIR if mirror_dir is None else Path(mirror_dir)
+    mirror_dir.mkdir(parents=True, exist_ok=True)
+    name = url.rsplit("/", 1)[-1]
+    copy = mirror_dir / name
+    checked = _checked.get(url)
+    if checked is not None and checked[1] == str(copy) and copy.exists():
+        if time.monotonic() - checked[0] < FRESH_SECONDS:
+            return str(copy)
+    validator = _read_validators(mirror_dir).get(name, {})
+
+    try:
+        with urllib.request.urlopen(_conditional_request(url, copy, validator), timeout=TIMEOUT) as response:
+            partial = copy.with_name(f"{name}.{threading.get_ident()}.partial")
+            try:
+                with open(partial, "wb") as handle:
+                    shutil.copyfileobj(response, handle, 1 << 20)
+                    size = handle.tell()
+                # A dropped connection just ends the body early
+                expected = response.headers.get("Content-Length")
+                if expected is not None and size != int(expected):
+                    raise http.client.IncompleteRead(b"", int(expected) - size)
+                os.replace(partial, copy)
+            finally:
+                # Only left behind when the download failed part way
+                partial.unlink(missing_ok=True)
+            headers = response.headers
+        _write_validator(
+            mirror_dir, name, {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+        )
+        _report(f"{name}: downloaded")
+    except (urllib.error.URLError, http.client.HTTPException, OSError) as error:
+        if getattr(error, "code", None) == 304:
+            _report(f"{name}: unchanged")
+        elif copy.exists():
+            # Offline, or the server is failing: keep working from the last copy
+            _report(f"{name}: {getattr(error, 'reason', error)}; using the mirrored copy")
+        else:
+            raise
+    _checked[url] = (time.monotonic(), str(copy))
+    return str(copy)
+
+
+def locate(name, source=None, mirror_dir=None):
+    """Local path of raw file ``name``, mirroring it first when it is remote."""
+    location = paths.source_path(name, source)
+    return mirror(location, mirror_dir) if "://" in location else location
+
+
+def locate_all(names, source=None, mirror_dir=None):
+    """``{name: local path}`` for several raw files, downloaded concurrently."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="van311-mirror") as pool:
+        futures = {name: pool.submit(locate, name, source, mirror_dir) for name in names}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,62 @@
+"""Locations of the raw sources and of the local columnar store."""
+
+from pathlib import Path
+
+# Repository root and the raw data folder listed in the README
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / "data"
+
+# Where the ingest pipeline writes its Parquet output
+STORE_DIR = DATA_DIR / "store"
+
+# Raw files are pulled from the GitHub copy of data/ when they are not on disk
+REMOTE_DATA_URL = "https://raw.githubusercontent.com/0x1AY/Van-311/refs/heads/main/data"
+
+# Raw source file names
+SERVICE_REQUESTS_CSV = "3-1-1-service-requests.csv"
+SERVICE_REQUESTS_HISTORY_CSV = "3-1-1-service-requests-2009-2021.csv"
+INQUIRY_VOLUME_CSV = "3-1-1-inquiry-volume.csv"
+CONTACT_CENTRE_CSV = "3-1-1-contact-centre-metrics.csv"
+CLOSURE_REASONS_CSV = "Closure_Reason_Categorization.csv"
+GEOCODES_CSV = "Vancouver_Neighborhood_Geocodes.csv"
+
+# Store file names
+SERVICE_REQUESTS_PARQUET = "service_requests.parquet"
+INQUIRY_VOLUME_PARQUET = "inquiry_volume.parquet"
+CONTACT_CENTRE_PARQUET = "contact_centre_metrics.parquet"
+GEOCODES_PARQUET = "geocodes.parquet"
+REQUEST_CUBE_PARQUET = "request_cube.parquet"
+COMPLETION_CUBE_PARQUET = "completion_cube.parquet"
+COMPLETION_SKETCH_PARQUET = "completion_sketch.parquet"
+DENSITY_GRID_PARQUET = "density_grid.parquet"
+DAILY_COUNTS_PARQUET = "daily_counts.parquet"
+CONTACT_CENTRE_SLA_PARQUET = "contact_centre_sla.parquet"
+FORECASTS_PARQUET = "forecasts.parquet"
+FORECAST_ACCURACY_PARQUET = "forecast_accuracy.parquet"
+MANIFEST_JSON = "manifest.json"
+
+# Current service requests (base table plus updates) as an uncompressed
+# Arrow IPC file that the app memory-maps, and its filter posting lists
+SERVICE_REQUESTS_SNAPSHOT = "service_requests.arrow"
+SERVICE_REQUEST_INDEX = "service_requests_index.arrow"
+
+# BI_IDs of the snapshot in ascending order with their snapshot rows, so an
+# update finds the stored versions of the requests it changes
+SERVICE_REQUEST_KEYS = "service_request_keys.arrow"
+
+# Parts appended to the service request table by incremental updates
+SERVICE_REQUEST_UPDATES_DIR = "service_request_updates"
+
+
+def source_path(name, source=None):
+    """Resolve a raw file name against a directory or URL prefix.
+
+    With no explicit ``source`` the local ``data/`` folder is used when the
+    file exists there, otherwise the GitHub copy.
+    """
+    if source is None:
+        local = DATA_DIR / name
+        return str(local) if local.exists() else f"{REMOTE_DATA_URL}/{name}"
+    if "://" in str(source):
+        return f"{str(source).rstrip('/')}/{name}"
+    return str(Path(source) / name)
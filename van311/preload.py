@@ -0,0 +1,62 @@
+"""Read every dataset concurrently as soon as the app starts.
+
+A page only calls the loaders it needs, one after another in script order,
+so the datasets used further down (or on other pages) are read only once
+the charts above them have rendered. ``start``, called by ``ui.sidebar`` on
+every rerun, submits all of ``LOADERS`` to a thread pool the first time a
+page runs in the process, and again after the store changes. They load in
+the background while the page renders; a page that asks for a dataset still
+being loaded waits for that load (``van311.cache`` computes each value once)
+instead of reading it a second time. A cold start therefore costs about the
+slowest single load rather than the sum. ``VAN311_PRELOAD=0`` turns it off.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from van311 import aggregations as agg
+from van311 import cache
+
+ENABLED = os.environ.get("VAN311_PRELOAD", "1") != "0"
+
+# Shared loaders, roughly in the order the pages need them
+LOADERS = [
+    agg.request_cube,
+    agg.service_requests,
+    agg.request_index,
+    agg.time_index,
+    agg.completion_cube,
+    agg.completion_sketch,
+    agg.density_grid,
+    agg.geocodes,
+    agg.inquiry_volume,
+    agg.contact_centre_metrics,
+    agg.contact_centre_sla,
+    agg.forecasts,
+]
+
+# Loads run side by side; reading Parquet and Arrow releases the GIL
+MAX_WORKERS = 4
+
+SOURCES = sorted({source for loader in LOADERS for source in loader.cache_sources})
+
+_lock = threading.Lock()
+_pool = None
+_version = None  # store version of the last preload
+
+
+def start():
+    """Load every dataset in the background, once per store version; returns the futures."""
+    global _pool, _version
+    if not ENABLED:
+        return []
+    version = cache.source_version(SOURCES)
+    with _lock:
+        if version == _version:
+            return []
+        _version = version
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="van311-preload")
+        # Failures (e.g. a missing store file) surface again when a page calls the loader
+        return [_pool.submit(loader) for loader in LOADERS]
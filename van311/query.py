@@ -0,0 +1,250 @@
+"""Named, headless access to the aggregates behind the dashboard.
+
+Every number the dashboard shows comes from a function in
+``van311.aggregations`` that depends only on its arguments and the store.
+``QUERIES`` names them, so scripts, notebooks and ``python -m van311`` can
+ask for the same aggregates without Streamlit or any plotting library::
+
+    from van311 import query
+    query.run("top-request-types", n=10)
+    query.run("completion-time-by", column="Local area", selections={"Channel": ["WEB"]})
+
+Arguments are checked against ``CHECKS`` before the aggregation runs:
+numbers, dates and column or window choices are converted from what
+``parse_arguments`` gives, and anything else raises ``QueryError`` naming
+the argument. Results come back as the aggregation returns them;
+``as_frame`` turns any of them into a DataFrame for export.
+"""
+
+import inspect
+import json
+from http import HTTPStatus
+
+import pandas as pd
+
+from van311 import aggregations as agg
+from van311 import cube, forecast, geo, sla, timeindex
+
+# Query name -> aggregation
+QUERIES = {
+    "request-summary": agg.request_summary,
+    "request-types": agg.request_types,
+    "top-request-types": agg.top_request_types,
+    "time-trends": agg.time_trends,
+    "date-bounds": agg.date_bounds,
+    "request-volume-over-time": agg.request_volume_over_time,
+    "neighborhood-summary": agg.neighborhood_summary,
+    "request-density": agg.request_density,
+    "request-volume-by": agg.request_volume_by,
+    "closure-summary": agg.closure_summary,
+    "closure-trends": agg.closure_trends,
+    "completion-options": agg.completion_options,
+    "completion-time-by": agg.completion_time_by,
+    "completion-percentiles-by": agg.completion_percentiles_by,
+    "anomaly-dates": agg.anomaly_dates,
+    "request-spikes": agg.request_spikes,
+    "request-series-scores": agg.request_series_scores,
+    "volume-trends": agg.volume_trends,
+    "channel-trends": agg.channel_trends,
+    "total-inquiries": agg.total_inquiries,
+    "monthly-metrics": agg.monthly_metrics,
+    "daily-metrics": agg.daily_metrics,
+    "correlation-metrics": agg.correlation_metrics,
+    "rolling-service-levels": agg.rolling_service_levels,
+    "sla-breach-streaks": agg.sla_breach_streaks,
+    "current-breach-streak": agg.current_breach_streak,
+    "rolling-correlations": agg.rolling_correlations,
+    "forecast-series": agg.forecast_series,
+    "demand-forecast": agg.demand_forecast,
+    "forecast-accuracy": agg.forecast_accuracy,
+    "staffing-requirements": agg.staffing_requirements,
+}
+
+
+
+
+class QueryError(ValueError):
+    """A query that cannot be run as asked, with the HTTP status to report."""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+# Argument checks: each converts a parsed value or raises ValueError saying what it expects
+
+
+def _integer(minimum=1, maximum=None):
+    def check(value):
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            value = int(value)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError("expected a whole number")
+        if value < minimum or (maximum is not None and value > maximum):
+            raise ValueError(f"expected a number from {minimum}" + (f" to {maximum}" if maximum is not None else " up"))
+        return value
+
+    return check
+
+
+def _number(minimum, maximum=None):
+    def check(value):
+        try:
+            if isinstance(value, bool):
+                raise ValueError
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError("expected a number") from None
+        if not minimum <= value <= (float("inf") if maximum is None else maximum):
+            raise ValueError(f"expected a number from {minimum}" + (f" to {maximum}" if maximum is not None else " up"))
+        return value
+
+    return check
+
+
+def _date(value):
+    try:
+        return pd.Timestamp(value).date()
+    except (TypeError, ValueError):
+        raise ValueError("expected a date like 2024-01-31") from None
+
+
+def _choice(options):
+    options = list(options)
+
+    def check(value):
+        if value not in options:
+            raise ValueError(f"expected one of {', '.join(map(str, options))}")
+        return value
+
+    return check
+
+
+def _optional(check):
+    return lambda value: None if value is None else check(value)
+
+
+def _text(value):
+    if isinstance(value, (dict, list)) or value is None:
+        raise ValueError("expected a single value")
+    return str(value)
+
+
+def _selections(value):
+    if not isinstance(value, dict):
+        raise ValueError('expected an object like {"Channel": ["WEB"]}')
+    unknown = [column for column in value if column not in cube.COMPLETION_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown column {unknown[0]!r}; expected {', '.join(cube.COMPLETION_DIMENSIONS)}")
+    return {
+        column: [_text(item) for item in picked] if isinstance(picked, list) else _text(picked)
+        for column, picked in value.items()
+    }
+
+
+def _percentiles(value):
+    value = value if isinstance(value, (list, tuple)) else [value]
+    return tuple(_number(0, 100)(percentile) for percentile in value)
+
+
+# Argument -> check, for every argument of every query
+CHECKS = {
+    "n": _integer(),
+    "start": _date,
+    "end": _date,
+    "since": _optional(_date),
+    "granularity": _choice(timeindex.GRANULARITIES),
+    "category": _text,
+    "local_area": _text,
+    "request_type": _text,
+    "detail": _choice(geo.LEVELS),
+    "column": _choice(cube.COMPLETION_DIMENSIONS),
+    "selections": _optional(_selections),
+    "percentiles": _percentiles,
+    "min_z": _number(0),
+    "min_count": _integer(),
+    "window": _optional(_choice(sla.WINDOWS)),
+    "target": _number(0, 1),
+    "min_days": _integer(),
+    "dataset": _choice(forecast.DATASETS),
+    "series": _text,
+    "handle_seconds": _integer(),
+    "answer_seconds": _integer(),
+    "open_hours": _integer(1, 24),
+}
+
+# Query -> checks that differ from ``CHECKS``
+QUERY_CHECKS = {
+    "request-volume-by": {"column": _choice(cube.DIMENSIONS)},
+    "rolling-service-levels": {"window": _choice(sla.WINDOWS)},
+    # Correlations are computed for any window; fewer than three days give NaN
+    "rolling-correlations": {"window": _integer(3)},
+}
+
+
+def parameters(name):
+    """Argument names of query ``name`` and their defaults (``inspect.Parameter.empty`` if required)."""
+    signature = inspect.signature(QUERIES[name])
+    return {parameter.name: parameter.default for parameter in signature.parameters.values()}
+
+
+def check_arguments(name, arguments):
+    """``arguments`` of query ``name`` converted by their checks; ``QueryError`` names a bad one."""
+    known = parameters(name)
+    unknown = [key for key in arguments if key not in known]
+    if unknown:
+        raise QueryError(f"{name} has no argument {unknown[0]!r}; it takes {', '.join(known)}")
+    missing = [key for key, default in known.items() if default is inspect.Parameter.empty and key not in arguments]
+    if missing:
+        raise QueryError(f"{name} needs {', '.join(missing)}")
+    checks = {**CHECKS, **QUERY_CHECKS.get(name, {})}
+    checked = {}
+    for key, value in arguments.items():
+        try:
+            checked[key] = checks[key](value)
+        except ValueError as error:
+            raise QueryError(f"{name}: bad {key} {value!r}: {error}") from None
+    return checked
+
+
+def run(name, **arguments):
+    """Result of query ``name`` with the given arguments."""
+    if name not in QUERIES:
+        raise KeyError(f"unknown query {name!r}; choose from {', '.join(QUERIES)}")
+    return QUERIES[name](**check_arguments(name, arguments))
+
+
+def parse_arguments(pairs):
+    """``key=value`` strings to keyword arguments; values are JSON when they parse as JSON.
+
+    ``n=10`` gives an int, ``target=0.8`` a float, ``selections={"Channel": ["WEB"]}``
+    a dict, and ``category=Parks and Recreation`` stays a string.
+    """
+    arguments = {}
+    for pair in pairs:
+        key, separator, value = pair.partition("=")
+        if not separator:
+            raise ValueError(f"expected key=value, got {pair!r}")
+        try:
+            arguments[key] = json.loads(value)
+        except json.JSONDecodeError:
+            arguments[key] = value
+    return arguments
+
+
+def as_frame(result):
+    """Any query result as a DataFrame (scalars and lists become a ``value`` column)."""
+    if isinstance(result, pd.DataFrame):
+        # A positional index (possibly reordered by a sort) carries no data
+        if result.index.name is None and pd.api.types.is_integer_dtype(result.index):
+            return result.reset_index(drop=True)
+        return result.rename_axis(result.index.name or "index").reset_index()
+    if isinstance(result, pd.Series):
+        return result.reset_index()
+    if isinstance(result, dict):
+        return pd.DataFrame([result])
+    if isinstance(result, (list, tuple)) or hasattr(result, "__array__"):
+        return pd.DataFrame({"value": list(result)})
+    return pd.DataFrame({"value": [result]})
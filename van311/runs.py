@@ -0,0 +1,136 @@
+"""Merge sorted runs of Arrow record batches without holding them in memory.
+
+A run is an iterable of record batches already in ascending order of an
+integer or timestamp ``key`` column, such as a Parquet row group written
+sorted or a slice of a memory-mapped file. ``merge`` interleaves any number
+of runs into one ordered stream, a buffer of rows per run at a time: every
+round it emits all buffered rows that no run can still undercut, which
+always empties at least one buffer, and sorts only those rows. Memory
+therefore depends on the buffer sizes, not on the length of the runs.
+
+Rows with equal keys come out in run order, and in their order within a
+run, so merging the sorted pieces of a table gives exactly the stable sort
+of the whole table.
+
+Dictionary columns of different runs usually have different dictionaries,
+while one Arrow IPC file needs a single dictionary per column: collect them
+with ``unify_dictionaries`` first and pass every batch through ``conform``.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Rows per emitted batch
+BATCH_ROWS = 65_536
+
+
+def key_values(batch, key):
+    """The ``key`` column of a batch or table as an ``int64`` array."""
+    column = batch.column(key)
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    return column.cast(pa.int64()).to_numpy(zero_copy_only=False)
+
+
+def is_sorted(values):
+    return not (values[1:] < values[:-1]).any()
+
+
+def sort(table, key):
+    """``table`` (a batch or table) stably sorted by ``key``."""
+    return table.take(np.argsort(key_values(table, key), kind="stable"))
+
+
+def unify_dictionaries(dictionaries):
+    """One dictionary per column from ``{column: [dictionary, ...]}``.
+
+    Values keep the order in which they first appear, so indices into the
+    first dictionary of a column stay valid.
+    """
+    return {
+        column: pc.unique(pa.concat_arrays([array.cast(pa.string()) for array in arrays]))
+        for column, arrays in dictionaries.items()
+    }
+
+
+def _remap(array, dictionary):
+    """A dictionary array re-encoded against ``dictionary``, a superset of its own."""
+    own = array.dictionary
+    if len(own) <= len(dictionary) and dictionary.slice(0, len(own)).equals(own.cast(dictionary.type)):
+        # A prefix of the unified dictionary: the indices already point at the right values
+        indices = array.indices
+    else:
+        indices = pc.index_in(own.cast(dictionary.type), value_set=dictionary).cast(pa.int32()).take(array.indices)
+    return pa.DictionaryArray.from_arrays(indices.cast(pa.int32()), dictionary)
+
+
+def conform(batch, schema, dictionaries):
+    """``batch`` with the columns and types of ``schema`` and the ``dictionaries`` of its dictionary columns.
+
+    Columns ``batch`` lacks are filled with nulls.
+    """
+    columns = []
+    for field in schema:
+        if field.name not in batch.schema.names:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+            continue
+        column = batch.column(field.name)
+        if field.name in dictionaries:
+            if not pa.types.is_dictionary(column.type):
+                column = column.dictionary_encode()
+            column = _remap(column, dictionaries[field.name])
+        elif column.type != field.type:
+            column = column.cast(field.type)
+        columns.append(column)
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _pull(run):
+    """Next non-empty batch of a run iterator with its keys, or ``None`` when it is done."""
+    for batch, keys in run:
+        if len(keys):
+            return batch, keys
+    return None
+
+
+def merge(runs, key, batch_rows=BATCH_ROWS):
+    """Record batches of all ``runs`` in ascending ``key`` order, ties in run order.
+
+    Every batch of every run must have the same schema.
+    """
+    runs = [((batch, key_values(batch, key)) for batch in run) for run in runs]
+    pending = [None] * len(runs)
+    done = [False] * len(runs)
+    output, output_rows = [], 0
+    while True:
+        for i, run in enumerate(runs):
+            if pending[i] is None and not done[i]:
+                pending[i] = _pull(run)
+                done[i] = pending[i] is None
+        active = [i for i in range(len(runs)) if pending[i] is not None]
+        if not active:
+            break
+        # A run can still deliver rows after its buffer, all with keys at
+        # least as large as its last buffered one; rows below that bound
+        # (or equal to it, from an earlier run) are final
+        bounds = sorted((pending[i][1][-1], i) for i in active)
+        pieces, piece_keys = [], []
+        for i in active:
+            batch, keys = pending[i]
+            last, j = bounds[0] if bounds[0][1] != i else (bounds[1] if len(bounds) > 1 else (None, None))
+            cut = len(keys) if last is None else int(np.searchsorted(keys, last, side="right" if i < j else "left"))
+            if not cut:
+                continue
+            pieces.append(batch.slice(0, cut))
+            piece_keys.append(keys[:cut])
+            pending[i] = (batch.slice(cut), keys[cut:]) if cut < len(keys) else None
+        table = pa.Table.from_batches(pieces)
+        table = table.take(np.argsort(np.concatenate(piece_keys), kind="stable"))
+        output.append(table)
+        output_rows += table.num_rows
+        if output_rows >= batch_rows:
+            yield from pa.concat_tables(output).combine_chunks().to_batches(max_chunksize=batch_rows)
+            output, output_rows = [], 0
+    if output:
+        yield from pa.concat_tables(output).combine_chunks().to_batches(max_chunksize=batch_rows)
@@ -0,0 +1,201 @@
+"""Local JSON API over the dashboard's aggregates.
+
+Other tools can ask for the same numbers the dashboard shows over HTTP::
+
+    python -m van311 serve [--host 127.0.0.1] [--port 8502]
+
+    GET /                         the queries and their arguments
+    GET /<query>?key=value&...    the query's result as JSON records
+
+Queries are those of ``van311.query`` and their parameters are its
+arguments, parsed like on the command line (JSON when they parse as JSON),
+so ``/top-request-types?n=10`` or ``/request-volume-by?column=Channel&
+category=Parks``; a repeated parameter becomes a list.
+
+Aggregations are answered from the cubes and sketches through the shared
+caches of ``van311.cache``, as on the dashboard. On top of that, each
+encoded response is kept in ``responses`` under the query, its arguments
+and the digest of the store files it reads, so a repeated request costs a
+lookup. That key is also the response's ``ETag``: a client sending it back
+in ``If-None-Match`` gets ``304 Not Modified`` without the result being
+looked up at all, until the store is rebuilt. Bodies over
+``GZIP_MIN_BYTES`` are compressed once and sent gzipped to clients that
+accept it. The queries that need no arguments are computed when the server
+starts.
+"""
+
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import threading
+import traceback
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from van311 import cache, query
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+
+# Memory cap of the encoded responses (megabytes)
+RESPONSE_CACHE_MB = int(os.environ.get("VAN311_RESPONSE_CACHE_MB", "64"))
+
+# Smaller bodies are sent uncompressed; gzip would barely shrink them
+GZIP_MIN_BYTES = 1024
+
+responses = cache.LRUCache(RESPONSE_CACHE_MB * 1024 * 1024)
+
+
+# A request the API cannot answer, with the HTTP status to report
+QueryError = query.QueryError
+
+
+def parse_parameters(name, query_string):
+    """Checked keyword arguments of query ``name`` from a URL query string."""
+    arguments = {}
+    for key, values in urllib.parse.parse_qs(query_string, keep_blank_values=True).items():
+        parsed = [query.parse_arguments([f"{key}={value}"])[key] for value in values]
+        arguments[key] = parsed[0] if len(parsed) == 1 else parsed
+    return query.check_arguments(name, arguments)
+
+
+def etag(name, arguments):
+    """Validator of a query result: changes with the arguments and with the store files it reads."""
+    version = cache.source_version(query.QUERIES[name].cache_sources)
+    key = json.dumps([name, arguments, version], sort_keys=True, default=str)
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def gzip_etag(tag):
+    """ETag of the gzipped body; each encoding of a response needs its own."""
+    return tag[:-1] + '-gzip"'
+
+
+def encode(result):
+    """A query result as a JSON array of records."""
+    return query.as_frame(result).to_json(orient="records", date_format="iso").encode()
+
+
+def response(name, arguments, tag=None):
+    """``(etag, body, gzipped body or None)`` of a query, computed on the first request."""
+    tag = etag(name, arguments) if tag is None else tag
+    cached = responses.get(tag)
+    if cached is not None:
+        return cached
+    try:
+        body = encode(query.run(name, **arguments))
+    except FileNotFoundError as error:
+        raise QueryError(str(error), HTTPStatus.SERVICE_UNAVAILABLE) from error
+    except QueryError:
+        raise
+    except (TypeError, ValueError, KeyError) as error:
+        raise QueryError(f"{name}: {error}") from error
+    cached = (tag, body, gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None)
+    responses.put(tag, cached)
+    return cached
+
+
+def index():
+    """The queries and their arguments (``null`` for required ones)."""
+    listing = {
+        name: {
+            key: None if default is inspect.Parameter.empty else default
+            for key, default in query.parameters(name).items()
+        }
+        for name in query.QUERIES
+    }
+    return json.dumps(listing, default=str).encode()
+
+
+def warm():
+    """Compute the responses of the queries that need no arguments."""
+    for name in query.QUERIES:
+        if all(default is not inspect.Parameter.empty for default in query.parameters(name).values()):
+            try:
+                response(name, {})
+            except QueryError:
+                # Reported again when the query is requested
+                pass
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so a client can send many requests over one connection
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY the body
+    # waits for the client's delayed ACK of the headers
+    disable_nagle_algorithm = True
+    quiet = True
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        name = urllib.parse.unquote(url.path).strip("/")
+        if not name:
+            self._send(HTTPStatus.OK, index())
+            return
+        if name not in query.QUERIES:
+            self._error(HTTPStatus.NOT_FOUND, f"unknown query {name!r}; GET / lists them")
+            return
+        try:
+            arguments = parse_parameters(name, url.query)
+            tag = etag(name, arguments)
+            known = self._client_tags() & {tag, gzip_etag(tag)}
+            if known:
+                self._send(HTTPStatus.NOT_MODIFIED, b"", known.pop())
+                return
+            tag, body, gzipped = response(name, arguments, tag)
+        except QueryError as error:
+            self._error(error.status, str(error))
+            return
+        except Exception as error:
+            # A failing query must still get a response, not a dropped connection
+            traceback.print_exc()
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{name}: {type(error).__name__}: {error}")
+            return
+        if gzipped is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            self._send(HTTPStatus.OK, gzipped, gzip_etag(tag), encoding="gzip")
+        else:
+            self._send(HTTPStatus.OK, body, tag)
+
+    def _client_tags(self):
+        header = self.headers.get("If-None-Match", "")
+        return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode())
+
+    def _send(self, status, body, tag=None, encoding=None):
+        self.send_response(status)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        if tag is not None:
+            self.send_header("ETag", tag)
+            # Cacheable, but revalidated with the ETag on every use
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, quiet=True):
+    """Answer requests until interrupted; precomputes the argument-free queries in the background."""
+    Handler.quiet = quiet
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=warm, name="van311-warm", daemon=True).start()
+    print(f"serving the Van 311 aggregates on http://{host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,103 @@
+"""Mergeable completion-time quantile sketches.
+
+Completion times are bucketed on a fixed logarithmic scale: bucket ``k``
+holds the values in ``(GAMMA ** (k - 1), GAMMA ** k]``, with
+``GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)`` (the DDSketch
+mapping). Because the bucket boundaries are the same everywhere, a sketch is
+just a count per bucket, and merging sketches is adding their counts. The
+sketch table is therefore another cube (see ``van311.cube``): one row per
+non-empty (``COMPLETION_DIMENSIONS``, ``Bucket``) cell with a ``Count``, and
+it is filtered, merged and incrementally maintained exactly like the count
+cubes. Any filter combination's percentiles come from summing the selected
+cells per bucket and walking the cumulative counts.
+
+Accuracy: a quantile read from the sketch is the representative value of the
+bucket holding the exact order statistic (the ``q * (n - 1)``-th smallest
+value, rounded down, i.e. ``numpy.quantile(..., method="lower")``), so it is
+within ``RELATIVE_ACCURACY`` (1%) of that value, for any data and any
+number of merges. Values below ``MIN_VALUE`` (about a minute) share one
+bucket reported as 0.
+"""
+
+import numpy as np
+import pandas as pd
+
+from van311 import cube
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+MIN_VALUE = 1 / (24 * 60)  # days
+
+BUCKET = "Bucket"
+DIMENSIONS = cube.COMPLETION_DIMENSIONS + [BUCKET]
+
+# Bucket of values below MIN_VALUE (including 0)
+ZERO_BUCKET = np.iinfo(np.int16).min
+
+# Percentiles shown on the dashboard
+PERCENTILES = [50, 90, 99]
+
+_LOG_GAMMA = np.log(GAMMA)
+
+
+def bucket_keys(values):
+    """Bucket of each (non-negative) value."""
+    values = np.asarray(values, dtype="float64")
+    keys = np.full(len(values), ZERO_BUCKET, dtype=np.int16)
+    positive = values >= MIN_VALUE
+    keys[positive] = np.ceil(np.log(values[positive]) / _LOG_GAMMA)
+    return keys
+
+
+def bucket_values(keys):
+    """Representative value of each bucket (within ``RELATIVE_ACCURACY`` of its members)."""
+    keys = np.asarray(keys)
+    values = 2 * np.power(GAMMA, keys.astype("float64")) / (GAMMA + 1)
+    return np.where(keys == ZERO_BUCKET, 0.0, values)
+
+
+def build(service_requests):
+    """Completion-time bucket counts per non-empty completion cube cell."""
+    completed = service_requests[service_requests["Completion Time (days)"].notna()]
+    buckets = pd.Series(
+        bucket_keys(completed["Completion Time (days)"]), index=completed.index, name=BUCKET
+    )
+    sketch = (
+        completed.groupby([completed[column] for column in cube.COMPLETION_DIMENSIONS] + [buckets],
+                          observed=True, dropna=False)
+        .size()
+        .reset_index(name=cube.COUNT)
+    )
+    return cube.merge([sketch], DIMENSIONS)
+
+
+def quantiles(sketch, by, percentiles=PERCENTILES, **filters):
+    """Completion-time percentiles grouped by ``by`` after filtering.
+
+    Returns a frame with the ``by`` column and one ``p<N>`` column (days)
+    per percentile, without empty groups.
+    """
+    cells = cube.select(sketch, **filters)
+    merged = cells.groupby([by, BUCKET], observed=True)[cube.COUNT].sum()
+    merged = merged[merged > 0]
+    groups = merged.index.get_level_values(0)
+    if not len(merged):
+        # No cells match the filters
+        empty = {f"p{percentile}": np.array([], dtype="float64") for percentile in percentiles}
+        return pd.DataFrame({by: groups, **empty})
+
+    # Groups are contiguous and buckets ascending within them after groupby
+    keys = merged.index.get_level_values(1).to_numpy()
+    counts = merged.to_numpy()
+    cumulative = np.cumsum(counts)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    before = np.r_[0, cumulative][starts]
+    sizes = np.add.reduceat(counts, starts)
+
+    result = pd.DataFrame({by: groups[starts]})
+    for percentile in percentiles:
+        # First bucket whose cumulative count passes the target rank
+        rank = np.floor(percentile / 100 * (sizes - 1))
+        position = np.searchsorted(cumulative, before + rank, side="right")
+        result[f"p{percentile}"] = bucket_values(keys[position])
+    return result
@@ -0,0 +1,221 @@
+"""Rolling-window service levels of the contact centre.
+
+The export has one row per day (``CallsOffered``, ``CallsHandled``,
+``CallsAbandoned``, ``AverageSpeedofAnswer``, ``ServiceLevel``). Averaging
+the ratios of a month weights a quiet Sunday like a busy Monday, so ``build``
+turns each day into additive call counts first::
+
+    Answer Seconds      = AverageSpeedofAnswer * CallsHandled
+    Answered In Target  = ServiceLevel * CallsOffered
+
+and keeps their running (prefix) sums. The total over the last ``w`` days is
+then the difference of two running sums, ``S[t] - S[t - w]``, so every
+rolling figure for ``WINDOWS`` is call-weighted::
+
+    Abandonment Rate  = Calls Abandoned / Calls Offered
+    Service Level     = Answered In Target / Calls Offered
+    Speed of Answer   = Answer Seconds / Calls Handled
+
+``extend`` appends new days in O(1) per day and window: it only needs the
+running sums of the last ``max(WINDOWS)`` days, so ``van311.update`` adds a
+day without touching the rows already stored. Days missing from the export
+count as days without calls, so windows always span calendar days; a window
+is empty (NaN) until it has seen ``w`` days.
+
+``breach_streaks`` finds runs of consecutive days below a service level
+target, and ``rolling_correlations`` correlates daily series over every
+window at once from the same kind of prefix sums.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Rolling window lengths in days
+WINDOWS = [7, 28, 90]
+
+# Service level target used when none is given
+DEFAULT_TARGET = 0.8
+
+DATE = "Date"
+
+# Additive daily totals and the export columns they come from
+TOTALS = ["Calls Offered", "Calls Handled", "Calls Abandoned", "Answer Seconds", "Answered In Target"]
+CUMULATIVE = [f"Cumulative {column}" for column in TOTALS]
+
+# Ratio -> (numerator, denominator) over the daily totals
+RATIOS = {
+    "Abandonment Rate": ("Calls Abandoned", "Calls Offered"),
+    "Service Level": ("Answered In Target", "Calls Offered"),
+    "Speed of Answer": ("Answer Seconds", "Calls Handled"),
+}
+
+# Daily series correlated by ``rolling_correlations`` (as in the page's correlation matrix)
+CORRELATED = ["Calls Handled", "Speed of Answer", "Service Level"]
+
+
+def rolling_column(ratio, window):
+    return f"{ratio} {window}d"
+
+
+def daily_totals(metrics):
+    """Additive call totals per calendar day of the contact centre export, in date order."""
+    days = pd.DataFrame(
+        {
+            DATE: metrics["Date"].to_numpy(),
+            "Calls Offered": metrics["CallsOffered"].to_numpy("float64"),
+            "Calls Handled": metrics["CallsHandled"].to_numpy("float64"),
+            "Calls Abandoned": metrics["CallsAbandoned"].to_numpy("float64"),
+            "Answer Seconds": (metrics["AverageSpeedofAnswer"] * metrics["CallsHandled"]).to_numpy("float64"),
+            "Answered In Target": (metrics["ServiceLevel"] * metrics["CallsOffered"]).to_numpy("float64"),
+        }
+    )
+    days = days.groupby(DATE).sum()
+    if len(days):
+        # Days without a row had no calls
+        days = days.reindex(pd.date_range(days.index.min(), days.index.max(), freq="D"), fill_value=0.0)
+    return days.rename_axis(DATE).reset_index()
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+
+def _add_ratios(frame, sums, suffix=None):
+    """Ratio columns of ``frame`` from the ``[day, total]`` array ``sums``."""
+    for ratio, (numerator, denominator) in RATIOS.items():
+        column = ratio if suffix is None else rolling_column(ratio, suffix)
+        frame[column] = _ratio(sums[:, TOTALS.index(numerator)], sums[:, TOTALS.index(denominator)])
+
+
+def build(metrics):
+    """Daily totals, their running sums and the rolling ratios of every day in ``metrics``."""
+    table = daily_totals(metrics)
+    values = table[TOTALS].to_numpy()
+    # Running sums with a leading zero row, so a window ending on day i is P[i + 1] - P[i + 1 - w]
+    prefix = np.vstack([np.zeros((1, len(TOTALS))), np.cumsum(values, axis=0)])
+    table[CUMULATIVE] = prefix[1:]
+    _add_ratios(table, values)
+    ends = np.arange(1, len(table) + 1)
+    for window in WINDOWS:
+        sums = prefix[ends] - prefix[np.maximum(ends - window, 0)]
+        sums[ends < window] = np.nan
+        _add_ratios(table, sums, window)
+    return table
+
+
+def extend(table, metrics):
+    """``table`` with the days of ``metrics`` after its last date appended.
+
+    Each new day costs O(1) per window; the rows already in ``table`` are
+    neither read beyond the last ``max(WINDOWS)`` nor recomputed.
+    """
+    if not len(table):
+        return build(metrics)
+    last = table[DATE].iloc[-1]
+    new = daily_totals(metrics[metrics["Date"] > last])
+    if not len(new):
+        return table
+    # Days between the stored table and the new rows had no calls
+    dates = pd.date_range(last + pd.Timedelta(days=1), new[DATE].max(), freq="D")
+    new = new.set_index(DATE).reindex(dates, fill_value=0.0).rename_axis(DATE).reset_index()
+
+    longest = max(WINDOWS)
+    recent = deque(table[CUMULATIVE].tail(longest).to_numpy(), maxlen=longest + 1)
+    seen = len(table)
+    cumulative, windows = [], {window: [] for window in WINDOWS}
+    for values in new[TOTALS].to_numpy():
+        running = recent[-1] + values
+        recent.append(running)
+        seen += 1
+        cumulative.append(running)
+        for window in WINDOWS:
+            if seen < window:
+                windows[window].append(np.full(len(TOTALS), np.nan))
+            elif seen == window:
+                windows[window].append(running - 0.0)
+            else:
+                windows[window].append(running - recent[-1 - window])
+
+    new[CUMULATIVE] = np.array(cumulative)
+    _add_ratios(new, new[TOTALS].to_numpy())
+    for window in WINDOWS:
+        _add_ratios(new, np.array(windows[window]), window)
+    return pd.concat([table, new], ignore_index=True)
+
+
+def streak_lengths(breach):
+    """Consecutive ``True`` values up to and including each position (0 where ``False``)."""
+    breach = np.asarray(breach, dtype=bool)
+    positions = np.arange(len(breach))
+    last_ok = np.maximum.accumulate(np.where(breach, -1, positions))
+    return np.where(breach, positions - last_ok, 0)
+
+
+def breach_streaks(table, target=DEFAULT_TARGET, window=None, min_days=1):
+    """Runs of consecutive days whose service level was below ``target``.
+
+    ``window`` compares the rolling ``window``-day service level instead of
+    the day's own. Days without calls neither breach nor end a run. Returns
+    one row per run (``Start``, ``End``, ``Days``, ``Lowest Service Level``),
+    longest first.
+    """
+    column = "Service Level" if window is None else rolling_column("Service Level", window)
+    level = table[column].to_numpy()
+    called = ~np.isnan(level)
+    days, level = table[DATE].to_numpy()[called], level[called]
+    breach = level < target
+    lengths = streak_lengths(breach)
+    # A run ends where the next day is not a breach
+    ends = np.flatnonzero(breach & np.append(~breach[1:], True))
+    starts = ends - lengths[ends] + 1
+    # Each segment runs on past its streak, but only over days at or above the target
+    lowest = np.minimum.reduceat(level, starts) if len(starts) else np.array([])
+    streaks = pd.DataFrame(
+        {
+            "Start": days[starts],
+            "End": days[ends],
+            "Days": lengths[ends],
+            "Lowest Service Level": lowest,
+        }
+    )
+    streaks = streaks[streaks["Days"] >= min_days]
+    return streaks.sort_values(["Days", "End"], ascending=False, ignore_index=True)
+
+
+def rolling_correlations(table, windows=WINDOWS, columns=CORRELATED):
+    """Pearson correlation of each pair of ``columns`` over every window ending on each day.
+
+    Returns one row per day with a ``"<a> / <b> <w>d"`` column per pair and
+    window. All pairs and windows come from one array of prefix sums of
+    ``x``, ``y``, ``x^2``, ``y^2`` and ``xy``: a window's sums are a
+    difference of two rows, gathered for every (window, day) at once. Days
+    without calls are left out of their windows; windows with fewer than
+    three such days are NaN.
+    """
+    series = table[list(columns)].to_numpy("float64")
+    valid = ~np.isnan(series).any(axis=1)
+    # Centring keeps the sums of squares small, so the differences stay accurate
+    centred = np.where(valid[:, None], series - np.nanmean(series[valid], axis=0), 0.0)
+    pairs = [(a, b) for a in range(len(columns)) for b in range(a + 1, len(columns))]
+    x, y = centred[:, [a for a, _ in pairs]], centred[:, [b for _, b in pairs]]
+    terms = np.stack([np.repeat(valid[:, None], len(pairs), axis=1).astype("float64"), x, y, x * x, y * y, x * y])
+    prefix = np.concatenate([np.zeros((terms.shape[0], 1, len(pairs))), np.cumsum(terms, axis=1)], axis=1)
+
+    windows = np.asarray(windows)
+    ends = np.arange(1, len(table) + 1)
+    starts = np.maximum(ends[None, :] - windows[:, None], 0)
+    # [term, window, day, pair]
+    sums = prefix[:, ends][:, None] - prefix[:, starts]
+    n, sx, sy, sxx, syy, sxy = sums
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    correlation[(n < 3) | (ends[None, :, None] < windows[:, None, None])] = np.nan
+
+    result = pd.DataFrame({DATE: table[DATE].to_numpy()})
+    for w, window in enumerate(windows):
+        for p, (a, b) in enumerate(pairs):
+            result[f"{columns[a]} / {columns[b]} {window}d"] = np.clip(correlation[w, :, p], -1, 1)
+    return result
@@ -0,0 +1,73 @@
+"""Erlang C staffing for the contact centre, for many periods at once.
+
+For a period with ``calls`` offered, an average handle time and the hours
+the centre is open, the offered load is ``A = calls * handle time / open
+time`` erlangs (calls are assumed to arrive evenly over the open hours).
+With ``N > A`` agents, Erlang C gives the probability that a call waits,
+and the service level, the share of calls answered within the answer-time
+target ``T``, is::
+
+    SL(N) = 1 - C(N, A) * exp(-(N - A) * T / handle time)
+
+``C(N, A)`` is computed from the Erlang B recursion
+``B(n) = A * B(n-1) / (n + A * B(n-1))``, which stays between 0 and 1 and
+so never overflows the way the factorial form of Erlang C does, and
+``C = N * B / (N - A * (1 - B))``.
+
+The recursion runs over agent counts, with every period as one element of a
+numpy array, so ``service_levels`` fills a (period, agents) table for years
+of days in one pass. ``required_agents`` then reads the smallest agent count
+meeting any target straight off that table, which is what makes sweeping
+targets interactively cheap.
+"""
+
+import numpy as np
+
+# Defaults for what the contact centre export does not record
+DEFAULT_HANDLE_SECONDS = 360
+DEFAULT_ANSWER_SECONDS = 30
+DEFAULT_OPEN_HOURS = 12
+
+
+def offered_load(calls, handle_seconds=DEFAULT_HANDLE_SECONDS, open_hours=DEFAULT_OPEN_HOURS):
+    """Offered load in erlangs for ``calls`` arriving evenly over ``open_hours``."""
+    return np.asarray(calls, dtype="float64") * handle_seconds / (open_hours * 3600)
+
+
+def max_agents(load):
+    """An agent count comfortably above what any target can need for ``load``."""
+    peak = float(np.nanmax(load)) if np.size(load) else 0.0
+    return int(np.ceil(peak + 6 * np.sqrt(peak) + 10))
+
+
+def service_levels(load, agents=None, handle_seconds=DEFAULT_HANDLE_SECONDS,
+                   answer_seconds=DEFAULT_ANSWER_SECONDS):
+    """Service level of each period with 0..``agents`` agents, ``[period, agents + 1]``.
+
+    Agent counts at or below the offered load cannot keep up and get 0.
+    """
+    load = np.nan_to_num(np.asarray(load, dtype="float64"))
+    agents = max_agents(load) if agents is None else agents
+    levels = np.zeros((len(load), agents + 1))
+    blocking = np.ones(len(load))  # Erlang B with 0 agents
+    for n in range(1, agents + 1):
+        blocking = load * blocking / (n + load * blocking)
+        stable = n > load
+        waiting = np.ones(len(load))
+        waiting[stable] = n * blocking[stable] / (n - load[stable] * (1 - blocking[stable]))
+        levels[:, n] = np.where(
+            stable, 1 - waiting * np.exp(-(n - load) * answer_seconds / handle_seconds), 0.0
+        )
+    # Idle periods meet any target without staff
+    levels[load == 0, :] = 1.0
+    return levels
+
+
+def required_agents(levels, target):
+    """Smallest agent count per period whose service level reaches ``target``.
+
+    Periods that miss the target even with every agent in ``levels`` get
+    that maximum.
+    """
+    meets = levels >= target
+    return np.where(meets.any(axis=1), meets.argmax(axis=1), levels.shape[1] - 1)
@@ -0,0 +1,486 @@
+"""Readers and writers for the local columnar store built by ``van311.ingest``.
+
+Besides the Parquet tables the store holds ``manifest.json``, which records
+the high-water marks used by incremental updates and the update parts
+appended to the service request table since the last full rebuild. The
+manifest is rewritten by every ingest run, so its content hash doubles as
+the version of the service request data.
+
+The current service requests are also kept as a snapshot in an uncompressed
+Arrow IPC file, sorted by open timestamp, with the filter posting lists in a
+second one and the row of each ``BI_ID`` in a third, which updates use to
+find the versions they replace. The app memory-maps the first two
+read-only: column buffers are views of the mapped file, so every session
+and every app process on the host reads the same physical pages from the
+OS page cache instead of holding a copy.
+Snapshots are replaced atomically; a process keeps reading the file it
+mapped until its cache picks up the new version.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from van311 import filters, paths
+from van311 import runs as sorted_runs
+
+KEY = "BI_ID"
+# Column of the key index holding each request's row in the snapshot
+ROW = "row"
+OPEN_TIMESTAMP = "Service request open timestamp"
+
+# Rows buffered over all runs while merging the request snapshot
+MERGE_BUFFER_ROWS = 262_144
+
+# Snapshot schema metadata recording the base table and update parts it holds
+SNAPSHOT_SOURCES = b"van311.sources"
+
+
+def _path(name, store_dir=None):
+    return (paths.STORE_DIR if store_dir is None else store_dir) / name
+
+
+def _read(name, store_dir=None):
+    path = _path(name, store_dir)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"{path} is missing; build the local data store with `python -m van311.ingest`"
+        )
+    return pd.read_parquet(path, engine="pyarrow")
+
+
+def read_manifest(store_dir=None):
+    """The store manifest, or an empty dict for stores built before it existed."""
+    path = _path(paths.MANIFEST_JSON, store_dir)
+    if not path.exists():
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def arrow_schema(frame):
+    """Arrow schema for a store table; dictionaries get int32 indices so
+    chunks and update parts with different numbers of categories share one
+    schema."""
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), pa.string())))
+    return schema
+
+
+def write_table(frame, name, store_dir=None):
+    """Write one dataset to the store as Parquet.
+
+    The file is written next to its final name and moved into place, so a
+    running app never reads a half-written file.
+    """
+    path = _path(name, store_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    table = pa.Table.from_pandas(frame, schema=arrow_schema(frame), preserve_index=False)
+    pq.write_table(table, partial)
+    os.replace(partial, path)
+
+
+def write_manifest(manifest, store_dir=None):
+    path = _path(paths.MANIFEST_JSON, store_dir)
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "w") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(partial, path)
+
+
+def service_request_files(store_dir=None, updates=None):
+    """The base request table followed by its update parts, oldest first.
+
+    ``updates`` overrides the part names listed in the manifest.
+    """
+    if updates is None:
+        updates = read_manifest(store_dir).get("service_request_updates", [])
+    return [_path(paths.SERVICE_REQUESTS_PARQUET, store_dir)] + [
+        _path(paths.SERVICE_REQUEST_UPDATES_DIR, store_dir) / name for name in updates
+    ]
+
+
+def read_service_request_table(store_dir=None, columns=None, filters=None, updates=None):
+    """Base table plus update parts as one Arrow table, newest version of each request last."""
+    files = service_request_files(store_dir, updates)
+    if not files[0].exists():
+        raise FileNotFoundError(
+            f"{files[0]} is missing; build the local data store with `python -m van311.ingest`"
+        )
+    tables = [pq.read_table(path, columns=columns, filters=filters) for path in files]
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options="default").unify_dictionaries()
+
+
+def load_service_requests(store_dir=None):
+    """Enriched service requests (one row per request)."""
+    if len(service_request_files(store_dir)) == 1:
+        return _read(paths.SERVICE_REQUESTS_PARQUET, store_dir)
+
+    # Update parts re-deliver requests whose status or close date changed;
+    # keep only the latest version of each
+    frame = read_service_request_table(store_dir).to_pandas()
+    return frame[~frame["BI_ID"].duplicated(keep="last")].reset_index(drop=True)
+
+
+def _latest_versions(table):
+    """Rows of ``table`` holding the last version of each ``BI_ID``, in table order."""
+    ids = table["BI_ID"].to_numpy()
+    _, last_from_end = np.unique(ids[::-1], return_index=True)
+    return table.take(np.sort(len(ids) - 1 - last_from_end))
+
+
+def _write_ipc(table, name, store_dir=None):
+    path = _path(name, store_dir)
+    partial = path.with_name(path.name + ".partial")
+    with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(partial, path)
+
+
+def _base_signature(store_dir=None):
+    stat = _path(paths.SERVICE_REQUESTS_PARQUET, store_dir).stat()
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def _snapshot_sources(table):
+    """What a snapshot was built from (base table signature and update parts), if recorded."""
+    metadata = table.schema.metadata or {}
+    if SNAPSHOT_SOURCES not in metadata:
+        return None
+    return json.loads(metadata[SNAPSHOT_SOURCES])
+
+
+def _dictionary_columns(schema):
+    return [field.name for field in schema if pa.types.is_dictionary(field.type)]
+
+
+def _spill_base_runs(store_dir, scratch):
+    """The base table's row groups as sorted runs, memory-mapped from scratch files.
+
+    Row groups are copied one at a time, so the merge reads every run
+    through the page cache instead of holding a decoded row group per run.
+    Ingest writes each row group sorted by open timestamp; row groups of
+    tables written before that are sorted on the way.
+    """
+    base = pq.ParquetFile(_path(paths.SERVICE_REQUESTS_PARQUET, store_dir))
+    tables = []
+    for group in range(base.num_row_groups):
+        table = base.read_row_group(group).unify_dictionaries()
+        if not sorted_runs.is_sorted(sorted_runs.key_values(table, OPEN_TIMESTAMP)):
+            table = sorted_runs.sort(table, OPEN_TIMESTAMP)
+        name = f"{paths.SERVICE_REQUESTS_SNAPSHOT}.run-{group:05d}.scratch"
+        scratch.append(_path(name, store_dir))
+        _write_ipc(table, name, store_dir)
+        tables.append(_map_ipc(name, store_dir))
+    return tables
+
+
+def _without(batches, ids):
+    """``batches`` without the rows whose ``BI_ID`` is in ``ids``."""
+    for batch in batches:
+        if ids is not None and len(ids):
+            batch = batch.filter(pc.invert(pc.is_in(batch.column(KEY), value_set=ids)))
+        yield batch
+
+
+def write_service_request_snapshot(store_dir=None, updates=None):
+    """Write the memory-mappable request snapshot and its filter posting lists.
+
+    ``updates`` are the update part names the snapshot includes (default:
+    the ones in the manifest). Returns the number of rows.
+
+    Only the update parts are ever sorted or held whole: the snapshot is a
+    streaming merge (``van311.runs``) of runs already in open-timestamp
+    order, written a record batch at a time. When the current snapshot was built from the
+    same base table and a prefix of ``updates``, the runs are that snapshot
+    and the newer update parts, so an update only sorts its own rows.
+    Otherwise they are the row groups of the base table and every update
+    part. Rows superseded by a later update part are dropped on the way.
+    """
+    if updates is None:
+        updates = read_manifest(store_dir).get("service_request_updates", [])
+    files = service_request_files(store_dir, updates)
+    if not files[0].exists():
+        raise FileNotFoundError(
+            f"{files[0]} is missing; build the local data store with `python -m van311.ingest`"
+        )
+    sources = {"base": _base_signature(store_dir), "updates": list(updates)}
+    current = None
+    if _path(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir).exists():
+        current = _map_ipc(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir)
+        built_from = _snapshot_sources(current)
+        if (built_from is None or built_from["base"] != sources["base"]
+                or list(updates[:len(built_from["updates"])]) != built_from["updates"]):
+            current = None
+    if current is not None and len(built_from["updates"]) == len(updates):
+        if not _path(paths.SERVICE_REQUEST_INDEX, store_dir).exists():
+            _write_index(current, store_dir)
+        if not _path(paths.SERVICE_REQUEST_KEYS, store_dir).exists():
+            _write_keys(current, store_dir)
+        return current.num_rows
+
+    scratch = []
+    try:
+        if current is not None:
+            head = [current]
+            part_files = files[1 + len(built_from["updates"]):]
+        else:
+            head = _spill_base_runs(store_dir, scratch)
+            part_files = files[1:]
+        _merge_snapshot(head, part_files, sources, store_dir)
+    finally:
+        for path in scratch:
+            path.unlink(missing_ok=True)
+
+    table = _map_ipc(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir)
+    _write_index(table, store_dir)
+    _write_keys(table, store_dir)
+    return table.num_rows
+
+
+def _merge_snapshot(head, part_files, sources, store_dir=None):
+    """Write the snapshot merged from the memory-mapped tables ``head`` and the update parts after them."""
+    schema = pa.unify_schemas([table.schema for table in head])
+    dictionary_columns = _dictionary_columns(schema)
+    dictionaries = {
+        column: [table[column].chunk(0).dictionary for table in head if table[column].num_chunks]
+        for column in dictionary_columns
+    }
+    # Update parts hold only the changed requests; they are read whole
+    parts = [sorted_runs.sort(pq.read_table(path), OPEN_TIMESTAMP) for path in part_files]
+    schema = pa.unify_schemas([schema] + [part.schema for part in parts], promote_options="default")
+    for part in parts:
+        for column in dictionary_columns:
+            dictionaries[column].extend(chunk.dictionary for chunk in part[column].chunks)
+    dictionaries = sorted_runs.unify_dictionaries(dictionaries)
+
+    # Each run loses the requests re-delivered by a later part
+    later = [None] * (len(parts) + 1)
+    if KEY in schema.names:
+        for i in range(len(parts) - 1, -1, -1):
+            ids = parts[i][KEY].combine_chunks()
+            later[i] = ids if later[i + 1] is None else pc.unique(pa.concat_arrays([ids, later[i + 1]]))
+    runs = [(table, later[0]) for table in head] + [(part, later[i + 1]) for i, part in enumerate(parts)]
+    rows = max(1024, MERGE_BUFFER_ROWS // max(1, len(runs)))
+    conformed = [
+        (
+            sorted_runs.conform(batch, schema, dictionaries)
+            for batch in _without(table.to_batches(max_chunksize=rows), ids)
+        )
+        for table, ids in runs
+    ]
+
+    schema = schema.with_metadata({**(schema.metadata or {}), SNAPSHOT_SOURCES: json.dumps(sources).encode()})
+    path = _path(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir)
+    partial = path.with_name(path.name + ".partial")
+    with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for batch in sorted_runs.merge(conformed, OPEN_TIMESTAMP):
+            writer.write_batch(batch)
+    os.replace(partial, path)
+
+
+def _write_index(table, store_dir=None):
+    """Write the posting lists and open timestamps of a snapshot as one contiguous column each.
+
+    The arrays are filled a record batch at a time in memory-mapped scratch
+    files and written from there, so memory use does not grow with the table.
+    """
+    scratch = []
+
+    def spool(dtype):
+        if not table.num_rows:
+            return np.empty(0, dtype=dtype)
+        path = _path(f"{paths.SERVICE_REQUEST_INDEX}.{len(scratch)}.scratch", store_dir)
+        scratch.append(path)
+        return np.memmap(path, dtype=dtype, mode="w+", shape=(table.num_rows,))
+
+    try:
+        index = {}
+        for column in filters.INDEXED_COLUMNS:
+            # A counting sort of the codes: each value's posting list starts
+            # where the smaller codes' end (missing values first), as in
+            # ``filters.posting_positions``
+            _, counts = filters.code_counts(table[column])
+            cursor = np.cumsum(counts) - counts
+            positions = spool(np.int32)
+            start = 0
+            for chunk in table[column].chunks:
+                codes = filters.dictionary_codes(chunk)[1] + 1
+                order = np.argsort(codes, kind="stable")
+                chunk_counts = np.bincount(codes, minlength=len(counts))
+                ranks = np.arange(len(codes)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+                positions[cursor[codes[order]] + ranks] = start + order
+                cursor += chunk_counts
+                start += len(codes)
+            index[column] = pa.array(positions)
+        opened = spool("datetime64[ns]")
+        start = 0
+        for chunk in table[OPEN_TIMESTAMP].chunks:
+            opened[start:start + len(chunk)] = chunk.to_numpy(zero_copy_only=False)
+            start += len(chunk)
+        index[OPEN_TIMESTAMP] = pa.array(opened, type=table.schema.field(OPEN_TIMESTAMP).type)
+        _write_ipc(pa.table(index), paths.SERVICE_REQUEST_INDEX, store_dir)
+    finally:
+        for path in scratch:
+            path.unlink(missing_ok=True)
+
+
+def _slices(batch, rows):
+    for start in range(0, batch.num_rows, rows):
+        yield batch.slice(start, rows)
+
+
+def _write_keys(table, store_dir=None):
+    """Write the ``BI_ID``s of a snapshot in ascending order with the row of each.
+
+    Each record batch's keys are sorted into a scratch file and the sorted
+    batches are merged (``van311.runs``) into memory-mapped arrays, so memory
+    use does not grow with the table. Snapshots without ``BI_ID`` get none.
+    """
+    if KEY not in table.column_names:
+        _path(paths.SERVICE_REQUEST_KEYS, store_dir).unlink(missing_ok=True)
+        return
+    schema = pa.schema([(KEY, pa.int64()), (ROW, pa.int32())])
+    scratch = [_path(f"{paths.SERVICE_REQUEST_KEYS}.{i}.scratch", store_dir) for i in range(3)]
+    try:
+        with pa.OSFile(str(scratch[0]), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            start = 0
+            for batch in table.to_batches():
+                keys = sorted_runs.key_values(batch, KEY)
+                order = np.argsort(keys, kind="stable")
+                writer.write_batch(pa.record_batch([keys[order], (start + order).astype(np.int32)], schema=schema))
+                start += batch.num_rows
+        if not table.num_rows:
+            _write_ipc(schema.empty_table(), paths.SERVICE_REQUEST_KEYS, store_dir)
+            return
+        runs = pa.ipc.open_file(pa.memory_map(str(scratch[0]), "r"))
+        rows = max(1024, MERGE_BUFFER_ROWS // max(1, runs.num_record_batches))
+        merged = sorted_runs.merge(
+            [_slices(runs.get_batch(i), rows) for i in range(runs.num_record_batches)], KEY
+        )
+        keys = np.memmap(scratch[1], dtype=np.int64, mode="w+", shape=(table.num_rows,))
+        positions = np.memmap(scratch[2], dtype=np.int32, mode="w+", shape=(table.num_rows,))
+        start = 0
+        for batch in merged:
+            keys[start:start + batch.num_rows] = batch.column(KEY).to_numpy()
+            positions[start:start + batch.num_rows] = batch.column(ROW).to_numpy()
+            start += batch.num_rows
+        _write_ipc(pa.table({KEY: keys, ROW: positions}, schema=schema), paths.SERVICE_REQUEST_KEYS, store_dir)
+    finally:
+        for path in scratch:
+            path.unlink(missing_ok=True)
+
+
+def _map_ipc(name, store_dir=None):
+    source = pa.memory_map(str(_path(name, store_dir)), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def open_service_requests(store_dir=None):
+    """Current service requests as a read-only Arrow table.
+
+    Memory-mapped from the snapshot when there is one; stores built before
+    snapshots existed are read into memory from the Parquet files instead.
+    """
+    if _path(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir).exists():
+        return _map_ipc(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir)
+    table = read_service_request_table(store_dir)
+    if len(service_request_files(store_dir)) > 1:
+        table = _latest_versions(table)
+    return table.unify_dictionaries().combine_chunks()
+
+
+def open_service_request_index(store_dir=None):
+    """Posting positions per filter column (``filters.posting_positions``), memory-mapped.
+
+    Also holds the snapshot's open timestamps (in snapshot order, so sorted)
+    as one contiguous array. ``None`` when the store has no snapshot.
+    """
+    if not _path(paths.SERVICE_REQUEST_INDEX, store_dir).exists():
+        return None
+    index = _map_ipc(paths.SERVICE_REQUEST_INDEX, store_dir)
+    return {column: index[column].chunk(0).to_numpy() for column in index.column_names}
+
+
+def read_service_requests_by_key(ids, store_dir=None, updates=None):
+    """Current versions of the requests whose ``BI_ID`` is in ``ids``, as an Arrow table.
+
+    The ids are looked up in the key index of the memory-mapped snapshot, so
+    only the record batches holding them are read. ``None`` when the store
+    has no key index or its snapshot was not built from the base table and
+    ``updates`` (default: the parts in the manifest); then read the table.
+    """
+    if updates is None:
+        updates = read_manifest(store_dir).get("service_request_updates", [])
+    if not (_path(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir).exists()
+            and _path(paths.SERVICE_REQUEST_KEYS, store_dir).exists()):
+        return None
+    snapshot = _map_ipc(paths.SERVICE_REQUESTS_SNAPSHOT, store_dir)
+    if _snapshot_sources(snapshot) != {"base": _base_signature(store_dir), "updates": list(updates)}:
+        return None
+    index = _map_ipc(paths.SERVICE_REQUEST_KEYS, store_dir)
+    if index.num_rows != snapshot.num_rows:
+        return None
+    if not index.num_rows:
+        return snapshot.schema.empty_table()
+    keys = index[KEY].chunk(0).to_numpy()
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    position = np.searchsorted(keys, ids)
+    hit = position < len(keys)
+    hit[hit] = keys[position[hit]] == ids[hit]
+    rows = np.sort(index[ROW].chunk(0).to_numpy()[position[hit]])
+
+    # Rows are taken batch by batch, so only the pages holding them are touched
+    batches = snapshot.to_batches()
+    ends = np.cumsum([batch.num_rows for batch in batches])
+    which = np.searchsorted(ends, rows, side="right")
+    taken = []
+    for i in np.unique(which):
+        local = rows[which == i] - (ends[i] - batches[i].num_rows)
+        taken.append(batches[i].take(pa.array(local)))
+    return pa.Table.from_batches(taken, schema=snapshot.schema)
+
+
+def load_request_cube(store_dir=None):
+    """Request counts per (month, weekday, hour, category, ...) cell, see ``van311.cube``."""
+    return _read(paths.REQUEST_CUBE_PARQUET, store_dir)
+
+
+def load_completion_cube(store_dir=None):
+    """Completed-request counts and total completion days per cell, see ``van311.cube``."""
+    return _read(paths.COMPLETION_CUBE_PARQUET, store_dir)
+
+
+def load_completion_sketch(store_dir=None):
+    """Completion-time bucket counts per cell, see ``van311.sketch``."""
+    return _read(paths.COMPLETION_SKETCH_PARQUET, store_dir)
+
+
+def load_aggregate(name, store_dir=None):
+    """Any of the cubes and sketches maintained by ingest, by file name."""
+    return _read(name, store_dir)
+
+
+def load_geocodes(store_dir=None):
+    """Neighbourhood centroids (``Local area``, ``Latitude``, ``Longitude``)."""
+    return _read(paths.GEOCODES_PARQUET, store_dir)
+
+
+def load_inquiry_volume(store_dir=None):
+    """Monthly inquiry counts by department, type and channel."""
+    return _read(paths.INQUIRY_VOLUME_PARQUET, store_dir)
+
+
+def load_contact_centre_metrics(store_dir=None):
+    """Daily contact centre call metrics."""
+    return _read(paths.CONTACT_CENTRE_PARQUET, store_dir)
@@ -0,0 +1,117 @@
+"""Sorted timestamp index for date-range queries on service requests.
+
+The open timestamps are sorted once, keeping the permutation back to row
+positions. A date range is then two binary searches into the sorted array,
+and everything inside the range is a contiguous slice of it, so a query
+costs O(log n) plus the number of requests it returns instead of a full
+scan-and-mask of the table.
+
+The memory-mapped request snapshot is stored in open-timestamp order, so
+its timestamp column already is the sorted array: the index then keeps a
+view of it and no permutation at all.
+"""
+
+import numpy as np
+
+# Drill-down granularities and the numpy unit each one floors to
+GRANULARITIES = {"Day": "D", "Week": "W", "Month": "M"}
+
+# 1970-01-01 was a Thursday; shift so weeks start on Monday
+_EPOCH_WEEKDAY = 3
+
+
+def _datetime_values(timestamps):
+    if isinstance(timestamps, np.ndarray):
+        return timestamps.astype("datetime64[ns]", copy=False)
+    if hasattr(timestamps, "num_chunks"):  # Arrow column
+        timestamps = timestamps.chunk(0) if timestamps.num_chunks == 1 else timestamps.combine_chunks()
+        return timestamps.to_numpy(zero_copy_only=False).astype("datetime64[ns]", copy=False)
+    return timestamps.to_numpy(dtype="datetime64[ns]")
+
+
+class TimeIndex:
+    """Open timestamps in ascending order plus the row each came from.
+
+    ``order`` is ``None`` when the rows were already in timestamp order.
+    """
+
+    def __init__(self, timestamps):
+        values = _datetime_values(timestamps)
+        if not np.isnat(values).any() and not (values[1:] < values[:-1]).any():
+            self.order = None
+            self.sorted = values
+        else:
+            self.order = np.argsort(values, kind="stable").astype(np.int32)
+            self.sorted = values[self.order]
+        # NaT sorts last in numpy; keep it out of every range
+        self.size = int(np.searchsorted(np.isnat(self.sorted), True))
+
+    @property
+    def nbytes(self):
+        """Size of the timestamp and permutation arrays, for the cache's memory cap."""
+        return self.sorted.nbytes + (0 if self.order is None else self.order.nbytes)
+
+    @property
+    def first(self):
+        return self.sorted[0] if self.size else None
+
+    @property
+    def last(self):
+        return self.sorted[self.size - 1] if self.size else None
+
+    def bounds(self, start, end):
+        """Slice bounds of ``start <= t < end`` in the sorted array."""
+        values = self.sorted[: self.size]
+        lo = int(np.searchsorted(values, np.datetime64(start, "ns"), side="left"))
+        hi = int(np.searchsorted(values, np.datetime64(end, "ns"), side="left"))
+        return lo, max(lo, hi)
+
+    def timestamps(self, start, end, positions=None):
+        """Sorted timestamps in ``[start, end)``, optionally only for ``positions``.
+
+        ``positions`` are sorted row positions from another index (e.g.
+        ``FilterIndex.positions``); ``None`` keeps every row.
+        """
+        lo, hi = self.bounds(start, end)
+        in_range = self.sorted[lo:hi]
+        if positions is None:
+            return in_range
+        if self.order is None:
+            # Rows are in time order: the positions inside the range are a slice
+            inside = positions[np.searchsorted(positions, lo) : np.searchsorted(positions, hi)]
+            return self.sorted[inside]
+        keep = np.isin(self.order[lo:hi], positions, assume_unique=True)
+        return in_range[keep]
+
+    def positions(self, start, end):
+        """Row positions with a timestamp in ``[start, end)``, in time order."""
+        lo, hi = self.bounds(start, end)
+        if self.order is None:
+            return np.arange(lo, hi, dtype=np.int32)
+        return self.order[lo:hi]
+
+    def counts(self, start, end, granularity="Day", positions=None):
+        """Request counts per day, week or month bucket within ``[start, end)``.
+
+        Returns ``(bucket_starts, counts)`` with only non-empty buckets.
+        """
+        values = self.timestamps(start, end, positions)
+        buckets = floor(values, granularity)
+        if not len(buckets):
+            return buckets, np.zeros(0, dtype=np.int64)
+        # Input is sorted, so each bucket is one run
+        run_starts = np.concatenate([[0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1])
+        counts = np.diff(np.append(run_starts, len(buckets)))
+        return buckets[run_starts], counts
+
+
+def floor(values, granularity):
+    """Floor ``datetime64`` values to the start of their day, week or month."""
+    unit = GRANULARITIES[granularity]
+    days = values.astype("datetime64[D]")
+    if unit == "D":
+        return days
+    if unit == "W":
+        offset = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+        return days - offset.astype("timedelta64[D]")
+    return values.astype("datetime64[M]").astype("datetime64[D]")
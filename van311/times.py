@@ -0,0 +1,71 @@
+"""Time normalization applied once at ingest.
+
+Every timestamp column is parsed exactly once, with an explicit format, into
+a tz-naive ``datetime64[ns]`` (an int64 underneath). The calendar parts and
+durations the dashboard groups by are derived here too, as small integer or
+float32 columns, and persisted with the data, so the app never parses a
+date string or converts a timezone at runtime.
+
+Service request timestamps are kept as Vancouver wall-clock time: that is
+what the month/weekday/hour charts and the completion-time calculation have
+always used, and it keeps a calendar day a contiguous range of timestamps.
+"""
+
+import numpy as np
+import pandas as pd
+
+LOCAL_TIMEZONE = "America/Vancouver"
+
+# Raw formats
+OPEN_TIMESTAMP_FORMAT = "ISO8601"  # e.g. 2022-09-16T20:21:59-07:00
+CLOSE_DATE_FORMAT = "%Y-%m-%d"
+YEAR_MONTH_FORMAT = "%Y-%m"
+CONTACT_DATE_FORMAT = "%Y-%m-%d"
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def parse_open_timestamps(values):
+    """Offset-qualified ISO timestamps to naive Vancouver wall-clock time."""
+    parsed = pd.to_datetime(values, format=OPEN_TIMESTAMP_FORMAT, errors="coerce", utc=True)
+    return parsed.dt.tz_convert(LOCAL_TIMEZONE).dt.tz_localize(None)
+
+
+def parse_utc_timestamps(values):
+    """Offset-qualified ISO timestamps to tz-aware UTC (for comparisons only)."""
+    return pd.to_datetime(values, format=OPEN_TIMESTAMP_FORMAT, errors="coerce", utc=True)
+
+
+def parse_dates(values, date_format):
+    """Strings in a fixed ``date_format`` to naive timestamps (NaT if invalid)."""
+    return pd.to_datetime(values, format=date_format, errors="coerce")
+
+
+def add_open_time_parts(service_requests):
+    """Add ``month``, ``weekday`` (Monday=0) and ``hour`` of the open timestamp.
+
+    Rows with no valid timestamp get NaN, so they fall out at ``dropna``.
+    """
+    opened = service_requests["Service request open timestamp"].dt
+    service_requests["month"] = opened.month
+    service_requests["weekday"] = opened.weekday
+    service_requests["hour"] = opened.hour
+    return service_requests
+
+
+def add_request_durations(service_requests):
+    """Add the open ``date`` and ``Completion Time (days)`` (NaN if negative)."""
+    opened = service_requests["Service request open timestamp"]
+    service_requests["date"] = opened.dt.normalize()
+    days = (
+        (service_requests["Service request close date"] - opened).dt.total_seconds() / SECONDS_PER_DAY
+    ).astype("float32")
+    service_requests["Completion Time (days)"] = days.where(days >= 0, np.nan)
+    return service_requests
+
+
+def compact_time_parts(service_requests):
+    """Store ``month``/``weekday``/``hour`` as int8."""
+    for column in ["month", "weekday", "hour"]:
+        service_requests[column] = service_requests[column].astype("int8")
+    return service_requests
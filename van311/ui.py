@@ -0,0 +1,125 @@
+"""Page furniture shared by the dashboard pages (``app.py`` and ``pages/``).
+
+Every page calls ``sidebar()`` first and ``debug_panel()`` last, which
+bracket the rerun for ``van311.metrics``, and draws its charts through
+``plotly_chart`` / ``altair_chart`` so their serialization is timed too.
+"""
+
+import inspect
+import json
+from collections import deque
+from pathlib import Path
+
+import streamlit as st
+from streamlit.elements.lib.form_utils import current_form_id
+from streamlit.elements.lib.utils import compute_and_register_element_id, to_key
+from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from van311 import cache, charts, metrics, preload
+
+# Reruns of this session shown in the debug panel's latency figures
+SESSION_RERUNS = 100
+
+
+def sidebar():
+    """Sidebar controls shown on every page; starts timing the rerun and the preload."""
+    context = get_script_run_ctx()
+    page = Path(inspect.currentframe().f_back.f_globals.get("__file__", "app")).stem
+    metrics.start_run(context.session_id if context else None, page)
+    # Read every dataset in the background while this page renders
+    preload.start()
+
+    # Drop cached results, e.g. after rebuilding the store
+    if st.sidebar.button("Clear cached data"):
+        cache.invalidate()
+
+
+def _chart_name(title, default):
+    text = getattr(title, "text", title)
+    return text if isinstance(text, str) and text else default
+
+
+def plotly_chart(figure, **kwargs):
+    """``st.plotly_chart``, timed as a chart span (figure serialization included).
+
+    A ``charts.FigureSpec`` from a ``charts.cache_figure`` builder is sent
+    as its cached JSON, without serializing the figure again.
+    """
+    if isinstance(figure, charts.FigureSpec):
+        with metrics.span(metrics.CHART, f"render {_chart_name(figure.title, 'plotly chart')}"):
+            _plotly_spec_chart(figure, **kwargs)
+        return
+    name = _chart_name(figure.layout.title, "plotly chart")
+    with metrics.span(metrics.CHART, f"render {name}"):
+        st.plotly_chart(figure, **kwargs)
+
+
+def _plotly_spec_chart(figure, use_container_width=True, *, theme="streamlit", key=None, config=None):
+    """The element ``st.plotly_chart`` would send for ``figure``, from its serialized spec."""
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.theme = theme or ""
+    proto.form_id = current_form_id(st._main)
+    proto.spec = figure.json
+    config = dict(config or {})
+    config.setdefault("showLink", False)
+    config.setdefault("linkText", False)
+    proto.config = json.dumps(config)
+    proto.id = compute_and_register_element_id(
+        "plotly_chart",
+        user_key=to_key(key),
+        form_id=proto.form_id,
+        dg=st._main,
+        plotly_spec=proto.spec,
+        plotly_config=proto.config,
+        selection_mode=("points", "box", "lasso"),
+        is_selection_activated=False,
+        theme=theme,
+        use_container_width=use_container_width,
+    )
+    st._main._enqueue("plotly_chart", proto)
+
+
+def altair_chart(chart, **kwargs):
+    """``st.altair_chart``, timed as a chart span."""
+    name = _chart_name(getattr(chart, "title", None), "altair chart")
+    with metrics.span(metrics.CHART, f"render {name}"):
+        st.altair_chart(chart, **kwargs)
+
+
+def debug_panel():
+    """Finish timing the rerun and, if enabled in the sidebar, show its spans."""
+    run = metrics.finish_run()
+    if run is None:
+        return
+    reruns = st.session_state.setdefault("rerun_seconds", deque(maxlen=SESSION_RERUNS))
+    reruns.append(run.ms / 1000)
+
+    if not st.sidebar.checkbox("Show performance panel", key="debug_panel"):
+        return
+    with st.sidebar.expander("Performance", expanded=True):
+        session = {q: metrics.quantile(reruns, q) for q in metrics.QUANTILES}
+        page = metrics.rerun_latency(run.page)
+        st.write(f"**This rerun:** {run.ms:,.0f} ms")
+        st.write(
+            f"**Session** p50 {session[0.5] * 1000:,.0f} ms, p95 {session[0.95] * 1000:,.0f} ms "
+            f"over {len(reruns)} reruns"
+        )
+        st.write(f"**Page, all sessions** p50 {page[0.5] * 1000:,.0f} ms, p95 {page[0.95] * 1000:,.0f} ms")
+        st.dataframe(
+            [
+                {
+                    "Span": "  " * span["depth"] + span["name"],
+                    "Kind": span["kind"],
+                    "Cached": span["cached"],
+                    "ms": round(span["ms"], 1),
+                    "Peak MB": None if span["peak_mb"] is None else round(span["peak_mb"], 1),
+                    "Rows": span["rows"],
+                }
+                for span in run.spans
+            ],
+            hide_index=True,
+        )
+        if not metrics.TRACE_MEMORY:
+            st.caption("Set VAN311_TRACE_MEMORY=1 to record peak memory.")
@@ -0,0 +1,230 @@
+"""Apply only what changed in the raw 311 exports to the local store.
+
+A full ``python -m van311.ingest`` re-reads and re-cleans every export. This
+script instead uses the high-water marks recorded in ``manifest.json``::
+
+    python -m van311.update                # raw files from data/ or GitHub
+    python -m van311.update --source DIR   # raw files from another folder
+
+Service requests are new when their ``BI_ID`` is above the last one stored,
+and changed (e.g. closed since the last run) when their last-modified
+timestamp is newer than the last one stored. Both kinds are cleaned like a
+full ingest and written as one update part next to the base table; readers
+keep the latest version of each request (see ``van311.store``).
+
+The aggregates (``ingest.AGGREGATES``) are maintained without a rebuild: the
+aggregate of the new and changed rows is added and the aggregate of the
+versions they replace is subtracted (``cube.apply_delta``). Inquiry volume
+and contact centre metrics are small, append-only tables and just get their
+new rows appended; the contact centre's rolling service levels are extended
+by the new days only (``sla.extend``).
+
+Update parts can only add versions of requests, not remove them. A request
+re-delivered in a form cleaning drops (say, reopened, so without a close
+date) keeps its stored version in the table and the aggregates until the
+next full ingest, which leaves it out like any other incomplete row.
+
+The manifest is written last, so an interrupted update leaves the store as
+it was and is simply redone by the next run.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from van311 import cube, forecast, ingest, mirror, paths, sla, store, times
+
+
+def _is_candidate(chunk, marks):
+    """Rows of a raw chunk that are new or changed since ``marks``."""
+    if ingest.KEY_COLUMN in chunk.columns and marks.get("max_bi_id") is not None:
+        candidate = chunk[ingest.KEY_COLUMN] > marks["max_bi_id"]
+    else:
+        # Exports without a key can only be appended to by open time
+        opened = times.parse_open_timestamps(chunk["Service request open timestamp"])
+        candidate = opened > pd.Timestamp(marks["max_open_timestamp"])
+    if ingest.LAST_MODIFIED_COLUMN in chunk.columns and marks.get("max_last_modified"):
+        modified = times.parse_utc_timestamps(chunk[ingest.LAST_MODIFIED_COLUMN])
+        candidate |= modified > pd.Timestamp(marks["max_last_modified"])
+    return candidate
+
+
+def _concat_cleaned(frames):
+    """Concatenate cleaned chunks, restoring the categoricals concat widens to object."""
+    frame = pd.concat(frames, ignore_index=True)
+    for column in ingest.SERVICE_REQUEST_CATEGORICALS:
+        frame[column] = frame[column].astype("category")
+    return frame
+
+
+def read_changed_service_requests(locations, marks, geocodes, closure_reason,
+                                  chunk_size=ingest.DEFAULT_CHUNK_SIZE):
+    """Clean the new and changed requests of the given raw exports.
+
+    Returns ``(changed, marks)`` with the marks advanced over every raw row.
+    Every chunk is compared with the ``marks`` passed in; the advanced marks
+    are collected separately, since a request delivered in a later chunk can
+    be below a mark raised by an earlier one and still be new or changed.
+    Candidates that ``clean_service_requests`` drops are left out of
+    ``changed``, so their stored versions stay (see the module docstring).
+    """
+    advanced = dict(marks)
+    cleaned = []
+    for location in locations:
+        for chunk in ingest.read_service_request_chunks(location, chunk_size):
+            candidates = chunk[_is_candidate(chunk, marks).to_numpy()]
+            ingest.track_high_water_marks(advanced, chunk)
+            if len(candidates):
+                cleaned.append(ingest.clean_service_requests(candidates, geocodes, closure_reason))
+    cleaned = [frame for frame in cleaned if len(frame)]
+    if not cleaned:
+        return None, advanced
+    changed = _concat_cleaned(cleaned)
+    if ingest.KEY_COLUMN in changed.columns:
+        changed = changed[~changed[ingest.KEY_COLUMN].duplicated(keep="last")]
+    return changed.reset_index(drop=True), advanced
+
+
+def read_previous_versions(changed, store_dir=None, updates=None):
+    """The stored versions of the requests in ``changed`` (empty if all are new).
+
+    They are looked up in the snapshot's key index (``store.read_service_requests_by_key``);
+    stores without one are scanned for the ids instead.
+    """
+    if ingest.KEY_COLUMN not in changed.columns:
+        return changed.iloc[:0]
+    ids = changed[ingest.KEY_COLUMN].to_numpy()
+    table = store.read_service_requests_by_key(ids, store_dir, updates)
+    if table is not None:
+        return table.to_pandas()
+    table = store.read_service_request_table(
+        store_dir, filters=[(ingest.KEY_COLUMN, "in", ids.tolist())], updates=updates
+    )
+    previous = table.to_pandas()
+    return previous[~previous[ingest.KEY_COLUMN].duplicated(keep="last")]
+
+
+def update_service_requests(source=None, store_dir=None, history=False,
+                            chunk_size=ingest.DEFAULT_CHUNK_SIZE, manifest=None):
+    """Append new and changed requests and update the aggregates. Returns the manifest."""
+    manifest = dict(store.read_manifest(store_dir) if manifest is None else manifest)
+    locations = [mirror.locate(name, source) for name in ingest.service_request_files(history)]
+
+    changed, marks = read_changed_service_requests(
+        locations,
+        manifest["service_requests"],
+        ingest.read_geocodes(source),
+        ingest.read_closure_reasons(source),
+        chunk_size,
+    )
+    manifest["service_requests"] = marks
+    if changed is None:
+        print("service requests: no changes")
+        return manifest
+
+    updates = list(manifest.get("service_request_updates", []))
+    previous = read_previous_versions(changed, store_dir, updates)
+    aggregates = {
+        name: cube.apply_delta(
+            store.load_aggregate(name, store_dir), build(changed), build(previous), dimensions
+        )
+        for name, (build, dimensions) in ingest.AGGREGATES.items()
+    }
+
+    part = f"part-{len(updates):05d}-{time.strftime('%Y%m%dT%H%M%S')}.parquet"
+    store.write_table(changed, f"{paths.SERVICE_REQUEST_UPDATES_DIR}/{part}", store_dir)
+    for name, aggregate in aggregates.items():
+        store.write_table(aggregate, name, store_dir)
+    manifest["service_request_updates"] = updates + [part]
+    # Written before the manifest, which is what tells the app to reload it
+    store.write_service_request_snapshot(store_dir, manifest["service_request_updates"])
+    print(f"service requests: {len(changed) - len(previous):,} new, {len(previous):,} changed")
+    return manifest
+
+
+def update_inquiry_volume(source=None, store_dir=None, manifest=None):
+    """Append inquiry volume rows above the stored ``BI_ID`` mark. Returns the manifest."""
+    manifest = dict(store.read_manifest(store_dir) if manifest is None else manifest)
+    mark = manifest["inquiry_volume"]["max_bi_id"]
+    raw = ingest.read_inquiry_volume(source)
+    new_rows = ingest.clean_inquiry_volume(raw[raw["BI_ID"] > mark])
+    if len(new_rows):
+        inquiry_volume = pd.concat([store.load_inquiry_volume(store_dir), new_rows], ignore_index=True)
+        for column in ingest.INQUIRY_VOLUME_CATEGORICALS:
+            inquiry_volume[column] = inquiry_volume[column].astype("category")
+        store.write_table(inquiry_volume, paths.INQUIRY_VOLUME_PARQUET, store_dir)
+        manifest["inquiry_volume"] = {"max_bi_id": int(raw["BI_ID"].max())}
+    print(f"inquiry volume: {len(new_rows):,} new rows")
+    return manifest
+
+
+def update_contact_centre_metrics(source=None, store_dir=None, manifest=None):
+    """Append contact centre days after the stored date mark. Returns the manifest."""
+    manifest = dict(store.read_manifest(store_dir) if manifest is None else manifest)
+    mark = pd.Timestamp(manifest["contact_centre_metrics"]["max_date"])
+    cleaned = ingest.clean_contact_centre_metrics(ingest.read_contact_centre_metrics(source))
+    new_rows = cleaned[cleaned["Date"] > mark]
+    if len(new_rows):
+        metrics = pd.concat([store.load_contact_centre_metrics(store_dir), new_rows], ignore_index=True)
+        store.write_table(metrics, paths.CONTACT_CENTRE_PARQUET, store_dir)
+        try:
+            rolling = sla.extend(store.load_aggregate(paths.CONTACT_CENTRE_SLA_PARQUET, store_dir), new_rows)
+        except FileNotFoundError:
+            # Stores built before the rolling table existed
+            rolling = sla.build(metrics)
+        store.write_table(rolling, paths.CONTACT_CENTRE_SLA_PARQUET, store_dir)
+        manifest["contact_centre_metrics"] = {"max_date": new_rows["Date"].max().isoformat()}
+    print(f"contact centre metrics: {len(new_rows):,} new rows")
+    return manifest
+
+
+def run(source=None, store_dir=None, history=False, chunk_size=ingest.DEFAULT_CHUNK_SIZE):
+    started = time.perf_counter()
+    manifest = store.read_manifest(store_dir)
+    if "service_requests" not in manifest:
+        # Stores built before the manifest existed have no marks to start from
+        print("no high-water marks in the store; running a full ingest")
+        ingest.run(source, store_dir, history, chunk_size)
+        return
+
+    # Fetch every raw file at once; the readers then find them in the mirror
+    mirror.locate_all(ingest.service_request_files(history) + ingest.RAW_TABLES, source)
+    manifest = update_service_requests(source, store_dir, history, chunk_size, manifest)
+    demand_marks = (manifest["inquiry_volume"], manifest["contact_centre_metrics"])
+    manifest = update_inquiry_volume(source, store_dir, manifest)
+    manifest = update_contact_centre_metrics(source, store_dir, manifest)
+    manifest["updated_at"] = pd.Timestamp.now(tz="UTC").isoformat()
+    store.write_manifest(manifest, store_dir)
+
+    # Forecasts only depend on inquiry volume and call metrics
+    if demand_marks != (manifest["inquiry_volume"], manifest["contact_centre_metrics"]):
+        forecast.run(store_dir)
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply new and changed 311 data to the local store.")
+    parser.add_argument(
+        "--source",
+        help="folder or URL prefix holding the raw exports (default: data/, then GitHub)",
+    )
+    parser.add_argument("--store", type=Path, help="store folder (default: data/store)")
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help="also scan the 2009-2021 service request export",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=ingest.DEFAULT_CHUNK_SIZE,
+        help=f"rows per chunk when streaming exports (default: {ingest.DEFAULT_CHUNK_SIZE:,})",
+    )
+    args = parser.parse_args(argv)
+    run(args.source, args.store, args.history, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()